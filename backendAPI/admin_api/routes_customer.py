@@ -9,7 +9,9 @@ from models import Customer, ImportHistory
 from decorators import admin_required, company_required
 from utils import paginate_query, apply_filters, apply_sorting, format_paginated, load_schema, get_or_404_scoped, check_unique
 from schemas import CustomerCreateSchema, CustomerUpdateSchema, CustomerResponseSchema, ImportHistoryResponseSchema
-from services.import_export import parse_excel, validate_row, export_to_excel, save_import_history, get_history_or_404
+from services.import_export import (parse_excel, validate_row, batched, ImportRowLimitError, export_response,
+                                    save_import_history, get_history_or_404)
+from services.export_jobs import export_source
 from config import IMPORT_DIR
 import os
 
@@ -51,8 +53,7 @@ def create_customer(admin):
     if not admin.has_permission('customers', 'create'):
         return jsonify({'message': 'Permission denied'}), 403
 
-    current_count = Customer.query.filter(Customer.company_id == g.active_company.id).count()
-    if not admin.check_limit('customers', current_count):
+    if not admin.check_limit('customers'):
         return jsonify({'message': 'Customer limit reached for your package'}), 403
 
     data, err = load_schema(CustomerCreateSchema)
@@ -151,24 +152,29 @@ def delete_customer(admin, customer_public_id):
 
 # ── Export ──
 
+def export_row(c):
+    return [
+        c.customer_id, c.name, c.contact_name or '', c.email or '', c.address or '', c.tel or '', c.fax or '',
+        c.creator.name if c.creator else '',
+        c.created_at.isoformat() if c.created_at else '',
+        c.updated_at.isoformat() if c.updated_at else '',
+    ]
+
+
+@export_source('customers', EXPORT_COLUMNS, export_row, 'Customers', 'customers')
+def export_query(company_id, params):
+    return Customer.query.options(joinedload(Customer.creator)) \
+        .filter(Customer.company_id == company_id) \
+        .order_by(Customer.created_at.desc())
+
+
 @admin_bp.route('/customers/export', methods=['GET'])
 @jwt_required()
 @admin_required
 @company_required
 def export_customers(admin):
-    items = Customer.query.options(joinedload(Customer.creator)) \
-        .filter(Customer.company_id == g.active_company.id) \
-        .order_by(Customer.created_at.desc()).all()
-
-    def row_mapper(c):
-        return [
-            c.customer_id, c.name, c.contact_name or '', c.email or '', c.address or '', c.tel or '', c.fax or '',
-            c.creator.name if c.creator else '',
-            c.created_at.isoformat() if c.created_at else '',
-            c.updated_at.isoformat() if c.updated_at else '',
-        ]
-
-    return export_to_excel(items, EXPORT_COLUMNS, row_mapper, 'Customers', 'customers.xlsx')
+    return export_response(export_query(g.active_company.id, request.args), EXPORT_COLUMNS, export_row,
+                           'Customers', 'customers')
 
 
 # ── Import ──
@@ -189,39 +195,44 @@ def import_preview(admin):
     if err:
         return jsonify({'message': err}), 400
 
-    customer_ids = [r['customer_id'] for r in rows if r.get('customer_id')]
-    existing = Customer.query.filter(Customer.customer_id.in_(customer_ids), Customer.company_id == g.active_company.id).all() if customer_ids else []
-    existing_map = {c.customer_id: c for c in existing}
-
     preview_rows = []
-    summary = {'total': len(rows), 'new': 0, 'replace': 0, 'unchanged': 0, 'error': 0}
-
-    for data in rows:
-        status, errors, ex = validate_row(data, existing_map, 'customer_id', REQUIRED_COLUMNS, COMPARE_FIELDS)
-        summary[status] += 1
-
-        row_result = {
-            'row': data['_row'],
-            'customer_id': data.get('customer_id', ''),
-            'name': data.get('name', ''),
-            'contact_name': data.get('contact_name', ''),
-            'email': data.get('email', ''),
-            'address': data.get('address', ''),
-            'tel': data.get('tel', ''),
-            'fax': data.get('fax', ''),
-            'status': status,
-            'errors': errors,
-        }
-        if status == 'replace' and ex:
-            row_result['existing'] = {
-                'name': ex.name,
-                'contact_name': ex.contact_name or '',
-                'email': ex.email or '',
-                'address': ex.address or '',
-                'tel': ex.tel or '',
-                'fax': ex.fax or '',
-            }
-        preview_rows.append(row_result)
+    summary = {'total': 0, 'new': 0, 'replace': 0, 'unchanged': 0, 'error': 0}
+
+    try:
+        for batch in batched(rows):
+            customer_ids = [r['customer_id'] for r in batch if r.get('customer_id')]
+            existing = Customer.query.filter(Customer.customer_id.in_(customer_ids), Customer.company_id == g.active_company.id).all() if customer_ids else []
+            existing_map = {c.customer_id: c for c in existing}
+
+            for data in batch:
+                status, errors, ex = validate_row(data, existing_map, 'customer_id', REQUIRED_COLUMNS, COMPARE_FIELDS)
+                summary['total'] += 1
+                summary[status] += 1
+
+                row_result = {
+                    'row': data['_row'],
+                    'customer_id': data.get('customer_id', ''),
+                    'name': data.get('name', ''),
+                    'contact_name': data.get('contact_name', ''),
+                    'email': data.get('email', ''),
+                    'address': data.get('address', ''),
+                    'tel': data.get('tel', ''),
+                    'fax': data.get('fax', ''),
+                    'status': status,
+                    'errors': errors,
+                }
+                if status == 'replace' and ex:
+                    row_result['existing'] = {
+                        'name': ex.name,
+                        'contact_name': ex.contact_name or '',
+                        'email': ex.email or '',
+                        'address': ex.address or '',
+                        'tel': ex.tel or '',
+                        'fax': ex.fax or '',
+                    }
+                preview_rows.append(row_result)
+    except ImportRowLimitError as e:
+        return jsonify({'message': str(e)}), 400
 
     return jsonify({'rows': preview_rows, 'summary': summary}), 200
 
@@ -0,0 +1,88 @@
+import os
+from flask import request, jsonify, send_file, url_for, g
+from flask_jwt_extended import jwt_required
+from admin_api import admin_bp
+from extensions import db
+from models import ExportJob
+from decorators import admin_required, company_required
+from utils import load_schema, get_or_404_scoped
+from schemas import ExportJobCreateSchema
+from services.export_jobs import EXPORT_SOURCES, download_token, verify_download_token, file_path
+from config import EXPORT_JOBS_MAX_ACTIVE
+
+# Background exports — for data sets that would time out as a direct download:
+#   POST /export-jobs                 {source, format, params} → job (pending)
+#   GET  /export-jobs/<id>            status + rows_done/rows_total; download_url once ready
+#   GET  /export-jobs/<id>/download   ?token=… from download_url (no Authorization header needed)
+# `source` is a key of services.export_jobs.EXPORT_SOURCES (customers, parts, …).
+
+
+def _job_response(job):
+    body = job.to_dict()
+    if job.status == 'ready':
+        body['download_url'] = url_for('admin.download_export_job', job_id=job.public_id,
+                                       token=download_token(job))
+    return body
+
+
+@admin_bp.route('/export-jobs', methods=['POST'])
+@jwt_required()
+@admin_required
+@company_required
+def create_export_job(admin):
+    data, err = load_schema(ExportJobCreateSchema)
+    if err: return err
+
+    source = EXPORT_SOURCES.get(data['source'])
+    if not source:
+        return jsonify({'message': f'Invalid source. Use one of: {", ".join(sorted(EXPORT_SOURCES))}'}), 400
+    if source.permission and not admin.has_permission(*source.permission):
+        return jsonify({'message': 'Permission denied'}), 403
+
+    active = ExportJob.query.filter(
+        ExportJob.company_id == g.active_company.id,
+        ExportJob.status.in_(['pending', 'running']),
+    ).count()
+    if active >= EXPORT_JOBS_MAX_ACTIVE:
+        return jsonify({'message': f'Too many exports in progress (max {EXPORT_JOBS_MAX_ACTIVE}) — try again shortly'}), 429
+
+    job = ExportJob(company_id=g.active_company.id, admin_id=admin.id, source=data['source'],
+                    format=data['format'], params=data['params'])
+    db.session.add(job)
+    db.session.commit()
+    return jsonify({'job': _job_response(job)}), 202
+
+
+@admin_bp.route('/export-jobs', methods=['GET'])
+@jwt_required()
+@admin_required
+@company_required
+def list_export_jobs(admin):
+    jobs = ExportJob.query.filter_by(company_id=g.active_company.id, admin_id=admin.id) \
+        .order_by(ExportJob.id.desc()).limit(20).all()
+    return jsonify({'jobs': [_job_response(job) for job in jobs]}), 200
+
+
+@admin_bp.route('/export-jobs/<job_id>', methods=['GET'])
+@jwt_required()
+@admin_required
+@company_required
+def get_export_job(admin, job_id):
+    job, err = get_or_404_scoped(ExportJob, job_id, g.active_company, label='Export job')
+    if err: return err
+    return jsonify({'job': _job_response(job)}), 200
+
+
+@admin_bp.route('/export-jobs/<job_id>/download', methods=['GET'])
+def download_export_job(job_id):
+    public_id, err = verify_download_token(request.args.get('token', ''))
+    if err:
+        return jsonify({'message': err}), 403
+    if public_id != job_id:
+        return jsonify({'message': 'Invalid download link'}), 403
+
+    job = ExportJob.query.filter_by(public_id=job_id, status='ready').first()
+    if not job or not os.path.exists(file_path(job)):
+        return jsonify({'message': 'Export not found'}), 404
+
+    return send_file(file_path(job), as_attachment=True, download_name=job.download_name)
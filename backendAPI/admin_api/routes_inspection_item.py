@@ -9,7 +9,9 @@ from models import InspectionItem, ImportHistory
 from decorators import admin_required, company_required
 from utils import paginate_query, apply_filters, apply_sorting, format_paginated, load_schema, get_or_404_scoped, check_unique
 from schemas import InspectionItemCreateSchema, InspectionItemUpdateSchema, InspectionItemResponseSchema, ImportHistoryResponseSchema
-from services.import_export import parse_excel, validate_row, export_to_excel, save_import_history, get_history_or_404
+from services.import_export import (parse_excel, validate_row, batched, ImportRowLimitError, export_response,
+                                    save_import_history, get_history_or_404)
+from services.export_jobs import export_source
 from config import IMPORT_DIR
 import os
 
@@ -51,8 +53,7 @@ def create_inspection_item(admin):
     if not admin.has_permission('inspection_items', 'create'):
         return jsonify({'message': 'Permission denied'}), 403
 
-    current_count = InspectionItem.query.filter(InspectionItem.company_id == g.active_company.id).count()
-    if not admin.check_limit('inspection_items', current_count):
+    if not admin.check_limit('inspection_items'):
         return jsonify({'message': 'Inspection item limit reached for your package'}), 403
 
     data, err = load_schema(InspectionItemCreateSchema)
@@ -134,24 +135,29 @@ def delete_inspection_item(admin, item_public_id):
 
 # ── Export ──
 
+def export_row(item):
+    return [
+        item.item_code, item.item_name, item.spec or '',
+        item.creator.name if item.creator else '',
+        item.created_at.isoformat() if item.created_at else '',
+        item.updated_at.isoformat() if item.updated_at else '',
+    ]
+
+
+@export_source('inspection-items', EXPORT_COLUMNS, export_row, 'Inspection Items', 'inspection_items')
+def export_query(company_id, params):
+    return InspectionItem.query.options(joinedload(InspectionItem.creator)) \
+        .filter(InspectionItem.company_id == company_id) \
+        .order_by(InspectionItem.created_at.desc())
+
+
 @admin_bp.route('/inspection-items/export', methods=['GET'])
 @jwt_required()
 @admin_required
 @company_required
 def export_inspection_items(admin):
-    items = InspectionItem.query.options(joinedload(InspectionItem.creator)) \
-        .filter(InspectionItem.company_id == g.active_company.id) \
-        .order_by(InspectionItem.created_at.desc()).all()
-
-    def row_mapper(item):
-        return [
-            item.item_code, item.item_name, item.spec or '',
-            item.creator.name if item.creator else '',
-            item.created_at.isoformat() if item.created_at else '',
-            item.updated_at.isoformat() if item.updated_at else '',
-        ]
-
-    return export_to_excel(items, EXPORT_COLUMNS, row_mapper, 'Inspection Items', 'inspection_items.xlsx')
+    return export_response(export_query(g.active_company.id, request.args), EXPORT_COLUMNS, export_row,
+                           'Inspection Items', 'inspection_items')
 
 
 # ── Import ──
@@ -172,28 +178,33 @@ def import_inspection_preview(admin):
     if err:
         return jsonify({'message': err}), 400
 
-    item_codes = [r['item_code'] for r in rows if r.get('item_code')]
-    existing = InspectionItem.query.filter(InspectionItem.item_code.in_(item_codes), InspectionItem.company_id == g.active_company.id).all() if item_codes else []
-    existing_map = {i.item_code: i for i in existing}
-
     preview_rows = []
-    summary = {'total': len(rows), 'new': 0, 'replace': 0, 'unchanged': 0, 'error': 0}
-
-    for data in rows:
-        status, errors, ex = validate_row(data, existing_map, 'item_code', REQUIRED_COLUMNS, COMPARE_FIELDS)
-        summary[status] += 1
-
-        row_result = {
-            'row': data['_row'],
-            'item_code': data.get('item_code', ''),
-            'item_name': data.get('item_name', ''),
-            'spec': data.get('spec', ''),
-            'status': status,
-            'errors': errors,
-        }
-        if status == 'replace' and ex:
-            row_result['existing'] = {'item_name': ex.item_name, 'spec': ex.spec or ''}
-        preview_rows.append(row_result)
+    summary = {'total': 0, 'new': 0, 'replace': 0, 'unchanged': 0, 'error': 0}
+
+    try:
+        for batch in batched(rows):
+            item_codes = [r['item_code'] for r in batch if r.get('item_code')]
+            existing = InspectionItem.query.filter(InspectionItem.item_code.in_(item_codes), InspectionItem.company_id == g.active_company.id).all() if item_codes else []
+            existing_map = {i.item_code: i for i in existing}
+
+            for data in batch:
+                status, errors, ex = validate_row(data, existing_map, 'item_code', REQUIRED_COLUMNS, COMPARE_FIELDS)
+                summary['total'] += 1
+                summary[status] += 1
+
+                row_result = {
+                    'row': data['_row'],
+                    'item_code': data.get('item_code', ''),
+                    'item_name': data.get('item_name', ''),
+                    'spec': data.get('spec', ''),
+                    'status': status,
+                    'errors': errors,
+                }
+                if status == 'replace' and ex:
+                    row_result['existing'] = {'item_name': ex.item_name, 'spec': ex.spec or ''}
+                preview_rows.append(row_result)
+    except ImportRowLimitError as e:
+        return jsonify({'message': str(e)}), 400
 
     return jsonify({'rows': preview_rows, 'summary': summary}), 200
 
@@ -225,9 +236,8 @@ def import_inspection_confirm(admin):
 
     new_rows_count = sum(1 for r in selected_rows if r['item_code'] not in existing_map)
     if new_rows_count > 0:
-        current_count = InspectionItem.query.filter(InspectionItem.company_id == g.active_company.id).count()
-        if not admin.check_limit('inspection_items', current_count, add_count=new_rows_count):
-            return jsonify({'message': f'Import would exceed inspection item limit (current: {current_count}, adding: {new_rows_count})'}), 403
+        if not admin.check_limit('inspection_items', add_count=new_rows_count):
+            return jsonify({'message': f'Import would exceed inspection item limit (current: {g.active_company.resource_count("inspection_items")}, adding: {new_rows_count})'}), 403
 
     created = 0
     updated = 0
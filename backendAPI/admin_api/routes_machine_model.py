@@ -9,7 +9,9 @@ from models import MachineModel, InspectionItem, ImportHistory
 from decorators import admin_required, company_required
 from utils import paginate_query, apply_filters, apply_sorting, format_paginated, load_schema, get_or_404_scoped, check_unique
 from schemas import MachineModelCreateSchema, MachineModelUpdateSchema, MachineModelResponseSchema, ImportHistoryResponseSchema
-from services.import_export import parse_excel, validate_row, export_to_excel, save_import_history, get_history_or_404
+from services.import_export import (parse_excel, validate_row, batched, ImportRowLimitError, export_response,
+                                    save_import_history, get_history_or_404)
+from services.export_jobs import export_source
 from config import IMPORT_DIR
 import os
 
@@ -63,8 +65,7 @@ def create_machine_model(admin):
     if not admin.has_permission('machine_models', 'create'):
         return jsonify({'message': 'Permission denied'}), 403
 
-    current_count = MachineModel.query.filter(MachineModel.company_id == g.active_company.id).count()
-    if not admin.check_limit('machine_models', current_count):
+    if not admin.check_limit('machine_models'):
         return jsonify({'message': 'Machine model limit reached for your package'}), 403
 
     data, err = load_schema(MachineModelCreateSchema)
@@ -147,24 +148,29 @@ def delete_machine_model(admin, model_public_id):
 
 # ── Export ──
 
+def export_row(m):
+    return [
+        m.model_code, m.model_name,
+        m.creator.name if m.creator else '',
+        m.created_at.isoformat() if m.created_at else '',
+        m.updated_at.isoformat() if m.updated_at else '',
+    ]
+
+
+@export_source('machine-models', EXPORT_COLUMNS, export_row, 'Machine Models', 'machine_models')
+def export_query(company_id, params):
+    return MachineModel.query.options(joinedload(MachineModel.creator)) \
+        .filter(MachineModel.company_id == company_id) \
+        .order_by(MachineModel.created_at.desc())
+
+
 @admin_bp.route('/machine-models/export', methods=['GET'])
 @jwt_required()
 @admin_required
 @company_required
 def export_machine_models(admin):
-    models = MachineModel.query.options(joinedload(MachineModel.creator)) \
-        .filter(MachineModel.company_id == g.active_company.id) \
-        .order_by(MachineModel.created_at.desc()).all()
-
-    def row_mapper(m):
-        return [
-            m.model_code, m.model_name,
-            m.creator.name if m.creator else '',
-            m.created_at.isoformat() if m.created_at else '',
-            m.updated_at.isoformat() if m.updated_at else '',
-        ]
-
-    return export_to_excel(models, EXPORT_COLUMNS, row_mapper, 'Machine Models', 'machine_models.xlsx')
+    return export_response(export_query(g.active_company.id, request.args), EXPORT_COLUMNS, export_row,
+                           'Machine Models', 'machine_models')
 
 
 # ── Import ──
@@ -185,27 +191,32 @@ def import_machine_model_preview(admin):
     if err:
         return jsonify({'message': err}), 400
 
-    model_codes = [r['model_code'] for r in rows if r.get('model_code')]
-    existing = MachineModel.query.filter(MachineModel.model_code.in_(model_codes), MachineModel.company_id == g.active_company.id).all() if model_codes else []
-    existing_map = {m.model_code: m for m in existing}
-
     preview_rows = []
-    summary = {'total': len(rows), 'new': 0, 'replace': 0, 'unchanged': 0, 'error': 0}
-
-    for data in rows:
-        status, errors, ex = validate_row(data, existing_map, 'model_code', REQUIRED_COLUMNS, COMPARE_FIELDS)
-        summary[status] += 1
-
-        row_result = {
-            'row': data['_row'],
-            'model_code': data.get('model_code', ''),
-            'model_name': data.get('model_name', ''),
-            'status': status,
-            'errors': errors,
-        }
-        if status == 'replace' and ex:
-            row_result['existing'] = {'model_name': ex.model_name}
-        preview_rows.append(row_result)
+    summary = {'total': 0, 'new': 0, 'replace': 0, 'unchanged': 0, 'error': 0}
+
+    try:
+        for batch in batched(rows):
+            model_codes = [r['model_code'] for r in batch if r.get('model_code')]
+            existing = MachineModel.query.filter(MachineModel.model_code.in_(model_codes), MachineModel.company_id == g.active_company.id).all() if model_codes else []
+            existing_map = {m.model_code: m for m in existing}
+
+            for data in batch:
+                status, errors, ex = validate_row(data, existing_map, 'model_code', REQUIRED_COLUMNS, COMPARE_FIELDS)
+                summary['total'] += 1
+                summary[status] += 1
+
+                row_result = {
+                    'row': data['_row'],
+                    'model_code': data.get('model_code', ''),
+                    'model_name': data.get('model_name', ''),
+                    'status': status,
+                    'errors': errors,
+                }
+                if status == 'replace' and ex:
+                    row_result['existing'] = {'model_name': ex.model_name}
+                preview_rows.append(row_result)
+    except ImportRowLimitError as e:
+        return jsonify({'message': str(e)}), 400
 
     return jsonify({'rows': preview_rows, 'summary': summary}), 200
 
@@ -237,9 +248,8 @@ def import_machine_model_confirm(admin):
 
     new_rows_count = sum(1 for r in selected_rows if r['model_code'] not in existing_map)
     if new_rows_count > 0:
-        current_count = MachineModel.query.filter(MachineModel.company_id == g.active_company.id).count()
-        if not admin.check_limit('machine_models', current_count, add_count=new_rows_count):
-            return jsonify({'message': f'Import would exceed machine model limit (current: {current_count}, adding: {new_rows_count})'}), 403
+        if not admin.check_limit('machine_models', add_count=new_rows_count):
+            return jsonify({'message': f'Import would exceed machine model limit (current: {g.active_company.resource_count("machine_models")}, adding: {new_rows_count})'}), 403
 
     created = 0
     updated = 0
@@ -4,7 +4,6 @@ from datetime import datetime
 from decimal import Decimal, InvalidOperation
 from flask import request, jsonify, send_file, g
 from flask_jwt_extended import jwt_required
-from openpyxl import load_workbook
 from admin_api import admin_bp
 from extensions import db
 from sqlalchemy.orm import joinedload
@@ -12,7 +11,10 @@ from models import Parts, ImportHistory
 from decorators import admin_required, company_required
 from utils import paginate_query, apply_filters, apply_sorting, format_paginated, load_schema, get_or_404_scoped, check_unique
 from schemas import PartsCreateSchema, PartsUpdateSchema, PartsResponseSchema, ImportHistoryResponseSchema
-from services.import_export import export_to_excel, save_import_history, get_history_or_404, ALLOWED_EXCEL_EXTENSIONS
+from services.import_export import (export_response, save_import_history, get_history_or_404, open_excel, stream_rows,
+                                    batched, ImportRowLimitError)
+from services.export_jobs import export_source
+from services.parts_links import relink
 from config import IMPORT_DIR
 
 
@@ -51,19 +53,11 @@ def _to_decimal(v):
 
 
 def parse_parts_excel(file):
-    """Parse parts Excel with header aliases. Return (rows, err)."""
-    ext = file.filename.rsplit('.', 1)[-1].lower() if '.' in file.filename else ''
-    if ext not in ALLOWED_EXCEL_EXTENSIONS:
-        return None, 'Only .xlsx files are allowed'
-
-    wb = load_workbook(file, data_only=True)
-    ws = wb.active
-    rows_iter = ws.iter_rows(values_only=True)
-
-    header = next(rows_iter, None)
-    if not header:
-        wb.close()
-        return None, 'Excel file is empty'
+    """Parse parts Excel with header aliases. Return (row generator, err)."""
+    sheet, err = open_excel(file)
+    if err:
+        return None, err
+    wb, header, rows_iter = sheet
 
     # Map each raw header to internal field (or skip unknown)
     col_map = {}
@@ -79,8 +73,7 @@ def parse_parts_excel(file):
         expected = ', '.join(['PART No.', 'Parts Name', 'UNIT PRICE'])
         return None, f'Excel must have columns: {expected}'
 
-    rows = []
-    for i, row in enumerate(rows_iter, start=2):
+    def parse_row(i, row):
         data = {'_row': i}
         for internal, idx in col_map.items():
             val = row[idx] if idx < len(row) else None
@@ -88,10 +81,9 @@ def parse_parts_excel(file):
                 data[internal] = float(_to_decimal(val))
             else:
                 data[internal] = str(val).strip() if val is not None else ''
-        rows.append(data)
+        return data
 
-    wb.close()
-    return rows, None
+    return stream_rows(wb, rows_iter, parse_row), None
 
 
 def _validate_parts_row(data, existing_map):
@@ -150,11 +142,7 @@ def create_parts(admin):
     if not admin.has_permission('parts', 'create'):
         return jsonify({'message': 'Permission denied'}), 403
 
-    current_count = Parts.query.filter(
-        Parts.company_id == g.active_company.id,
-        Parts.is_deleted == False,
-    ).count()
-    if not admin.check_limit('parts', current_count):
+    if not admin.check_limit('parts'):
         return jsonify({'message': 'Parts limit reached for your package'}), 403
 
     data, err = load_schema(PartsCreateSchema)
@@ -172,6 +160,8 @@ def create_parts(admin):
     )
 
     db.session.add(part)
+    db.session.flush()
+    relink(g.active_company.id, [part.parts_code])
     db.session.commit()
 
     return jsonify(PartsResponseSchema().dump(part)), 201
@@ -212,6 +202,8 @@ def update_part(admin, part_public_id):
     if 'unit_price' in data:
         part.unit_price = data['unit_price']
 
+    db.session.flush()
+    relink(g.active_company.id, [part.parts_code])
     db.session.commit()
 
     return jsonify(PartsResponseSchema().dump(part)), 200
@@ -238,26 +230,31 @@ def delete_part(admin, part_public_id):
 
 # ── Export ──
 
+def export_row(p):
+    return [
+        p.parts_code,
+        p.parts_name,
+        float(p.unit_price) if p.unit_price is not None else 0.0,
+        p.creator.name if p.creator else '',
+        p.created_at.isoformat() if p.created_at else '',
+        p.updated_at.isoformat() if p.updated_at else '',
+    ]
+
+
+@export_source('parts', EXPORT_COLUMNS, export_row, 'Parts', 'parts')
+def export_query(company_id, params):
+    return Parts.query.options(joinedload(Parts.creator)) \
+        .filter(Parts.company_id == company_id, Parts.is_deleted == False) \
+        .order_by(Parts.created_at.desc())
+
+
 @admin_bp.route('/parts/export', methods=['GET'])
 @jwt_required()
 @admin_required
 @company_required
 def export_parts(admin):
-    items = Parts.query.options(joinedload(Parts.creator)) \
-        .filter(Parts.company_id == g.active_company.id, Parts.is_deleted == False) \
-        .order_by(Parts.created_at.desc()).all()
-
-    def row_mapper(p):
-        return [
-            p.parts_code,
-            p.parts_name,
-            float(p.unit_price) if p.unit_price is not None else 0.0,
-            p.creator.name if p.creator else '',
-            p.created_at.isoformat() if p.created_at else '',
-            p.updated_at.isoformat() if p.updated_at else '',
-        ]
-
-    return export_to_excel(items, EXPORT_COLUMNS, row_mapper, 'Parts', 'parts.xlsx')
+    return export_response(export_query(g.active_company.id, request.args), EXPORT_COLUMNS, export_row,
+                           'Parts', 'parts')
 
 
 # ── Import ──
@@ -278,35 +275,40 @@ def import_parts_preview(admin):
     if err:
         return jsonify({'message': err}), 400
 
-    codes = [r['parts_code'] for r in rows if r.get('parts_code')]
-    existing = Parts.query.filter(
-        Parts.parts_code.in_(codes),
-        Parts.company_id == g.active_company.id,
-        Parts.is_deleted == False,
-    ).all() if codes else []
-    existing_map = {p.parts_code: p for p in existing}
-
     preview_rows = []
-    summary = {'total': len(rows), 'new': 0, 'replace': 0, 'unchanged': 0, 'error': 0}
-
-    for data in rows:
-        status, errors, ex = _validate_parts_row(data, existing_map)
-        summary[status] += 1
-
-        row_result = {
-            'row': data['_row'],
-            'parts_code': data.get('parts_code', ''),
-            'parts_name': data.get('parts_name', ''),
-            'unit_price': data.get('unit_price', 0),
-            'status': status,
-            'errors': errors,
-        }
-        if status == 'replace' and ex:
-            row_result['existing'] = {
-                'parts_name': ex.parts_name,
-                'unit_price': float(ex.unit_price or 0),
-            }
-        preview_rows.append(row_result)
+    summary = {'total': 0, 'new': 0, 'replace': 0, 'unchanged': 0, 'error': 0}
+
+    try:
+        for batch in batched(rows):
+            codes = [r['parts_code'] for r in batch if r.get('parts_code')]
+            existing = Parts.query.filter(
+                Parts.parts_code.in_(codes),
+                Parts.company_id == g.active_company.id,
+                Parts.is_deleted == False,
+            ).all() if codes else []
+            existing_map = {p.parts_code: p for p in existing}
+
+            for data in batch:
+                status, errors, ex = _validate_parts_row(data, existing_map)
+                summary['total'] += 1
+                summary[status] += 1
+
+                row_result = {
+                    'row': data['_row'],
+                    'parts_code': data.get('parts_code', ''),
+                    'parts_name': data.get('parts_name', ''),
+                    'unit_price': data.get('unit_price', 0),
+                    'status': status,
+                    'errors': errors,
+                }
+                if status == 'replace' and ex:
+                    row_result['existing'] = {
+                        'parts_name': ex.parts_name,
+                        'unit_price': float(ex.unit_price or 0),
+                    }
+                preview_rows.append(row_result)
+    except ImportRowLimitError as e:
+        return jsonify({'message': str(e)}), 400
 
     return jsonify({'rows': preview_rows, 'summary': summary}), 200
 
@@ -342,12 +344,8 @@ def import_parts_confirm(admin):
 
     new_rows_count = sum(1 for r in selected_rows if r['parts_code'] not in existing_map)
     if new_rows_count > 0:
-        current_count = Parts.query.filter(
-            Parts.company_id == g.active_company.id,
-            Parts.is_deleted == False,
-        ).count()
-        if not admin.check_limit('parts', current_count, add_count=new_rows_count):
-            return jsonify({'message': f'Import would exceed parts limit (current: {current_count}, adding: {new_rows_count})'}), 403
+        if not admin.check_limit('parts', add_count=new_rows_count):
+            return jsonify({'message': f'Import would exceed parts limit (current: {g.active_company.resource_count("parts")}, adding: {new_rows_count})'}), 403
 
     created = 0
     updated = 0
@@ -370,9 +368,11 @@ def import_parts_confirm(admin):
             created += 1
 
     save_import_history(file, RESOURCE_TYPE, g.active_company.id, admin.id)
+    db.session.flush()
+    relinked = relink(g.active_company.id)
     db.session.commit()
 
-    return jsonify({'created': created, 'updated': updated}), 200
+    return jsonify({'created': created, 'updated': updated, 'relinked': relinked}), 200
 
 
 # ── Import History ──
@@ -1,17 +1,31 @@
 """Parts Summary — aggregate qty/value consumed per parts_code over a date range.
 
-Backed by parts_consumption (normalized usage log). Indexed for fast range +
-group-by queries.
+Date-range summaries read the daily rollup (parts_consumption_daily, see
+services.parts_rollup); search / report_no filters need per-row data and
+aggregate parts_consumption (normalized usage log) directly. With
+PARTS_ANALYTICS_CACHE on, all of them are answered from the in-memory
+columnar cache instead (services.parts_analytics_cache).
 """
-from datetime import datetime, date
+import base64
+import binascii
+import json
+from datetime import datetime, date, timedelta
+from decimal import Decimal
 from flask import request, jsonify, g
 from flask_jwt_extended import jwt_required
-from sqlalchemy import func, or_
+from sqlalchemy import func, or_, and_
 from admin_api import admin_bp
 from extensions import db
 from models import PartsConsumption, Report
 from decorators import admin_required, company_required
-from services.import_export import export_to_excel
+from services.import_export import export_response
+from services.export_jobs import export_source
+from services import parts_rollup
+from services.parts_analytics_cache import parts_cache
+from config import (PARTS_SERIES_MAX_CODES, PARTS_SERIES_MAX_BUCKETS, PARTS_DRILLDOWN_PAGE_SIZE,
+                    PARTS_DRILLDOWN_MAX_PAGE_SIZE)
+
+EXPORT_COLUMNS = ['PART No.', 'Parts Name', 'Total QTR.', 'Total Value']
 
 
 def _parse_date(s):
@@ -23,6 +37,16 @@ def _parse_date(s):
         return None
 
 
+def _summary_filters(args):
+    """(from_dt, to_dt, search, report_no) from query args or an export job's params."""
+    return (
+        _parse_date(args.get('from')),
+        _parse_date(args.get('to')),
+        (args.get('search') or '').strip() or None,
+        (args.get('report_no') or '').strip() or None,
+    )
+
+
 def _summary_query(company_id, from_dt, to_dt, search=None, report_no=None):
     """Build the aggregate query. Returns SQLAlchemy query yielding
     (parts_code, parts_name, total_qty, total_value) rows sorted by qty DESC.
@@ -31,6 +55,9 @@ def _summary_query(company_id, from_dt, to_dt, search=None, report_no=None):
       - search      fuzzy-match on parts_code OR parts_name (case-insensitive)
       - report_no   fuzzy-match on reports.report_no (JOINs reports when set)
     """
+    if not search and not report_no:
+        return parts_rollup.summary_query(company_id, from_dt, to_dt)
+
     q = db.session.query(
         PartsConsumption.parts_code.label('parts_code'),
         func.max(PartsConsumption.parts_name).label('parts_name'),
@@ -55,6 +82,23 @@ def _summary_query(company_id, from_dt, to_dt, search=None, report_no=None):
     return q.group_by(PartsConsumption.parts_code).order_by(func.sum(PartsConsumption.qty).desc())
 
 
+def _summary_rows(company_id, from_dt, to_dt, search=None, report_no=None):
+    """Summary rows from the columnar cache when enabled, else the SQL query (iterable)."""
+    columns = parts_cache.columns(company_id)
+    if columns is not None:
+        return columns.summary(from_dt, to_dt, search, report_no)
+    return _summary_query(company_id, from_dt, to_dt, search, report_no)
+
+
+def export_row(r):
+    return [
+        r.parts_code,
+        r.parts_name or '',
+        int(r.total_qty or 0),
+        float(r.total_value or 0),
+    ]
+
+
 @admin_bp.route('/parts-summary', methods=['GET'])
 @jwt_required()
 @admin_required
@@ -63,12 +107,8 @@ def get_parts_summary(admin):
     if not admin.has_permission('parts', 'view'):
         return jsonify({'message': 'Permission denied'}), 403
 
-    from_dt = _parse_date(request.args.get('from'))
-    to_dt = _parse_date(request.args.get('to'))
-    search = (request.args.get('search') or '').strip() or None
-    report_no = (request.args.get('report_no') or '').strip() or None
-
-    rows = _summary_query(g.active_company.id, from_dt, to_dt, search, report_no).all()
+    from_dt, to_dt, search, report_no = _summary_filters(request.args)
+    rows = _summary_rows(g.active_company.id, from_dt, to_dt, search, report_no)
 
     return jsonify({
         'from': from_dt.isoformat() if from_dt else None,
@@ -87,6 +127,12 @@ def get_parts_summary(admin):
     }), 200
 
 
+@export_source('parts-summary', EXPORT_COLUMNS, export_row, 'Parts Summary', 'parts_summary',
+               permission=('parts', 'view'))
+def export_query(company_id, params):
+    return _summary_rows(company_id, *_summary_filters(params))
+
+
 @admin_bp.route('/parts-summary/export', methods=['GET'])
 @jwt_required()
 @admin_required
@@ -95,29 +141,112 @@ def export_parts_summary(admin):
     if not admin.has_permission('parts', 'view'):
         return jsonify({'message': 'Permission denied'}), 403
 
-    from_dt = _parse_date(request.args.get('from'))
-    to_dt = _parse_date(request.args.get('to'))
-    search = (request.args.get('search') or '').strip() or None
-    report_no = (request.args.get('report_no') or '').strip() or None
+    from_dt, to_dt, _, _ = _summary_filters(request.args)
+    suffix = ''
+    if from_dt or to_dt:
+        suffix = f"_{from_dt.isoformat() if from_dt else 'start'}_to_{to_dt.isoformat() if to_dt else 'end'}"
 
-    rows = _summary_query(g.active_company.id, from_dt, to_dt, search, report_no).all()
+    return export_response(export_query(g.active_company.id, request.args), EXPORT_COLUMNS, export_row,
+                           'Parts Summary', f'parts_summary{suffix}')
 
-    columns = ['PART No.', 'Parts Name', 'Total QTR.', 'Total Value']
 
-    def row_mapper(r):
-        return [
-            r.parts_code,
-            r.parts_name or '',
-            int(r.total_qty or 0),
-            float(r.total_value or 0),
-        ]
+@admin_bp.route('/parts-summary/series', methods=['GET'])
+@jwt_required()
+@admin_required
+@company_required
+def get_parts_series(admin):
+    """Trend chart data: qty/value per part per day|week|month for the top-N parts.
 
-    suffix = ''
-    if from_dt or to_dt:
-        suffix = f"_{from_dt.isoformat() if from_dt else 'start'}_to_{to_dt.isoformat() if to_dt else 'end'}"
-    download_name = f'parts_summary{suffix}.xlsx'
+    Query: from, to (default: last 365 days), bucket=day|week|month (default month),
+    top (default 10, max PARTS_SERIES_MAX_CODES), rank_by=qty|value,
+    codes=P1,P2 (restrict to these parts instead of the overall top-N).
+    """
+    if not admin.has_permission('parts', 'view'):
+        return jsonify({'message': 'Permission denied'}), 403
+
+    to_dt = _parse_date(request.args.get('to')) or date.today()
+    from_dt = _parse_date(request.args.get('from')) or to_dt - timedelta(days=364)
+    if from_dt > to_dt:
+        return jsonify({'message': 'from must be on or before to'}), 400
+
+    bucket = request.args.get('bucket', 'month')
+    if bucket not in parts_rollup.BUCKETS:
+        return jsonify({'message': f'Invalid bucket. Use one of: {", ".join(parts_rollup.BUCKETS)}'}), 400
+    rank_by = request.args.get('rank_by', 'qty')
+    if rank_by not in ('qty', 'value'):
+        return jsonify({'message': 'Invalid rank_by. Use qty or value'}), 400
+
+    codes = [c.strip() for c in (request.args.get('codes') or '').split(',') if c.strip()] or None
+    top = request.args.get('top', len(codes) if codes else 10, type=int)
+    if top < 1 or top > PARTS_SERIES_MAX_CODES or (codes and len(codes) > PARTS_SERIES_MAX_CODES):
+        return jsonify({'message': f'At most {PARTS_SERIES_MAX_CODES} parts per series request'}), 400
+
+    starts = parts_rollup.bucket_range(from_dt, to_dt, bucket)
+    if len(starts) > PARTS_SERIES_MAX_BUCKETS:
+        return jsonify({'message': f'Too many {bucket} buckets ({len(starts)}, max {PARTS_SERIES_MAX_BUCKETS}) '
+                                   f'— use a coarser bucket or a shorter range'}), 400
+
+    starts, series = parts_rollup.series(g.active_company.id, from_dt, to_dt, bucket,
+                                         top=top, codes=codes, rank_by=rank_by)
+    return jsonify({
+        'from': from_dt.isoformat(),
+        'to': to_dt.isoformat(),
+        'bucket': bucket,
+        'rank_by': rank_by,
+        'buckets': [s.isoformat() for s in starts],
+        'series': series,
+    }), 200
 
-    return export_to_excel(rows, columns, row_mapper, 'Parts Summary', download_name)
+
+# Drill-down sort fields: name → (column, cursor value parser)
+# ROUND is a no-op on MySQL DECIMAL; it keeps keyset equality exact where the product is a float
+_LINE_TOTAL = func.round(PartsConsumption.qty * PartsConsumption.unit_price, 2, type_=db.Numeric(14, 2))
+_DRILLDOWN_SORTS = {
+    'consumption_dt': (PartsConsumption.consumption_dt, date.fromisoformat),
+    'qty': (PartsConsumption.qty, int),
+    'unit_price': (PartsConsumption.unit_price, Decimal),
+    'total': (_LINE_TOTAL, Decimal),
+    'report_no': (Report.report_no, str),
+}
+
+
+def _encode_cursor(sort_by, value, row_id):
+    """Opaque page cursor = base64url(json [sort_by, last sort value, last id])."""
+    if isinstance(value, date):
+        value = value.isoformat()
+    elif isinstance(value, Decimal):
+        value = str(value)
+    raw = json.dumps([sort_by, value, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _decode_cursor(value, sort_by):
+    """Return (sort value, id) from a cursor issued for `sort_by`, or None if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)).decode()
+        cursor_sort, last_value, row_id = json.loads(raw)
+        if cursor_sort != sort_by:
+            return None
+        parse = _DRILLDOWN_SORTS[sort_by.lstrip('-')][1]
+        return (None if last_value is None else parse(last_value)), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, ArithmeticError):
+        return None
+
+
+def _after_cursor(column, descending, last_value, last_id):
+    """Keyset condition for rows after (last_value, last_id) in ORDER BY column, id.
+
+    NULLs sort first ascending and last descending (MySQL and SQLite), which
+    only matters for consumption_dt.
+    """
+    pc_id = PartsConsumption.id
+    if descending:
+        if last_value is None:
+            return and_(column.is_(None), pc_id < last_id)
+        return or_(column < last_value, and_(column == last_value, pc_id < last_id), column.is_(None))
+    if last_value is None:
+        return or_(and_(column.is_(None), pc_id > last_id), column.isnot(None))
+    return or_(column > last_value, and_(column == last_value, pc_id > last_id))
 
 
 @admin_bp.route('/parts-summary/by-code/<parts_code>', methods=['GET'])
@@ -125,7 +254,18 @@ def export_parts_summary(admin):
 @admin_required
 @company_required
 def get_parts_usage_by_code(admin, parts_code):
-    """Drill-down: list each report that used this parts_code in the range."""
+    """Drill-down: each report line that used this parts_code in the range.
+
+    Query: from, to, report_no, sort_by (consumption_dt, qty, unit_price,
+    total or report_no; `-` prefix = descending; default -consumption_dt),
+    per_page, cursor.
+
+    Pages are keyed on (sort value, id): follow-up pages pass `next_cursor`
+    from the previous response as `cursor` with the same sort_by. The first
+    page also carries `totals` (qty, value, lines, reports) for the whole
+    filtered range, aggregated in SQL. The default sort is served by
+    ix_pc_bycode (company_id, parts_code, consumption_dt [, id]).
+    """
     if not admin.has_permission('parts', 'view'):
         return jsonify({'message': 'Permission denied'}), 403
 
@@ -133,41 +273,90 @@ def get_parts_usage_by_code(admin, parts_code):
     to_dt = _parse_date(request.args.get('to'))
     report_no = (request.args.get('report_no') or '').strip() or None
 
+    sort_by = request.args.get('sort_by', '-consumption_dt')
+    field, descending = sort_by.lstrip('-'), sort_by.startswith('-')
+    if field not in _DRILLDOWN_SORTS:
+        return jsonify({'message': f'Invalid sort_by. Use one of: {", ".join(_DRILLDOWN_SORTS)}'}), 400
+    sort_column = _DRILLDOWN_SORTS[field][0]
+
+    per_page = request.args.get('per_page', PARTS_DRILLDOWN_PAGE_SIZE, type=int)
+    per_page = max(1, min(per_page, PARTS_DRILLDOWN_MAX_PAGE_SIZE))
+
+    cursor = None
+    if request.args.get('cursor'):
+        cursor = _decode_cursor(request.args['cursor'], sort_by)
+        if cursor is None:
+            return jsonify({'message': 'Invalid cursor'}), 400
+
+    filters = [
+        PartsConsumption.company_id == g.active_company.id,
+        PartsConsumption.parts_code == parts_code,
+    ]
+    if from_dt:
+        filters.append(PartsConsumption.consumption_dt >= from_dt)
+    if to_dt:
+        filters.append(PartsConsumption.consumption_dt <= to_dt)
+    if report_no:
+        filters.append(Report.report_no.ilike(f"%{report_no}%"))
+
     q = db.session.query(
         PartsConsumption.id,
-        PartsConsumption.parts_code,
         PartsConsumption.parts_name,
         PartsConsumption.qty,
         PartsConsumption.unit_price,
+        _LINE_TOTAL.label('total'),
         PartsConsumption.consumption_dt,
         Report.public_id.label('report_id'),
         Report.report_no.label('report_no'),
-    ).join(Report, Report.id == PartsConsumption.report_id).filter(
-        PartsConsumption.company_id == g.active_company.id,
-        PartsConsumption.parts_code == parts_code,
-    )
-    if from_dt:
-        q = q.filter(PartsConsumption.consumption_dt >= from_dt)
-    if to_dt:
-        q = q.filter(PartsConsumption.consumption_dt <= to_dt)
-    if report_no:
-        q = q.filter(Report.report_no.ilike(f"%{report_no}%"))
-    q = q.order_by(PartsConsumption.consumption_dt.desc())
+        sort_column.label('sort_value'),
+    ).join(Report, Report.id == PartsConsumption.report_id).filter(*filters)
+    if cursor:
+        q = q.filter(_after_cursor(sort_column, descending, *cursor))
+    if descending:
+        q = q.order_by(sort_column.desc(), PartsConsumption.id.desc())
+    else:
+        q = q.order_by(sort_column.asc(), PartsConsumption.id.asc())
 
-    rows = q.all()
-    return jsonify({
+    rows = q.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    result = {
         'parts_code': parts_code,
+        'sort_by': sort_by,
+        'per_page': per_page,
         'rows': [
             {
                 'id': r.id,
                 'parts_name': r.parts_name,
                 'qty': r.qty,
                 'unit_price': float(r.unit_price or 0),
-                'total': float(r.unit_price or 0) * (r.qty or 0),
+                'total': float(r.total or 0),
                 'consumption_dt': r.consumption_dt.isoformat() if r.consumption_dt else None,
                 'report_id': r.report_id,
                 'report_no': r.report_no,
             }
             for r in rows
         ],
-    }), 200
+        'has_more': has_more,
+        'next_cursor': _encode_cursor(sort_by, rows[-1].sort_value, rows[-1].id) if has_more else None,
+    }
+
+    if cursor is None:
+        totals = db.session.query(
+            func.coalesce(func.sum(PartsConsumption.qty), 0),
+            func.coalesce(func.sum(_LINE_TOTAL), 0),
+            func.count(PartsConsumption.id),
+            func.count(func.distinct(PartsConsumption.report_id)),
+        ).select_from(PartsConsumption)
+        if report_no:
+            totals = totals.join(Report, Report.id == PartsConsumption.report_id)
+        total_qty, total_value, lines, reports = totals.filter(*filters).one()
+        result['totals'] = {
+            'qty': int(total_qty),
+            'value': float(total_value),
+            'lines': lines,
+            'reports': reports,
+        }
+
+    return jsonify(result), 200
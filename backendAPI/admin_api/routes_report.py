@@ -4,11 +4,14 @@ from flask import jsonify, g, send_file
 from flask_jwt_extended import jwt_required
 from admin_api import admin_bp
 from extensions import db
-from sqlalchemy.orm import joinedload
-from models import Report
+from sqlalchemy.orm import joinedload, defer
+from models import Report, ReportAttachment
 from decorators import admin_required, company_required
 from utils import paginate_query, apply_filters, apply_sorting, format_paginated, load_schema, get_or_404_scoped
-from schemas import ReportResponseSchema, ReportStatusUpdateSchema
+from schemas import ReportResponseSchema, ReportListSchema, ReportStatusUpdateSchema
+from services.image_variants import send_attachment
+from services.form_index import apply_form_filters, resolve_form_sort
+from config import REPORT_INDEXED_FIELDS
 
 
 @admin_bp.route('/reports', methods=['GET'])
@@ -19,7 +22,10 @@ def get_reports(admin):
     if not admin.has_permission('reports', 'view'):
         return jsonify({'message': 'Permission denied'}), 403
 
+    # form_data holds the whole form incl. base64 signatures — never read it for list rows
     query = Report.query.options(
+        defer(Report.form_data, raiseload=True),
+        defer(Report.email_recipients, raiseload=True),
         joinedload(Report.machine_model),
         joinedload(Report.customer),
         joinedload(Report.user),
@@ -34,10 +40,23 @@ def get_reports(admin):
     }
 
     query = apply_filters(query, Report, filters, search_logic='AND')
-    query = apply_sorting(query, Report, sortable_fields=['report_no', 'status', 'created_at', 'updated_at'], default_sort='-created_at')
+    query = apply_form_filters(query, Report, g.active_company.id)
+    query = apply_sorting(query, Report, sortable_fields=['report_no', 'status', 'created_at', 'updated_at'],
+                          default_sort='-created_at', resolve=resolve_form_sort)
     result = paginate_query(query, default_per_page=10)
 
-    return format_paginated('reports', result, schema=ReportResponseSchema())
+    return format_paginated('reports', result, schema=ReportListSchema())
+
+
+@admin_bp.route('/reports/form-fields', methods=['GET'])
+@jwt_required()
+@admin_required
+@company_required
+def get_report_form_fields(admin):
+    """form_data keys usable as form.<key> filters / sort_by in GET /reports."""
+    if not admin.has_permission('reports', 'view'):
+        return jsonify({'message': 'Permission denied'}), 403
+    return jsonify({'fields': REPORT_INDEXED_FIELDS}), 200
 
 
 @admin_bp.route('/reports/<report_public_id>', methods=['GET'])
@@ -70,8 +89,12 @@ def update_report_status(admin, report_public_id):
     valid_transitions = {
         'submitted': ['reviewed'],
         'sent': ['reviewed'],
+        'email_queued': ['reviewed'],
         'email_failed': ['reviewed'],
-        'pending_pdf': ['reviewed'],
+        'pending_pdf': ['reviewed', 'pdf_queued'],
+        # Server render stuck or crashing: retry it, hand it back to the app, or review as is
+        'pdf_queued': ['reviewed', 'pending_pdf'],
+        'rendering_pdf': ['reviewed', 'pdf_queued', 'pending_pdf'],
         'reviewed': ['approved', 'rejected'],
     }
     allowed = valid_transitions.get(report.status, [])
@@ -79,6 +102,8 @@ def update_report_status(admin, report_public_id):
         return jsonify({'message': f'Cannot change from {report.status} to {data["status"]}'}), 400
 
     report.status = data['status']
+    if report.status == 'pdf_queued':
+        report.pdf_render_attempts = 0
     db.session.commit()
 
     return jsonify(ReportResponseSchema().dump(report)), 200
@@ -99,3 +124,37 @@ def get_report_pdf(admin, report_public_id):
         return jsonify({'message': 'PDF not available'}), 404
 
     return send_file(report.pdf_path, mimetype='application/pdf')
+
+
+@admin_bp.route('/reports/<report_public_id>/attachments', methods=['GET'])
+@jwt_required()
+@admin_required
+@company_required
+def get_report_attachments(admin, report_public_id):
+    if not admin.has_permission('reports', 'view'):
+        return jsonify({'message': 'Permission denied'}), 403
+
+    report, err = get_or_404_scoped(Report, report_public_id, g.active_company)
+    if err: return err
+
+    attachments = ReportAttachment.query.filter_by(report_id=report.id).order_by(ReportAttachment.id.asc()).all()
+    return jsonify({'attachments': [a.to_dict() for a in attachments]}), 200
+
+
+@admin_bp.route('/reports/<report_public_id>/attachments/<attachment_id>', methods=['GET'])
+@jwt_required()
+@admin_required
+@company_required
+def get_report_attachment(admin, report_public_id, attachment_id):
+    if not admin.has_permission('reports', 'view'):
+        return jsonify({'message': 'Permission denied'}), 403
+
+    attachment = ReportAttachment.query.join(Report).filter(
+        Report.public_id == report_public_id,
+        Report.company_id == g.active_company.id,
+        ReportAttachment.public_id == attachment_id,
+    ).first()
+    if not attachment:
+        return jsonify({'message': 'Attachment not found'}), 404
+
+    return send_attachment(attachment)
@@ -1,20 +1,19 @@
 from flask import jsonify, g
 from flask_jwt_extended import jwt_required
 from admin_api import admin_bp
-from models import Customer, InspectionItem, Article, User, Admin
+from models import CompanyResourceCount
 from decorators import admin_required, company_required
 
+# From the counters, so `articles` excludes soft-deleted articles (as the
+# Articles list does); machine_models and parts were added alongside them.
+SUMMARY_RESOURCES = ['articles', 'users', 'admins', 'customers', 'inspection_items', 'machine_models', 'parts']
+
 
 @admin_bp.route('/summary', methods=['GET'])
 @jwt_required()
 @admin_required
 @company_required
 def get_summary(admin):
-    company_id = g.active_company.id
-    return jsonify({
-        'articles': Article.query.filter_by(company_id=company_id).count(),
-        'users': User.query.filter_by(company_id=company_id).count(),
-        'admins': Admin.query.filter_by(company_id=company_id).count(),
-        'customers': Customer.query.filter_by(company_id=company_id).count(),
-        'inspection_items': InspectionItem.query.filter_by(company_id=company_id).count(),
-    }), 200
+    # One primary-key range read of the trigger-maintained counters
+    counts = CompanyResourceCount.for_company(g.active_company.id)
+    return jsonify({resource: counts.get(resource, 0) for resource in SUMMARY_RESOURCES}), 200
@@ -7,6 +7,7 @@ from extensions import db, migrate, jwt, limiter
 from admin_api import admin_bp
 from user_api import user_bp
 from commands import register_commands
+from sync_notifier import sync_notifier
 
 # Load environment variables
 load_dotenv()
@@ -61,13 +62,14 @@ def create_app():
     migrate.init_app(app, db)
     jwt.init_app(app)
     limiter.init_app(app)
+    sync_notifier.init_app(db)
     
     # Register blueprints
     app.register_blueprint(admin_bp)
     app.register_blueprint(user_bp)
     
     # Import models to ensure they are registered with SQLAlchemy
-    from models import Company, Admin, User, Article, TokenBlacklist, Summary, AdminSession, Setting, Customer, ImportHistory, InspectionItem
+    from models import Company, Admin, User, Article, TokenBlacklist, Summary, AdminSession, Setting, Customer, ImportHistory, InspectionItem, EmailOutbox, ReportAttachment, IdempotencyKey, UploadSession, ReportFieldValue, CompanyResourceCount, PartsConsumptionDaily, ExportJob
     
     @app.route('/')
     def index():
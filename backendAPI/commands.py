@@ -1,4 +1,7 @@
+import os
+import time
 import click
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from uuid import uuid4
 from datetime import datetime, timedelta, timezone
 from extensions import db
@@ -88,4 +91,236 @@ def register_commands(app):
 
         bl_count = TokenBlacklist.cleanup_expired()
         click.echo(f'Deleted {bl_count} expired blacklist entries')
+
+        from models import EmailOutbox
+        outbox_count = EmailOutbox.query.filter(
+            EmailOutbox.status == 'sent',
+            EmailOutbox.sent_at < cutoff
+        ).delete()
+        db.session.commit()
+        click.echo(f'Deleted {outbox_count} delivered outbox emails')
+
+        from models import IdempotencyKey
+        idem_count = IdempotencyKey.query.filter(
+            IdempotencyKey.expires_at < datetime.now(timezone.utc).replace(tzinfo=None)
+        ).delete()
+        db.session.commit()
+        click.echo(f'Deleted {idem_count} expired idempotency keys')
+
+        from models import UploadSession
+        from services.resumable_upload import discard
+        expired_uploads = UploadSession.query.filter(
+            UploadSession.expires_at < datetime.now(timezone.utc).replace(tzinfo=None)
+        ).all()
+        for upload in expired_uploads:
+            discard(upload)
+            db.session.delete(upload)
+        db.session.commit()
+        click.echo(f'Deleted {len(expired_uploads)} expired upload sessions')
+
+        from services.attachment_storage import prune_orphans
+        orphan_count = prune_orphans(older_than_seconds=24 * 3600)
+        click.echo(f'Deleted {orphan_count} orphaned report attachments')
+
+        from services.export_jobs import prune_jobs
+        export_count = prune_jobs()
+        click.echo(f'Deleted {export_count} expired export jobs')
         click.echo('Cleanup complete')
+
+    @app.cli.command('reindex-report-fields')
+    @click.option('--batch-size', default=500, type=int, help='Reports per transaction')
+    def reindex_report_fields(batch_size):
+        """Rebuild report_field_values from form_data (after changing REPORT_INDEXED_FIELDS)."""
+        from services.form_index import reindex_reports
+        from config import REPORT_INDEXED_FIELDS
+        click.echo(f'Indexing form_data keys: {", ".join(REPORT_INDEXED_FIELDS) or "(none)"}')
+        started = time.perf_counter()
+        written = reindex_reports(batch_size=batch_size)
+        click.echo(f'Wrote {written} field values in {time.perf_counter() - started:.1f}s')
+
+    @app.cli.command('reconcile-resource-counts')
+    @click.option('--company-id', default=None, type=int, help='Only this company (default all)')
+    @click.option('--dry-run',    is_flag=True,             help='Report drift without fixing it')
+    def reconcile_resource_counts(company_id, dry_run):
+        """Recompute company_resource_counts (package limit counters) from the tables."""
+        from services.resource_counts import reconcile
+        drift = reconcile(company_id=company_id, dry_run=dry_run)
+        for cid, resource, stored, actual in drift:
+            click.echo(f'  company {cid} {resource}: {stored if stored is not None else "-"} -> {actual}')
+        click.echo(f'{len(drift)} counters {"would be fixed" if dry_run else "fixed"}')
+
+    @app.cli.command('rebuild-parts-rollup')
+    @click.option('--company-id', default=None, type=int, help='Only this company (default all)')
+    def rebuild_parts_rollup(company_id):
+        """Recompute parts_consumption_daily from parts_consumption."""
+        from services.parts_rollup import rebuild
+        started = time.perf_counter()
+        written = rebuild(company_id=company_id)
+        click.echo(f'Wrote {written} daily rollup rows in {time.perf_counter() - started:.1f}s')
+
+    @app.cli.command('relink-parts-consumption')
+    @click.option('--company-id', default=None, type=int, help='Only this company (default all with unmatched rows)')
+    def relink_parts_consumption(company_id):
+        """Set parts_id on consumption rows whose code is now in the parts master."""
+        from services.parts_links import relink_all
+        started = time.perf_counter()
+        results = relink_all(company_id=company_id)
+        for cid, linked in results:
+            if linked:
+                click.echo(f'  company {cid}: {linked} rows linked')
+        click.echo(f'Linked {sum(n for _, n in results)} rows in {len(results)} companies '
+                   f'in {time.perf_counter() - started:.1f}s')
+
+    @app.cli.command('reextract-parts')
+    @click.option('--company-id', default=None, type=int, help='Only this company (default all)')
+    @click.option('--processes',  default=None, type=int, help='Extraction processes (default PARTS_REEXTRACT_PROCESSES, 0 = inline)')
+    @click.option('--batch-size', default=None, type=int, help='Reports per batch (default PARTS_REEXTRACT_BATCH_SIZE)')
+    @click.option('--resume',     is_flag=True,             help='Continue after the last checkpointed report')
+    def reextract_parts(company_id, processes, batch_size, resume):
+        """Rebuild parts_consumption from reports' form_data, then the daily rollup."""
+        from services.parts_reextract import reextract, read_checkpoint
+        from services.parts_rollup import rebuild
+        from config import PARTS_REEXTRACT_PROCESSES, PARTS_REEXTRACT_BATCH_SIZE, PARTS_REEXTRACT_CHECKPOINT
+        processes = PARTS_REEXTRACT_PROCESSES if processes is None else processes
+        batch_size = batch_size or PARTS_REEXTRACT_BATCH_SIZE
+
+        start_after = 0
+        if resume:
+            saved = read_checkpoint(PARTS_REEXTRACT_CHECKPOINT)
+            if not saved:
+                raise click.ClickException(f'No checkpoint at {PARTS_REEXTRACT_CHECKPOINT}')
+            if saved['company_id'] != company_id:
+                raise click.ClickException(f'Checkpoint is for --company-id {saved["company_id"]}')
+            start_after = saved['last_report_id']
+            click.echo(f'Resuming after report id {start_after}')
+
+        def progress(stats):
+            click.echo(f'  up to report {stats["last_report_id"]}: {stats["reports"]} reports, '
+                       f'{stats["rows"]} rows, {stats["reports"] / max(stats["seconds"], 1e-9):.0f} reports/s')
+
+        os.makedirs(os.path.dirname(PARTS_REEXTRACT_CHECKPOINT), exist_ok=True)
+        click.echo(f'Re-extracting parts (processes={processes}, batch={batch_size})')
+        stats = reextract(company_id=company_id, start_after=start_after, batch_size=batch_size,
+                          processes=processes, checkpoint=PARTS_REEXTRACT_CHECKPOINT, on_progress=progress)
+        seconds = max(stats['seconds'], 1e-9)
+        click.echo(f'Wrote {stats["rows"]} rows for {stats["reports"]} reports in {stats["seconds"]:.1f}s '
+                   f'({stats["reports"] / seconds:.0f} reports/s, {stats["rows"] / seconds:.0f} rows/s)')
+
+        rollup_rows = rebuild(company_id=company_id)
+        click.echo(f'Rebuilt {rollup_rows} daily rollup rows')
+        if os.path.exists(PARTS_REEXTRACT_CHECKPOINT):
+            os.remove(PARTS_REEXTRACT_CHECKPOINT)
+
+    @app.cli.command('export-worker')
+    @click.option('--once', is_flag=True, help='Run pending export jobs once and exit')
+    def export_worker(once):
+        """Write files for queued export jobs (POST /admin-api/export-jobs)."""
+        from services.export_jobs import claim_job, run_job
+        from config import EXPORT_WORKER_POLL_INTERVAL
+
+        click.echo('Export worker started')
+        while True:
+            job_id = claim_job()
+            if job_id:
+                started = time.perf_counter()
+                try:
+                    status = run_job(job_id)
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception('Export job %s failed unexpectedly', job_id)
+                    status = None
+                click.echo(f'Export job {job_id}: {status} in {time.perf_counter() - started:.1f}s')
+                continue
+            if once:
+                break
+            time.sleep(EXPORT_WORKER_POLL_INTERVAL)
+        click.echo('Export worker stopped')
+
+    @app.cli.command('email-worker')
+    @click.option('--concurrency', default=None, type=int, help='Parallel SMTP sends (default EMAIL_WORKER_CONCURRENCY)')
+    @click.option('--once',        is_flag=True,             help='Drain due emails once and exit')
+    def email_worker(concurrency, once):
+        """Deliver queued report emails from the email_outbox table."""
+        from services.email_outbox import claim_due, deliver
+        from services.smtp_pool import smtp_pool
+        from config import EMAIL_WORKER_CONCURRENCY, EMAIL_WORKER_POLL_INTERVAL
+        concurrency = concurrency or EMAIL_WORKER_CONCURRENCY
+
+        def _deliver(outbox_id):
+            # Each thread gets its own app context → its own DB session
+            with app.app_context():
+                try:
+                    return deliver(outbox_id)
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception('Email outbox %s failed unexpectedly', outbox_id)
+                    return None
+
+        click.echo(f'Email worker started (concurrency={concurrency})')
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            while True:
+                ids = claim_due(concurrency * 2)
+                if ids:
+                    results = list(pool.map(_deliver, ids))
+                    click.echo(f'Processed {len(ids)} email(s): '
+                               f'{results.count("sent")} sent, {results.count("pending")} retrying, '
+                               f'{results.count("dead")} dead')
+                    continue
+                if once:
+                    break
+                time.sleep(EMAIL_WORKER_POLL_INTERVAL)
+        smtp_pool.close_all()
+        stats = smtp_pool.stats()
+        click.echo(f'SMTP pool: {stats["handshakes"]} handshake(s), {stats["reused"]} reused, '
+                   f'avg handshake {stats["avg_handshake_ms"]} ms, ~{stats["handshake_ms_saved"]} ms saved')
+        click.echo('Email worker stopped')
+
+    @app.cli.command('image-worker')
+    @click.option('--processes', default=None, type=int, help='Render processes (default IMAGE_WORKER_PROCESSES)')
+    @click.option('--once',      is_flag=True,             help='Render pending attachments once and exit')
+    def image_worker(processes, once):
+        """Render thumbnail/web variants for report attachments."""
+        from services.image_variants import process_pending
+        from config import IMAGE_WORKER_PROCESSES, IMAGE_WORKER_BATCH_SIZE, IMAGE_WORKER_POLL_INTERVAL
+        processes = processes or IMAGE_WORKER_PROCESSES
+
+        click.echo(f'Image worker started (processes={processes})')
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            while True:
+                started = time.perf_counter()
+                results = process_pending(pool, IMAGE_WORKER_BATCH_SIZE)
+                if results:
+                    failed = [(h, detail) for h, status, detail in results if status == 'failed']
+                    for content_hash, detail in failed:
+                        app.logger.warning('Image variants failed for %s: %s', content_hash, detail)
+                    click.echo(f'Rendered {len(results) - len(failed)} image(s), {len(failed)} failed '
+                               f'in {time.perf_counter() - started:.1f}s')
+                    continue
+                if once:
+                    break
+                time.sleep(IMAGE_WORKER_POLL_INTERVAL)
+        click.echo('Image worker stopped')
+
+    @app.cli.command('pdf-worker')
+    @click.option('--processes', default=None, type=int, help='Render processes (default PDF_RENDER_PROCESSES)')
+    @click.option('--once',      is_flag=True,             help='Render queued reports once and exit')
+    def pdf_worker(processes, once):
+        """Render PDFs for reports submitted with render_pdf and queue their emails."""
+        from services.pdf_renderer import process_queued
+        from config import PDF_RENDER_PROCESSES, PDF_WORKER_BATCH_SIZE, PDF_WORKER_POLL_INTERVAL
+        processes = processes or PDF_RENDER_PROCESSES
+
+        click.echo(f'PDF worker started (processes={processes})')
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            while True:
+                started = time.perf_counter()
+                results = process_queued(pool, PDF_WORKER_BATCH_SIZE)
+                if results:
+                    failed = sum(1 for _, ok, _ in results if not ok)
+                    click.echo(f'Rendered {len(results) - failed} PDF(s), {failed} failed '
+                               f'in {time.perf_counter() - started:.1f}s')
+                    continue
+                if once:
+                    break
+                time.sleep(PDF_WORKER_POLL_INTERVAL)
+        click.echo('PDF worker stopped')
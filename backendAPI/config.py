@@ -11,6 +11,29 @@ UPLOAD_DIR = os.path.join(STATIC_DIR, 'uploads')
 ALLOWED_EXCEL_EXTENSIONS = {'xlsx'}
 ALLOWED_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'svg', 'ico', 'webp'}
 
+# Report attachments — budgets are checked while streaming; the whole request
+# is still capped by MAX_UPLOAD_MB (MAX_CONTENT_LENGTH)
+REPORT_ATTACHMENTS_DIR = os.path.join(UPLOAD_DIR, 'reports', 'objects')
+ALLOWED_ATTACHMENT_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp', 'heic', 'heif'}
+ATTACHMENT_MAX_FILE_BYTES = int(os.getenv('ATTACHMENT_MAX_FILE_MB', str(MAX_UPLOAD_MB))) * 1024 * 1024
+ATTACHMENT_MAX_REPORT_BYTES = int(os.getenv('ATTACHMENT_MAX_REPORT_MB', str(MAX_UPLOAD_MB))) * 1024 * 1024
+ATTACHMENT_CHUNK_BYTES = 64 * 1024
+
+# Resumable uploads (POST /user-api/uploads) — temp files stay outside static/
+RESUMABLE_UPLOAD_DIR = os.getenv('RESUMABLE_UPLOAD_DIR', os.path.join(BASE_DIR, 'instance', 'upload_sessions'))
+RESUMABLE_PDF_MAX_BYTES = int(os.getenv('RESUMABLE_PDF_MAX_MB', '50')) * 1024 * 1024
+RESUMABLE_CHUNK_BYTES = int(os.getenv('RESUMABLE_CHUNK_KB', '512')) * 1024
+RESUMABLE_UPLOAD_TTL_HOURS = int(os.getenv('RESUMABLE_UPLOAD_TTL_HOURS', '24'))
+
+# Attachment image variants (flask image-worker) — {size: (max edge px, JPEG quality)}
+IMAGE_VARIANTS = {
+    'thumbnail': (int(os.getenv('IMAGE_THUMBNAIL_PX', '320')), int(os.getenv('IMAGE_THUMBNAIL_QUALITY', '70'))),
+    'web': (int(os.getenv('IMAGE_WEB_PX', '1600')), int(os.getenv('IMAGE_WEB_QUALITY', '82'))),
+}
+IMAGE_WORKER_PROCESSES = int(os.getenv('IMAGE_WORKER_PROCESSES', str(os.cpu_count() or 2)))
+IMAGE_WORKER_BATCH_SIZE = int(os.getenv('IMAGE_WORKER_BATCH_SIZE', '32'))
+IMAGE_WORKER_POLL_INTERVAL = int(os.getenv('IMAGE_WORKER_POLL_INTERVAL', '5'))
+
 # Auth / Session
 RESET_TOKEN_MAX_AGE = int(os.getenv('RESET_TOKEN_MAX_AGE', '3600'))
 GRACE_SECONDS = int(os.getenv('SESSION_GRACE_SECONDS', '30'))
@@ -20,6 +43,66 @@ SSE_TICKET_TTL = int(os.getenv('SSE_TICKET_TTL', '30'))
 # Sync
 SYNC_PAGE_SIZE = int(os.getenv('SYNC_PAGE_SIZE', '100'))
 
+# Report numbers — 'allow': short separate transaction (failed submits leave gaps)
+#                  'none':  gapless, counter row locked for the whole submit
+REPORT_NO_GAP_POLICY = os.getenv('REPORT_NO_GAP_POLICY', 'allow')
+REPORT_NO_BLOCK_SIZE = int(os.getenv('REPORT_NO_BLOCK_SIZE', '1'))
+REPORT_BATCH_MAX_SIZE = int(os.getenv('REPORT_BATCH_MAX_SIZE', '50'))
+
+# flask reextract-parts — extraction processes / reports per batch / resume file
+PARTS_REEXTRACT_PROCESSES = int(os.getenv('PARTS_REEXTRACT_PROCESSES', str(os.cpu_count() or 2)))
+PARTS_REEXTRACT_BATCH_SIZE = int(os.getenv('PARTS_REEXTRACT_BATCH_SIZE', '500'))
+PARTS_REEXTRACT_CHECKPOINT = os.getenv('PARTS_REEXTRACT_CHECKPOINT', os.path.join(BASE_DIR, 'instance', 'parts_reextract.json'))
+
+# Optional NumPy columnar cache for /parts-summary (services.parts_analytics_cache)
+PARTS_ANALYTICS_CACHE = os.getenv('PARTS_ANALYTICS_CACHE', 'false').lower() in ('1', 'true', 'yes')
+PARTS_CACHE_MAX_MB = int(os.getenv('PARTS_CACHE_MAX_MB', '256'))
+PARTS_CACHE_TTL_SECONDS = int(os.getenv('PARTS_CACHE_TTL_SECONDS', '900'))
+
+# /admin-api/parts-summary/series caps: parts per request / buckets per series
+PARTS_SERIES_MAX_CODES = int(os.getenv('PARTS_SERIES_MAX_CODES', '50'))
+PARTS_SERIES_MAX_BUCKETS = int(os.getenv('PARTS_SERIES_MAX_BUCKETS', '750'))
+
+# /admin-api/parts-summary/by-code keyset pages: default / max per_page
+PARTS_DRILLDOWN_PAGE_SIZE = int(os.getenv('PARTS_DRILLDOWN_PAGE_SIZE', '50'))
+PARTS_DRILLDOWN_MAX_PAGE_SIZE = int(os.getenv('PARTS_DRILLDOWN_MAX_PAGE_SIZE', '500'))
+
+# form_data keys copied into report_field_values at submit — filterable/sortable in
+# /admin-api/reports as form.<key>. Run `flask reindex-report-fields` after changing.
+REPORT_INDEXED_FIELDS = [k.strip() for k in os.getenv(
+    'REPORT_INDEXED_FIELDS',
+    'remark,inputResultOk,inputResultNg,inputResultOther,inputOtherComment,textareaHandling,installDate,inspectionDate',
+).split(',') if k.strip()]
+
+# Excel imports — data rows accepted per file / rows validated per existing-record lookup
+IMPORT_MAX_ROWS = int(os.getenv('IMPORT_MAX_ROWS', '100000'))
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', '1000'))
+
+# Excel exports — rows fetched per round trip / spooled in memory before spilling to disk
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '1000'))
+EXPORT_SPOOL_MAX_BYTES = int(os.getenv('EXPORT_SPOOL_MAX_MB', '8')) * 1024 * 1024
+EXPORT_STREAM_CHUNK_BYTES = 64 * 1024
+
+# Background export jobs (flask export-worker) — files in EXPORT_DIR, removed by `flask cleanup`
+EXPORT_DIR = os.path.join(STATIC_DIR, 'exports')
+EXPORT_JOBS_MAX_ACTIVE = int(os.getenv('EXPORT_JOBS_MAX_ACTIVE', '3'))             # pending + running per company
+EXPORT_JOB_LEASE_SECONDS = int(os.getenv('EXPORT_JOB_LEASE_SECONDS', '1800'))
+EXPORT_JOB_RETENTION_HOURS = int(os.getenv('EXPORT_JOB_RETENTION_HOURS', '24'))
+EXPORT_DOWNLOAD_TTL_SECONDS = int(os.getenv('EXPORT_DOWNLOAD_TTL_SECONDS', '600'))
+EXPORT_WORKER_POLL_INTERVAL = int(os.getenv('EXPORT_WORKER_POLL_INTERVAL', '3'))
+
+# Server-side report PDFs (flask pdf-worker)
+PDF_TEMPLATES_DIR = os.getenv('PDF_TEMPLATES_DIR', os.path.join(BASE_DIR, 'pdf_templates'))
+PDF_RENDER_PROCESSES = int(os.getenv('PDF_RENDER_PROCESSES', '2'))
+PDF_WORKER_BATCH_SIZE = int(os.getenv('PDF_WORKER_BATCH_SIZE', '8'))
+PDF_WORKER_POLL_INTERVAL = int(os.getenv('PDF_WORKER_POLL_INTERVAL', '3'))
+PDF_RENDER_LEASE_SECONDS = int(os.getenv('PDF_RENDER_LEASE_SECONDS', '300'))
+PDF_RENDER_MAX_ATTEMPTS = int(os.getenv('PDF_RENDER_MAX_ATTEMPTS', '3'))           # claims before giving up → pending_pdf
+
+# Idempotency-Key replay window for opted-in POST routes
+IDEMPOTENCY_TTL_HOURS = int(os.getenv('IDEMPOTENCY_TTL_HOURS', '24'))
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv('IDEMPOTENCY_LOCK_SECONDS', '120'))
+
 # Rate limiting
 RATE_LIMIT_LOGIN = os.getenv('RATE_LIMIT_LOGIN', '5 per minute')
 RATE_LIMIT_FORGOT_PASSWORD = os.getenv('RATE_LIMIT_FORGOT_PASSWORD', '3 per minute')
@@ -38,6 +121,19 @@ SMTP_PORT = int(os.getenv('SMTP_PORT', '587'))
 SMTP_USERNAME = os.getenv('SMTP_USERNAME', '')
 SMTP_PASSWORD = os.getenv('SMTP_PASSWORD', '')
 SMTP_SENDER_NAME = os.getenv('SMTP_SENDER_NAME', '')
+SMTP_USE_TLS = os.getenv('SMTP_USE_TLS', 'true').lower() in ('1', 'true', 'yes')
+SMTP_TIMEOUT = int(os.getenv('SMTP_TIMEOUT', '30'))
+SMTP_POOL_SIZE = int(os.getenv('SMTP_POOL_SIZE', '4'))
+SMTP_POOL_MAX_MESSAGES = int(os.getenv('SMTP_POOL_MAX_MESSAGES', '100'))
+SMTP_POOL_MAX_IDLE_SECONDS = int(os.getenv('SMTP_POOL_MAX_IDLE_SECONDS', '60'))
+
+# Email outbox worker (flask email-worker)
+EMAIL_WORKER_CONCURRENCY = int(os.getenv('EMAIL_WORKER_CONCURRENCY', '4'))
+EMAIL_WORKER_POLL_INTERVAL = int(os.getenv('EMAIL_WORKER_POLL_INTERVAL', '5'))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', '6'))
+EMAIL_OUTBOX_BACKOFF_SECONDS = int(os.getenv('EMAIL_OUTBOX_BACKOFF_SECONDS', '30'))
+EMAIL_OUTBOX_BACKOFF_MAX_SECONDS = int(os.getenv('EMAIL_OUTBOX_BACKOFF_MAX_SECONDS', '3600'))
+EMAIL_OUTBOX_LEASE_SECONDS = int(os.getenv('EMAIL_OUTBOX_LEASE_SECONDS', '300'))
 
 # Misc
 USER_AGENT_MAX_LENGTH = int(os.getenv('USER_AGENT_MAX_LENGTH', '255'))
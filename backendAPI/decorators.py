@@ -5,13 +5,17 @@
 # Never store a timezone-aware datetime directly — SQLAlchemy will raise SAWarning
 # and SQLite may embed the "+00:00" suffix, breaking subsequent ">" comparisons.
 
+import hashlib
+import logging
 from functools import wraps
-from datetime import datetime, timezone
-from flask import jsonify, request, g
+from datetime import datetime, timedelta, timezone
+from flask import jsonify, request, g, make_response, current_app
 from flask_jwt_extended import get_jwt_identity, get_jwt
 from models import Admin, User, Company
 from session_cache import session_cache
 
+logger = logging.getLogger(__name__)
+
 
 def _get_admin_by_identity(public_id):
     """Lookup admin by public_id (from JWT identity)."""
@@ -138,3 +142,113 @@ def user_required(f):
 
         return f(user, *args, **kwargs)
     return decorated_function
+
+
+# ── Idempotency-Key ──
+
+def _request_fingerprint():
+    """sha256 over method, path, query and body. Multipart files are hashed from
+    Werkzeug's spooled streams in chunks (then rewound) rather than buffering
+    the whole body with get_data()."""
+    h = hashlib.sha256(f"{request.method} {request.full_path}\n".encode())
+    if (request.content_type or '').lower().startswith('multipart/'):
+        for k, v in sorted(request.form.items(multi=True)):
+            h.update(f"{k}={v}\n".encode())
+        for k, f in sorted(request.files.items(multi=True), key=lambda kv: kv[0]):
+            h.update(f"{k}:{f.filename}\n".encode())
+            for chunk in iter(lambda: f.stream.read(65536), b''):
+                h.update(chunk)
+            f.stream.seek(0)
+    else:
+        h.update(request.get_data())
+    return h.hexdigest()
+
+
+def idempotent(f):
+    """Opt-in `Idempotency-Key` support for POST routes — place below the auth decorator.
+
+    First request with a key runs the route and stores its response; a retry
+    with the same key (per authenticated principal) and the same request
+    replays it with `Idempotent-Replayed: true`. Same key with a different
+    request → 422; a retry while the first is still running → 409.
+    Only 2xx responses are stored: after a 4xx/5xx the key is released, so the
+    client can fix the request (e.g. a draft that failed validation) and send
+    it again under the same key.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return f(*args, **kwargs)
+        if len(key) > 255:
+            return jsonify({'message': 'Idempotency-Key too long (max 255)'}), 400
+
+        from extensions import db
+        from models import IdempotencyKey
+        from sqlalchemy.exc import IntegrityError
+        from config import IDEMPOTENCY_TTL_HOURS, IDEMPOTENCY_LOCK_SECONDS
+
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        scope = f"{get_jwt().get('user_type')}:{get_jwt_identity()}"
+        request_hash = _request_fingerprint()
+
+        entry = IdempotencyKey.query.filter_by(scope=scope, key=key).first()
+        # Expired, or abandoned mid-request (worker died) → start over
+        if entry and (entry.expires_at <= now or (
+                entry.status == 'in_progress' and entry.created_at < now - timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS))):
+            db.session.delete(entry)
+            db.session.flush()
+            entry = None
+
+        if entry:
+            if entry.request_hash != request_hash:
+                return jsonify({'message': 'Idempotency-Key was already used with a different request'}), 422
+            if entry.status != 'completed':
+                return jsonify({'message': 'A request with this Idempotency-Key is still being processed'}), 409
+            response = current_app.response_class(entry.response_body, status=entry.response_status,
+                                                   mimetype=entry.response_mimetype)
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+
+        entry = IdempotencyKey(scope=scope, key=key, request_hash=request_hash,
+                               expires_at=now + timedelta(hours=IDEMPOTENCY_TTL_HOURS))
+        db.session.add(entry)
+        try:
+            db.session.commit()
+        except IntegrityError:  # concurrent first attempt won the insert
+            db.session.rollback()
+            return jsonify({'message': 'A request with this Idempotency-Key is still being processed'}), 409
+        entry_id = entry.id
+
+        try:
+            response = make_response(f(*args, **kwargs))
+        except Exception:
+            db.session.rollback()
+            IdempotencyKey.query.filter_by(id=entry_id).delete()
+            db.session.commit()
+            raise
+
+        db.session.rollback()  # the route commits its own work; drop anything it left pending
+        try:
+            if not 200 <= response.status_code < 300 or response.is_streamed:
+                IdempotencyKey.query.filter_by(id=entry_id).delete()
+            else:
+                IdempotencyKey.query.filter_by(id=entry_id).update({
+                    'status': 'completed',
+                    'response_status': response.status_code,
+                    'response_body': response.get_data(as_text=True),
+                    'response_mimetype': response.mimetype,
+                })
+            db.session.commit()
+        except Exception:
+            # The route's work is already committed: return its real response
+            # rather than a 500, and release the key instead of leaving it in_progress.
+            logger.exception('Could not store response for Idempotency-Key %s', key)
+            db.session.rollback()
+            try:
+                IdempotencyKey.query.filter_by(id=entry_id).delete()
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+        return response
+    return decorated_function
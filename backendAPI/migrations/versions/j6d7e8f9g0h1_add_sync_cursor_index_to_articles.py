@@ -0,0 +1,24 @@
+"""Add (company_id, updated_at, id) index to articles for sync keyset paging
+
+Revision ID: j6d7e8f9g0h1
+Revises: i5c6d7e8f9g0
+Create Date: 2026-10-19 09:00:00.000000
+
+/user-api/sync pages on (updated_at, id) within a company. The composite index
+lets MySQL seek straight to the cursor position and read rows already ordered.
+"""
+from alembic import op
+
+
+revision = 'j6d7e8f9g0h1'
+down_revision = 'i5c6d7e8f9g0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_articles_company_updated_id', 'articles', ['company_id', 'updated_at', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_articles_company_updated_id', table_name='articles')
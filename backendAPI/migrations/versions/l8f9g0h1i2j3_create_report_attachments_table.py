@@ -0,0 +1,46 @@
+"""Create report_attachments table for content-addressed report images
+
+Revision ID: l8f9g0h1i2j3
+Revises: k7e8f9g0h1i2
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'l8f9g0h1i2j3'
+down_revision = 'k7e8f9g0h1i2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'report_attachments',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('public_id', sa.String(length=36), nullable=False),
+        sa.Column('report_id', sa.Integer(), nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=True),
+        sa.Column('field_name', sa.String(length=100), nullable=False),
+        sa.Column('original_filename', sa.String(length=255), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('ext', sa.String(length=10), nullable=False),
+        sa.Column('content_type', sa.String(length=100), nullable=True),
+        sa.Column('size_bytes', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['report_id'], ['reports.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('public_id'),
+    )
+    op.create_index('ix_report_attachments_report_id', 'report_attachments', ['report_id'])
+    op.create_index('ix_report_attachments_company_id', 'report_attachments', ['company_id'])
+    op.create_index('ix_report_attachments_content_hash', 'report_attachments', ['content_hash'])
+
+
+def downgrade():
+    op.drop_index('ix_report_attachments_content_hash', table_name='report_attachments')
+    op.drop_index('ix_report_attachments_company_id', table_name='report_attachments')
+    op.drop_index('ix_report_attachments_report_id', table_name='report_attachments')
+    op.drop_table('report_attachments')
@@ -0,0 +1,25 @@
+"""Add variants_status to report_attachments
+
+Revision ID: m9g0h1i2j3k4
+Revises: l8f9g0h1i2j3
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'm9g0h1i2j3k4'
+down_revision = 'l8f9g0h1i2j3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('report_attachments', sa.Column('variants_status', sa.String(length=20), nullable=False, server_default='pending'))
+    op.create_index('ix_report_attachments_variants_status', 'report_attachments', ['variants_status'])
+
+
+def downgrade():
+    op.drop_index('ix_report_attachments_variants_status', table_name='report_attachments')
+    op.drop_column('report_attachments', 'variants_status')
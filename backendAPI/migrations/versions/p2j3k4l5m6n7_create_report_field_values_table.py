@@ -0,0 +1,40 @@
+"""Create report_field_values side index for form_data search
+
+Revision ID: p2j3k4l5m6n7
+Revises: o1i2j3k4l5m6
+Create Date: 2026-10-19 15:00:00.000000
+
+Existing reports are indexed by `flask reindex-report-fields`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'p2j3k4l5m6n7'
+down_revision = 'o1i2j3k4l5m6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'report_field_values',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('report_id', sa.Integer(), nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=False),
+        sa.Column('field_key', sa.String(length=100), nullable=False),
+        sa.Column('value_text', sa.String(length=255), nullable=False),
+        sa.Column('value_num', sa.Numeric(precision=18, scale=4), nullable=True),
+        sa.ForeignKeyConstraint(['report_id'], ['reports.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('report_id', 'field_key', name='uq_rfv_report_key'),
+    )
+    op.create_index('ix_rfv_text', 'report_field_values', ['company_id', 'field_key', 'value_text'])
+    op.create_index('ix_rfv_num', 'report_field_values', ['company_id', 'field_key', 'value_num'])
+
+
+def downgrade():
+    op.drop_index('ix_rfv_num', table_name='report_field_values')
+    op.drop_index('ix_rfv_text', table_name='report_field_values')
+    op.drop_table('report_field_values')
@@ -0,0 +1,114 @@
+"""Create company_resource_counts with per-company count triggers
+
+Revision ID: q3k4l5m6n7o8
+Revises: p2j3k4l5m6n7
+Create Date: 2026-10-19 16:00:00.000000
+
+One counter row per (company, resource), maintained by AFTER INSERT /
+UPDATE / DELETE triggers so Company.check_limit no longer runs COUNT(*).
+Soft-deleted rows (is_deleted = 1) are not counted; UPDATE triggers move
+the count when is_deleted or company_id changes. Must stay in sync with
+services/resource_counts.tracked_resources().
+
+reports are not tracked: the upsert would lock the company's single counter
+row from every submit until commit, serializing submits per company again.
+Company.resource_count counts them with a non-locking COUNT(*) instead.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'q3k4l5m6n7o8'
+down_revision = 'p2j3k4l5m6n7'
+branch_labels = None
+depends_on = None
+
+# resource → (table, soft-delete column or None)
+TRACKED = {
+    'users': ('users', None),
+    'admins': ('admins', None),
+    'articles': ('articles', 'is_deleted'),
+    'customers': ('customers', None),
+    'inspection_items': ('inspection_items', None),
+    'machine_models': ('machine_models', None),
+    'parts': ('parts', 'is_deleted'),
+}
+
+
+def _live(row, soft_delete):
+    return f"{row}.{soft_delete} = 0" if soft_delete else "TRUE"
+
+
+def _increment(resource, row):
+    return (f"INSERT INTO company_resource_counts (company_id, resource, row_count, updated_at) "
+            f"VALUES ({row}.company_id, '{resource}', 1, NOW()) "
+            f"ON DUPLICATE KEY UPDATE row_count = row_count + 1, updated_at = NOW()")
+
+
+def _decrement(resource, row):
+    return (f"UPDATE company_resource_counts SET row_count = row_count - 1, updated_at = NOW() "
+            f"WHERE company_id = {row}.company_id AND resource = '{resource}'")
+
+
+def upgrade():
+    op.create_table(
+        'company_resource_counts',
+        sa.Column('company_id', sa.Integer(), nullable=False),
+        sa.Column('resource', sa.String(length=50), nullable=False),
+        sa.Column('row_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('company_id', 'resource'),
+    )
+
+    for resource, (table, soft_delete) in TRACKED.items():
+        where = f"company_id IS NOT NULL AND {soft_delete} = 0" if soft_delete else "company_id IS NOT NULL"
+        op.execute(
+            f"INSERT INTO company_resource_counts (company_id, resource, row_count) "
+            f"SELECT company_id, '{resource}', COUNT(*) FROM `{table}` WHERE {where} GROUP BY company_id"
+        )
+
+        op.execute(f"""
+            CREATE TRIGGER trg_{table}_crc_insert
+            AFTER INSERT ON `{table}`
+            FOR EACH ROW
+            BEGIN
+                IF NEW.company_id IS NOT NULL AND {_live('NEW', soft_delete)} THEN
+                    {_increment(resource, 'NEW')};
+                END IF;
+            END
+        """)
+
+        op.execute(f"""
+            CREATE TRIGGER trg_{table}_crc_delete
+            AFTER DELETE ON `{table}`
+            FOR EACH ROW
+            BEGIN
+                IF OLD.company_id IS NOT NULL AND {_live('OLD', soft_delete)} THEN
+                    {_decrement(resource, 'OLD')};
+                END IF;
+            END
+        """)
+
+        op.execute(f"""
+            CREATE TRIGGER trg_{table}_crc_update
+            AFTER UPDATE ON `{table}`
+            FOR EACH ROW
+            BEGIN
+                DECLARE was_counted BOOLEAN DEFAULT OLD.company_id IS NOT NULL AND {_live('OLD', soft_delete)};
+                DECLARE is_counted BOOLEAN DEFAULT NEW.company_id IS NOT NULL AND {_live('NEW', soft_delete)};
+                IF was_counted AND NOT (is_counted AND NEW.company_id <=> OLD.company_id) THEN
+                    {_decrement(resource, 'OLD')};
+                END IF;
+                IF is_counted AND NOT (was_counted AND NEW.company_id <=> OLD.company_id) THEN
+                    {_increment(resource, 'NEW')};
+                END IF;
+            END
+        """)
+
+
+def downgrade():
+    for table, _ in TRACKED.values():
+        for event in ('insert', 'update', 'delete'):
+            op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_crc_{event}")
+    op.drop_table('company_resource_counts')
@@ -0,0 +1,47 @@
+"""Create parts_consumption_daily rollup and backfill it
+
+Revision ID: r4l5m6n7o8p9
+Revises: q3k4l5m6n7o8
+Create Date: 2026-10-19 17:00:00.000000
+
+One row per (company, day, parts_code); kept current by submit_report,
+rebuilt with `flask rebuild-parts-rollup`. Undated consumption rows are
+rolled up under 1000-01-01.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'r4l5m6n7o8p9'
+down_revision = 'q3k4l5m6n7o8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'parts_consumption_daily',
+        sa.Column('company_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('parts_code', sa.String(length=100), nullable=False),
+        sa.Column('parts_name', sa.String(length=255), nullable=False),
+        sa.Column('total_qty', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('total_value', sa.Numeric(16, 2), nullable=False, server_default='0'),
+        sa.Column('row_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        # PK order serves "company + date range, GROUP BY parts_code"
+        sa.PrimaryKeyConstraint('company_id', 'day', 'parts_code'),
+    )
+
+    op.execute("""
+        INSERT INTO parts_consumption_daily
+            (company_id, day, parts_code, parts_name, total_qty, total_value, row_count)
+        SELECT company_id, COALESCE(consumption_dt, '1000-01-01'), parts_code,
+               MAX(parts_name), SUM(qty), SUM(qty * unit_price), COUNT(*)
+        FROM parts_consumption
+        GROUP BY company_id, COALESCE(consumption_dt, '1000-01-01'), parts_code
+    """)
+
+
+def downgrade():
+    op.drop_table('parts_consumption_daily')
@@ -0,0 +1,24 @@
+"""Add (company_id, id) index on parts_consumption
+
+Revision ID: s5m6n7o8p9q0
+Revises: r4l5m6n7o8p9
+Create Date: 2026-10-19 18:00:00.000000
+
+Lets the parts analytics cache fetch a company's rows above the last id it
+loaded without scanning the company's whole history.
+"""
+from alembic import op
+
+
+revision = 's5m6n7o8p9q0'
+down_revision = 'r4l5m6n7o8p9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_pc_company_id', 'parts_consumption', ['company_id', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_pc_company_id', table_name='parts_consumption')
@@ -0,0 +1,55 @@
+"""Create export_jobs table for background exports
+
+Revision ID: t6n7o8p9q0r1
+Revises: s5m6n7o8p9q0
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 't6n7o8p9q0r1'
+down_revision = 's5m6n7o8p9q0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'export_jobs',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('public_id', sa.String(length=36), nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=False),
+        sa.Column('admin_id', sa.Integer(), nullable=False),
+        sa.Column('source', sa.String(length=50), nullable=False),
+        sa.Column('format', sa.String(length=10), nullable=False),
+        sa.Column('params', sa.JSON(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='pending'),
+        sa.Column('rows_total', sa.Integer(), nullable=True),
+        sa.Column('rows_done', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('stored_filename', sa.String(length=64), nullable=True),
+        sa.Column('download_name', sa.String(length=255), nullable=True),
+        sa.Column('size_bytes', sa.BigInteger(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('locked_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['admin_id'], ['admins.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('public_id'),
+    )
+    op.create_index('ix_export_jobs_admin_id', 'export_jobs', ['admin_id'])
+    op.create_index('ix_export_jobs_created_at', 'export_jobs', ['created_at'])
+    op.create_index('ix_export_jobs_status', 'export_jobs', ['status', 'id'])
+    op.create_index('ix_export_jobs_company_status', 'export_jobs', ['company_id', 'status'])
+
+
+def downgrade():
+    op.drop_index('ix_export_jobs_company_status', table_name='export_jobs')
+    op.drop_index('ix_export_jobs_status', table_name='export_jobs')
+    op.drop_index('ix_export_jobs_created_at', table_name='export_jobs')
+    op.drop_index('ix_export_jobs_admin_id', table_name='export_jobs')
+    op.drop_table('export_jobs')
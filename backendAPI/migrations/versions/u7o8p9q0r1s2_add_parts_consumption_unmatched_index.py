@@ -0,0 +1,24 @@
+"""Add (company_id, parts_id, parts_code) index on parts_consumption
+
+Revision ID: u7o8p9q0r1s2
+Revises: t6n7o8p9q0r1
+Create Date: 2026-10-19 20:00:00.000000
+
+Finds a company's rows with parts_id IS NULL (and their codes) for the
+relink UPDATE … JOIN without scanning its whole consumption history.
+"""
+from alembic import op
+
+
+revision = 'u7o8p9q0r1s2'
+down_revision = 't6n7o8p9q0r1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_pc_unmatched', 'parts_consumption', ['company_id', 'parts_id', 'parts_code'])
+
+
+def downgrade():
+    op.drop_index('ix_pc_unmatched', table_name='parts_consumption')
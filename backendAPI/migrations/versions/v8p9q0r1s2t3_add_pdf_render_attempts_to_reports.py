@@ -0,0 +1,23 @@
+"""Add pdf_render_attempts to reports
+
+Revision ID: v8p9q0r1s2t3
+Revises: u7o8p9q0r1s2
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'v8p9q0r1s2t3'
+down_revision = 'u7o8p9q0r1s2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('reports', sa.Column('pdf_render_attempts', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    op.drop_column('reports', 'pdf_render_attempts')
@@ -19,10 +19,19 @@ from .customer import Customer
 from .import_history import ImportHistory
 from .inspection_item import InspectionItem
 from .machine_model import MachineModel, machine_model_inspection_items
-from .report import Report, ReportCounter, generate_report_no
-from .parts import Parts, PartsConsumption
+from .report import Report, ReportCounter, generate_report_no, generate_report_nos
+from .parts import Parts, PartsConsumption, PartsConsumptionDaily
+from .email_outbox import EmailOutbox
+from .report_attachment import ReportAttachment
+from .idempotency_key import IdempotencyKey
+from .upload_session import UploadSession
+from .report_field_value import ReportFieldValue
+from .company_resource_count import CompanyResourceCount
+from .export_job import ExportJob
 
 __all__ = ['Company', 'Admin', 'AdminRole', 'User', 'Article', 'TokenBlacklist', 'Summary', 'AdminSession', 'Setting',
            'Package', 'PackageLimit', 'PackageRolePermission', 'Customer', 'ImportHistory', 'InspectionItem',
-           'MachineModel', 'machine_model_inspection_items', 'Report', 'ReportCounter', 'generate_report_no',
-           'Parts', 'PartsConsumption']
\ No newline at end of file
+           'MachineModel', 'machine_model_inspection_items', 'Report', 'ReportCounter', 'generate_report_no', 'generate_report_nos',
+           'Parts', 'PartsConsumption', 'PartsConsumptionDaily', 'EmailOutbox', 'ReportAttachment',
+           'IdempotencyKey', 'UploadSession',
+           'ReportFieldValue', 'CompanyResourceCount', 'ExportJob']
\ No newline at end of file
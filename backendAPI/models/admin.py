@@ -45,7 +45,7 @@ class Admin(PasswordMixin, db.Model):
             action=action
         ).first() is not None
 
-    def check_limit(self, resource, current_count, add_count=1):
+    def check_limit(self, resource, current_count=None, add_count=1):
         """Delegate to company-level limit check. Admin with no company is denied."""
         if not self.company:
             return False
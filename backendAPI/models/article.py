@@ -17,7 +17,12 @@ class Article(db.Model):
     is_deleted = db.Column(db.Boolean, nullable=False, default=False)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None), onupdate=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
-    
+
+    __table_args__ = (
+        # /user-api/sync keyset pagination: WHERE company_id ORDER BY updated_at, id
+        db.Index('ix_articles_company_updated_id', 'company_id', 'updated_at', 'id'),
+    )
+
     def to_dict(self):
         return {
             'id': self.public_id,
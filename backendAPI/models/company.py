@@ -23,9 +23,22 @@ class Company(db.Model):
     def is_root(self):
         return self.parent_id == 0
 
-    def check_limit(self, resource, current_count, add_count=1):
+    def resource_count(self, resource):
+        """Current row count of `resource` from the trigger-maintained counters.
+
+        Reports are counted with COUNT(*) instead: a counter row would be locked
+        by every submit until commit (migration q3k4l5m6n7o8)."""
+        if resource == 'reports':
+            from models.report import Report
+            return Report.query.filter(Report.company_id == self.id).count()
+        from models.company_resource_count import CompanyResourceCount
+        return CompanyResourceCount.get(self.id, resource)
+
+    def check_limit(self, resource, current_count=None, add_count=1):
         """True if adding `add_count` more items stays within this company's package limit.
-        Root companies (parent_id=0) bypass all limits."""
+        Root companies (parent_id=0) bypass all limits.
+        `current_count` defaults to the maintained counter, read only when the package
+        actually limits `resource`."""
         if self.is_root:
             return True
         if not self.package_id:
@@ -40,6 +53,8 @@ class Company(db.Model):
             return True
         if limit.max_value == _UNLIMITED:
             return True
+        if current_count is None:
+            current_count = self.resource_count(resource)
         return (current_count + add_count) <= limit.max_value
 
     def to_dict(self):
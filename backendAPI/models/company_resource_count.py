@@ -0,0 +1,27 @@
+from extensions import db
+
+
+class CompanyResourceCount(db.Model):
+    """Live row count per (company, resource) for package limit checks.
+
+    Maintained by MySQL triggers on each tracked table (see migration
+    q3k4l5m6n7o8) inside the writing transaction, so limit checks and
+    /admin-api/summary read one row instead of COUNT(*) over the tenant.
+    Soft-deleted articles/parts are not counted; reports have no counter. `flask reconcile-resource-counts`
+    recomputes them from the tables.
+    """
+    __tablename__ = 'company_resource_counts'
+
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id', ondelete='CASCADE'), primary_key=True)
+    resource = db.Column(db.String(50), primary_key=True)
+    row_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime)
+
+    @classmethod
+    def get(cls, company_id, resource):
+        row = db.session.get(cls, (company_id, resource))
+        return max(row.row_count, 0) if row else 0
+
+    @classmethod
+    def for_company(cls, company_id):
+        return {r.resource: max(r.row_count, 0) for r in cls.query.filter_by(company_id=company_id).all()}
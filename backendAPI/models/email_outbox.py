@@ -0,0 +1,31 @@
+from extensions import db
+from datetime import datetime, timezone
+
+
+class EmailOutbox(db.Model):
+    """Report emails waiting for delivery by `flask email-worker`.
+
+    Rows are written in the same transaction that moves the report to
+    `email_queued`, so a committed report always has its email queued.
+    status: pending → sending → sent | dead (attempts exhausted)
+    """
+    __tablename__ = 'email_outbox'
+
+    id = db.Column(db.Integer, primary_key=True)
+    report_id = db.Column(db.Integer, db.ForeignKey('reports.id', ondelete='CASCADE'), nullable=False, index=True)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id', ondelete='CASCADE'), nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    sent_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None), onupdate=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+
+    report = db.relationship('Report', backref=db.backref('email_outbox', passive_deletes=True), lazy=True)
+
+    __table_args__ = (
+        # Worker claim: WHERE status = 'pending' AND next_attempt_at <= now
+        db.Index('ix_email_outbox_status_next', 'status', 'next_attempt_at'),
+    )
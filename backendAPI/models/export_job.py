@@ -0,0 +1,54 @@
+from uuid import uuid4
+from extensions import db
+from datetime import datetime, timezone
+
+
+class ExportJob(db.Model):
+    """Background export requested via POST /admin-api/export-jobs and written
+    by `flask export-worker` into EXPORT_DIR.
+
+    status: pending → running → ready | failed
+    """
+    __tablename__ = 'export_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    public_id = db.Column(db.String(36), unique=True, nullable=False, default=lambda: str(uuid4()))
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id', ondelete='CASCADE'), nullable=False)
+    admin_id = db.Column(db.Integer, db.ForeignKey('admins.id', ondelete='CASCADE'), nullable=False, index=True)
+    source = db.Column(db.String(50), nullable=False)            # services.export_jobs.EXPORT_SOURCES key
+    format = db.Column(db.String(10), nullable=False)            # xlsx | csv
+    params = db.Column(db.JSON, nullable=True)                   # source filters (e.g. parts-summary range)
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    rows_total = db.Column(db.Integer, nullable=True)
+    rows_done = db.Column(db.Integer, nullable=False, default=0)
+    stored_filename = db.Column(db.String(64), nullable=True)    # random name inside EXPORT_DIR
+    download_name = db.Column(db.String(255), nullable=True)
+    size_bytes = db.Column(db.BigInteger, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None), index=True)
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None), onupdate=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+
+    __table_args__ = (
+        # Worker claim: WHERE status = 'pending' ORDER BY id
+        db.Index('ix_export_jobs_status', 'status', 'id'),
+        db.Index('ix_export_jobs_company_status', 'company_id', 'status'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.public_id,
+            'source': self.source,
+            'format': self.format,
+            'params': self.params or {},
+            'status': self.status,
+            'rows_total': self.rows_total,
+            'rows_done': self.rows_done,
+            'progress': round(100 * self.rows_done / self.rows_total, 1) if self.rows_total else None,
+            'download_name': self.download_name,
+            'size_bytes': self.size_bytes,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
@@ -0,0 +1,29 @@
+from extensions import db
+from sqlalchemy.dialects import mysql
+from datetime import datetime, timezone
+
+
+class IdempotencyKey(db.Model):
+    """Stored outcome of a POST sent with an Idempotency-Key header.
+
+    A retry with the same key and the same request replays `response_*`
+    instead of running the route again (see decorators.idempotent).
+    status: in_progress → completed
+    """
+    __tablename__ = 'idempotency_keys'
+
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(100), nullable=False)        # "<user_type>:<public_id>"
+    key = db.Column(db.String(255), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='in_progress')
+    response_status = db.Column(db.Integer, nullable=True)
+    # LONGTEXT on MySQL: report responses carry form_data with base64 signatures (> 64 KB TEXT)
+    response_body = db.Column(db.Text().with_variant(mysql.LONGTEXT(), 'mysql'), nullable=True)
+    response_mimetype = db.Column(db.String(100), nullable=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    __table_args__ = (
+        db.UniqueConstraint('scope', 'key', name='uq_idempotency_scope_key'),
+    )
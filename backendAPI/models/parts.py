@@ -62,3 +62,21 @@ class PartsConsumption(db.Model):
             'total': float(self.unit_price or 0) * (self.qty or 0),
             'consumption_dt': self.consumption_dt.isoformat() if self.consumption_dt else None,
         }
+
+
+class PartsConsumptionDaily(db.Model):
+    """Rollup of parts_consumption: one row per (company, day, parts_code).
+
+    Updated in the submit transaction (services.parts_rollup.add_consumption);
+    `flask rebuild-parts-rollup` recomputes it from the raw rows. Raw rows with
+    no consumption_dt are rolled up under UNDATED (1000-01-01).
+    """
+    __tablename__ = 'parts_consumption_daily'
+
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id', ondelete='CASCADE'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    parts_code = db.Column(db.String(100), primary_key=True)
+    parts_name = db.Column(db.String(255), nullable=False)
+    total_qty = db.Column(db.BigInteger, nullable=False, default=0)
+    total_value = db.Column(db.Numeric(16, 2), nullable=False, default=0)
+    row_count = db.Column(db.Integer, nullable=False, default=0)
@@ -1,7 +1,9 @@
+import threading
 from uuid import uuid4
 from extensions import db
 from datetime import datetime, timezone
 from sqlalchemy import text
+from config import REPORT_NO_GAP_POLICY, REPORT_NO_BLOCK_SIZE
 
 
 class ReportCounter(db.Model):
@@ -29,6 +31,7 @@ class Report(db.Model):
     sent_at = db.Column(db.DateTime, nullable=True)
     email_recipients = db.Column(db.JSON, nullable=True)
     pdf_path = db.Column(db.String(500), nullable=True)
+    pdf_render_attempts = db.Column(db.Integer, nullable=False, default=0)  # pdf-worker claims (capped by PDF_RENDER_MAX_ATTEMPTS)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None), onupdate=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
 
@@ -60,8 +63,18 @@ class Report(db.Model):
         }
 
 
-def generate_report_no(company_id):
-    year = int(datetime.now(timezone.utc).strftime('%y'))
+def _format_report_no(seq, year):
+    return f"RPT-{seq:06d}/{year}"
+
+
+def _current_year():
+    return int(datetime.now(timezone.utc).strftime('%y'))
+
+
+def _generate_report_no_locked(company_id, year, count=1):
+    """Gapless: bump the counter inside the caller's transaction.
+    The row lock is held until that transaction commits, so concurrent
+    submissions from one company serialize — but a rollback returns the number."""
     db.session.execute(text(
         "INSERT INTO report_counters (company_id, year, last_seq) "
         "VALUES (:cid, :yr, 0) "
@@ -70,5 +83,95 @@ def generate_report_no(company_id):
     counter = db.session.query(ReportCounter) \
         .filter_by(company_id=company_id, year=year) \
         .with_for_update().first()
-    counter.last_seq += 1
-    return f"RPT-{counter.last_seq:06d}/{year}"
+    counter.last_seq += count
+    return counter.last_seq
+
+
+def _reserve_seq_block(company_id, year, size):
+    """Reserve `size` numbers in a separate, immediately committed transaction.
+    Returns the last number of the block. LAST_INSERT_ID(expr) hands the new
+    value back on the same connection, so the row lock lasts one statement."""
+    with db.engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO report_counters (company_id, year, last_seq) "
+            "VALUES (:cid, :yr, LAST_INSERT_ID(:n)) "
+            "ON DUPLICATE KEY UPDATE last_seq = LAST_INSERT_ID(last_seq + :n)"
+        ), {'cid': company_id, 'yr': year, 'n': size})
+        return conn.execute(text("SELECT LAST_INSERT_ID()")).scalar()
+
+
+class ReportNoAllocator:
+    """Hands out report sequence numbers without holding report_counters locks
+    for the length of submit_report.
+
+    block_size=1 takes one number per call in its own short transaction.
+    block_size>1 reserves a range per process and serves it from memory; numbers
+    left in a block when the process exits are skipped (gaps), and numbers from
+    concurrent processes interleave rather than follow submission order.
+    """
+
+    def __init__(self, block_size=1):
+        self._block_size = max(block_size, 1)
+        self._lock = threading.Lock()  # guards _key_locks only
+        self._key_locks = {}           # (company_id, year) -> Lock
+        self._blocks = {}              # (company_id, year) -> [next_seq, last_seq]
+
+    def _key_lock(self, key):
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    def next_seq(self, company_id, year):
+        if self._block_size == 1:
+            # Nothing cached in memory — the counter UPDATE is atomic on its own
+            return _reserve_seq_block(company_id, year, 1)
+
+        # One lock per company-year: a block reservation (a DB round trip)
+        # only holds up callers of the same counter
+        key = (company_id, year)
+        with self._key_lock(key):
+            block = self._blocks.get(key)
+            if block and block[0] <= block[1]:
+                seq = block[0]
+                block[0] += 1
+                return seq
+            last = _reserve_seq_block(company_id, year, self._block_size)
+            first = last - self._block_size + 1
+            self._blocks[key] = [first + 1, last]
+            return first
+
+
+report_no_allocator = ReportNoAllocator(block_size=REPORT_NO_BLOCK_SIZE)
+
+
+def generate_report_no(company_id):
+    """Next report number for the company, e.g. RPT-000042/26.
+
+    REPORT_NO_GAP_POLICY:
+      'allow' (default) — allocate outside the request transaction; a submit
+                          that later fails leaves a gap in the sequence
+      'none'            — strictly gapless; serializes per company-year
+    """
+    year = _current_year()
+    if REPORT_NO_GAP_POLICY == 'none':
+        seq = _generate_report_no_locked(company_id, year)
+    else:
+        seq = report_no_allocator.next_seq(company_id, year)
+    return _format_report_no(seq, year)
+
+
+def generate_report_nos(company_id, count):
+    """`count` consecutive report numbers in one allocation (batch submit).
+
+    Under 'allow' the whole range is reserved with a single statement and
+    bypasses the per-process block cache; under 'none' the locked counter is
+    bumped by `count` inside the caller's transaction.
+    """
+    year = _current_year()
+    if REPORT_NO_GAP_POLICY == 'none':
+        last = _generate_report_no_locked(company_id, year, count)
+    else:
+        last = _reserve_seq_block(company_id, year, count)
+    return [_format_report_no(seq, year) for seq in range(last - count + 1, last + 1)]
@@ -0,0 +1,44 @@
+from uuid import uuid4
+from extensions import db
+from datetime import datetime, timezone
+
+
+class ReportAttachment(db.Model):
+    """Image attached to a report at submit time.
+
+    The bytes live once per content hash under static/uploads/reports/objects
+    (see services.attachment_storage); rows here are cheap references, so the
+    same photo attached to several reports is stored on disk only once.
+    """
+    __tablename__ = 'report_attachments'
+
+    id = db.Column(db.Integer, primary_key=True)
+    public_id = db.Column(db.String(36), unique=True, nullable=False, default=lambda: str(uuid4()))
+    report_id = db.Column(db.Integer, db.ForeignKey('reports.id', ondelete='CASCADE'), nullable=False, index=True)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id', ondelete='CASCADE'), nullable=True, index=True)
+    field_name = db.Column(db.String(100), nullable=False)
+    original_filename = db.Column(db.String(255), nullable=False)
+    content_hash = db.Column(db.String(64), nullable=False, index=True)
+    ext = db.Column(db.String(10), nullable=False)
+    content_type = db.Column(db.String(100), nullable=True)
+    size_bytes = db.Column(db.Integer, nullable=False)
+    # pending → ready | failed (original is served); set by flask image-worker
+    variants_status = db.Column(db.String(20), nullable=False, default='pending', index=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+
+    report = db.relationship('Report', backref=db.backref('attachments', passive_deletes=True), lazy=True)
+
+    @property
+    def object_name(self):
+        return f"{self.content_hash}.{self.ext}"
+
+    def to_dict(self):
+        return {
+            'id': self.public_id,
+            'field_name': self.field_name,
+            'original_filename': self.original_filename,
+            'content_type': self.content_type,
+            'size_bytes': self.size_bytes,
+            'variants_status': self.variants_status,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+        }
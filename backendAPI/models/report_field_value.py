@@ -0,0 +1,23 @@
+from extensions import db
+
+
+class ReportFieldValue(db.Model):
+    """One indexed form_data value of a report (keys from REPORT_INDEXED_FIELDS).
+
+    Written at submit time next to parts_consumption; makes chosen form keys
+    filterable / sortable in /admin-api/reports without scanning form_data JSON.
+    value_num is set when the value parses as a number (range filters, numeric sort).
+    """
+    __tablename__ = 'report_field_values'
+    __table_args__ = (
+        db.UniqueConstraint('report_id', 'field_key', name='uq_rfv_report_key'),
+        db.Index('ix_rfv_text', 'company_id', 'field_key', 'value_text'),
+        db.Index('ix_rfv_num', 'company_id', 'field_key', 'value_num'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    report_id = db.Column(db.Integer, db.ForeignKey('reports.id', ondelete='CASCADE'), nullable=False)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id', ondelete='CASCADE'), nullable=False)
+    field_key = db.Column(db.String(100), nullable=False)
+    value_text = db.Column(db.String(255), nullable=False)
+    value_num = db.Column(db.Numeric(18, 4), nullable=True)
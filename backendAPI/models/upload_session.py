@@ -0,0 +1,43 @@
+from uuid import uuid4
+from extensions import db
+from datetime import datetime, timezone
+
+
+class UploadSession(db.Model):
+    """Resumable upload: bytes arrive in chunks via PUT /uploads/<id> into a
+    temp file; finalize verifies size + sha256 and hands the file to its
+    target (report PDF or report attachment).
+
+    status: open → finalized
+    """
+    __tablename__ = 'upload_sessions'
+
+    id = db.Column(db.Integer, primary_key=True)
+    public_id = db.Column(db.String(36), unique=True, nullable=False, default=lambda: str(uuid4()))
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    report_id = db.Column(db.Integer, db.ForeignKey('reports.id', ondelete='CASCADE'), nullable=False, index=True)
+    purpose = db.Column(db.String(20), nullable=False)          # report_pdf | report_attachment
+    field_name = db.Column(db.String(100), nullable=True)       # attachments: mobile key (pic1 …)
+    filename = db.Column(db.String(255), nullable=False)
+    total_size = db.Column(db.BigInteger, nullable=False)
+    received_bytes = db.Column(db.BigInteger, nullable=False, default=0)
+    sha256 = db.Column(db.String(64), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='open')
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None), onupdate=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+
+    report = db.relationship('Report', lazy=True)
+
+    def to_dict(self):
+        return {
+            'id': self.public_id,
+            'report_id': self.report.public_id if self.report else None,
+            'purpose': self.purpose,
+            'field_name': self.field_name,
+            'filename': self.filename,
+            'size': self.total_size,
+            'offset': self.received_bytes,
+            'status': self.status,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+        }
@@ -364,6 +364,7 @@ class ReportCreateSchema(Schema):
     serial_no = fields.String(load_default=None)
     inspector_name = fields.String(load_default=None)
     inspected_at = fields.DateTime(format='iso', load_default=None)
+    render_pdf = fields.Boolean(load_default=False)  # server renders the PDF (flask pdf-worker)
 
     @validates('form_data')
     def validate_form_data(self, value, **kwargs):
@@ -371,10 +372,21 @@ class ReportCreateSchema(Schema):
             raise ValidationError('form_data must not be empty')
 
 
+class UploadSessionCreateSchema(Schema):
+    class Meta:
+        unknown = EXCLUDE
+    purpose = fields.String(required=True, validate=validate.OneOf(['report_pdf', 'report_attachment']))
+    report_id = fields.String(required=True)
+    filename = fields.String(required=True, validate=validate.Length(min=1, max=255))
+    size = fields.Integer(required=True, validate=validate.Range(min=1))
+    sha256 = fields.String(required=True, validate=validate.Regexp(r'^[0-9a-fA-F]{64}$', error='Must be a hex SHA-256 digest'))
+    field_name = fields.String(load_default=None, validate=validate.Length(max=100))
+
+
 class ReportStatusUpdateSchema(Schema):
     class Meta:
         unknown = EXCLUDE
-    status = fields.String(required=True, validate=validate.OneOf(['reviewed', 'approved', 'rejected']))
+    status = fields.String(required=True, validate=validate.OneOf(['reviewed', 'approved', 'rejected', 'pdf_queued', 'pending_pdf']))
 
 
 class ReportResponseSchema(Schema):
@@ -414,6 +426,13 @@ class ReportResponseSchema(Schema):
         return obj.pdf_path if obj.pdf_path else None
 
 
+class ReportListSchema(ReportResponseSchema):
+    """List rows: form_data / email_recipients are deferred in the list queries
+    and only returned by GET /reports/<id>."""
+    class Meta:
+        exclude = ('form_data', 'email_recipients')
+
+
 # ── Report Settings ──
 
 class ReportSettingsSchema(Schema):
@@ -470,3 +489,13 @@ class PartsResponseSchema(Schema):
 
     def get_created_by_name(self, obj):
         return obj.creator.name if obj.creator else None
+
+
+# ── Export jobs ──
+
+class ExportJobCreateSchema(Schema):
+    class Meta:
+        unknown = EXCLUDE
+    source = fields.String(required=True, validate=validate.Length(min=1, max=50))
+    format = fields.String(load_default='xlsx', validate=validate.OneOf(['xlsx', 'csv']))
+    params = fields.Dict(keys=fields.String(), values=fields.String(allow_none=True), load_default=dict)
@@ -0,0 +1,140 @@
+"""Content-addressed storage for report image attachments.
+
+`store_uploads` runs before the report transaction starts: each upload is
+copied from Werkzeug's stream in ATTACHMENT_CHUNK_BYTES chunks into a temp
+file next to the object store while it is hashed, then renamed to
+`objects/<sha256[:2]>/<sha256>.<ext>`. An identical photo already on disk is
+reused instead of written again. The route only inserts the metadata rows
+(ReportAttachment) inside its transaction.
+
+Budgets are enforced while streaming, so an oversized file is abandoned as
+soon as it crosses the limit instead of after it has been written:
+  ATTACHMENT_MAX_FILE_BYTES    per file
+  ATTACHMENT_MAX_REPORT_BYTES  all files of one submit
+
+Objects whose submit failed after storing are not referenced by any row;
+`prune_orphans` (run by `flask cleanup`) removes them once they are old.
+"""
+import hashlib
+import os
+import tempfile
+import time
+from werkzeug.utils import secure_filename
+from extensions import db
+from config import (REPORT_ATTACHMENTS_DIR, ALLOWED_ATTACHMENT_EXTENSIONS, ATTACHMENT_MAX_FILE_BYTES,
+                    ATTACHMENT_MAX_REPORT_BYTES, ATTACHMENT_CHUNK_BYTES)
+
+
+def _mb(n):
+    return n // 1024 // 1024
+
+
+def object_path(content_hash, ext):
+    return os.path.join(REPORT_ATTACHMENTS_DIR, content_hash[:2], f"{content_hash}.{ext}")
+
+
+def extension(filename):
+    return filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+
+
+def _stream_to_object(file, ext, budget):
+    """Copy one upload into the object store. Returns (content_hash, size), or (None, error)."""
+    os.makedirs(REPORT_ATTACHMENTS_DIR, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+
+    fd, tmp_path = tempfile.mkstemp(dir=REPORT_ATTACHMENTS_DIR, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = file.stream.read(ATTACHMENT_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > ATTACHMENT_MAX_FILE_BYTES:
+                    return None, f'{file.filename} is too large (max {_mb(ATTACHMENT_MAX_FILE_BYTES)}MB per file)'
+                if size > budget:
+                    return None, f'Attachments too large (max {_mb(ATTACHMENT_MAX_REPORT_BYTES)}MB per report)'
+                digest.update(chunk)
+                out.write(chunk)
+
+        if size == 0:
+            return None, f'{file.filename} is empty'
+
+        content_hash = digest.hexdigest()
+        adopt_object(tmp_path, content_hash, ext)
+        return (content_hash, size), None
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def adopt_object(src_path, content_hash, ext):
+    """Move an already-hashed file into the object store (or drop it on a dedupe hit)."""
+    final_path = object_path(content_hash, ext)
+    if os.path.exists(final_path):
+        # Dedupe hit — refresh mtime so prune_orphans leaves it alone until the row commits
+        os.utime(final_path)
+        os.remove(src_path)
+    else:
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(src_path, final_path)
+    return final_path
+
+
+def store_uploads(files):
+    """Stream every file in `files` (request.files) into the object store.
+
+    Returns (stored, error). `stored` is a list of dicts ready for
+    ReportAttachment(**item, report_id=..., company_id=...).
+    """
+    stored = []
+    budget = ATTACHMENT_MAX_REPORT_BYTES
+
+    for field_name, f in files.items(multi=True):
+        if not f or not f.filename:
+            continue
+
+        ext = extension(f.filename)
+        if ext not in ALLOWED_ATTACHMENT_EXTENSIONS:
+            return None, f'{f.filename}: file type not allowed'
+
+        result, err = _stream_to_object(f, ext, budget)
+        if err:
+            return None, err
+
+        content_hash, size = result
+        budget -= size
+        stored.append({
+            'field_name': field_name[:100],
+            'original_filename': (secure_filename(f.filename) or f'{field_name}.{ext}')[:255],
+            'content_hash': content_hash,
+            'ext': ext,
+            'content_type': (f.mimetype or '')[:100] or None,
+            'size_bytes': size,
+        })
+
+    return stored, None
+
+
+def prune_orphans(older_than_seconds):
+    """Delete stored objects no ReportAttachment references. Returns the count removed."""
+    from models import ReportAttachment
+
+    if not os.path.isdir(REPORT_ATTACHMENTS_DIR):
+        return 0
+
+    referenced = {h for (h,) in db.session.query(ReportAttachment.content_hash).distinct()}
+    cutoff = time.time() - older_than_seconds
+    removed = 0
+
+    for root, _, names in os.walk(REPORT_ATTACHMENTS_DIR):
+        for name in names:
+            path = os.path.join(root, name)
+            content_hash = name.split('.', 1)[0]
+            if content_hash in referenced or os.path.getmtime(path) >= cutoff:
+                continue
+            os.remove(path)
+            removed += 1
+
+    return removed
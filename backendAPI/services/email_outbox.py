@@ -0,0 +1,121 @@
+"""Transactional outbox for report emails.
+
+Routes call `enqueue_report_email` before their own commit; the email row and
+the report status change land together. `flask email-worker` then claims due
+rows, sends them off the request path and records the outcome on the report:
+
+  success            → outbox 'sent',  report 'sent' + sent_at
+  failure, retryable → outbox 'pending' again, next_attempt_at backed off
+  attempts exhausted → outbox 'dead',  report 'email_failed' (user can retry)
+
+The report status only changes while it is still email_queued / pending_pdf.
+"""
+import logging
+import smtplib
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import or_, and_, case, update
+from extensions import db
+from models import EmailOutbox, Report
+from services.email_service import send_report_email
+from config import (EMAIL_OUTBOX_MAX_ATTEMPTS, EMAIL_OUTBOX_BACKOFF_SECONDS,
+                    EMAIL_OUTBOX_BACKOFF_MAX_SECONDS, EMAIL_OUTBOX_LEASE_SECONDS)
+
+logger = logging.getLogger(__name__)
+
+# Report statuses the worker may move to 'sent' / 'email_failed'
+AWAITING_EMAIL_STATUSES = ('email_queued', 'pending_pdf')
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def enqueue_report_email(report):
+    """Queue the report email and mark the report `email_queued`. Caller commits."""
+    report.status = 'email_queued'
+    entry = EmailOutbox(report_id=report.id, company_id=report.company_id, next_attempt_at=_now())
+    db.session.add(entry)
+    return entry
+
+
+def backoff_delay(attempts):
+    """Exponential backoff: base, 2×base, 4×base … capped."""
+    return min(EMAIL_OUTBOX_BACKOFF_SECONDS * (2 ** max(attempts - 1, 0)), EMAIL_OUTBOX_BACKOFF_MAX_SECONDS)
+
+
+def claim_due(limit):
+    """Lease up to `limit` due rows to this worker and return their ids.
+
+    Rows stuck in 'sending' longer than the lease (worker crashed mid-send)
+    are picked up again. SKIP LOCKED lets several workers drain in parallel.
+    """
+    now = _now()
+    stale = now - timedelta(seconds=EMAIL_OUTBOX_LEASE_SECONDS)
+    rows = EmailOutbox.query.filter(or_(
+        and_(EmailOutbox.status == 'pending', EmailOutbox.next_attempt_at <= now),
+        and_(EmailOutbox.status == 'sending', EmailOutbox.locked_at < stale),
+    )).order_by(EmailOutbox.next_attempt_at.asc()) \
+        .limit(limit) \
+        .with_for_update(skip_locked=True) \
+        .all()
+
+    for row in rows:
+        row.status = 'sending'
+        row.locked_at = now
+    ids = [row.id for row in rows]
+    db.session.commit()
+    return ids
+
+
+def _set_report_status(report_id, status, **values):
+    """Advance the report only while it is still waiting on this email — an admin
+    may have moved it on (e.g. to 'reviewed') meanwhile."""
+    db.session.execute(
+        update(Report).where(Report.id == report_id).values(
+            status=case((Report.status.in_(AWAITING_EMAIL_STATUSES), status), else_=Report.status),
+            **values,
+        ).execution_options(synchronize_session=False)
+    )
+
+
+def deliver(outbox_id):
+    """Send one claimed email and record the result. Returns the final outbox status."""
+    entry = EmailOutbox.query.get(outbox_id)
+    if not entry or entry.status != 'sending':
+        return None
+
+    # Commit the attempt first so it counts even if recording the failure does not happen
+    entry.attempts += 1
+    db.session.commit()
+
+    try:
+        report = Report.query.get(entry.report_id)
+        company = report.user.company if report.user else None
+        cc_email = company.report_cc_email if company else None
+        send_report_email(report, report.user, report.email_recipients, report.pdf_path, cc_email=cc_email)
+    except Exception as e:
+        if not isinstance(e, (smtplib.SMTPException, OSError, RuntimeError)):
+            logger.exception('Report email for outbox %s failed unexpectedly', outbox_id)
+        db.session.rollback()
+        entry = EmailOutbox.query.get(outbox_id)
+        entry.last_error = str(e)[:2000] or type(e).__name__
+        entry.locked_at = None
+        if entry.attempts >= EMAIL_OUTBOX_MAX_ATTEMPTS:
+            entry.status = 'dead'
+            _set_report_status(entry.report_id, 'email_failed')
+            logger.warning('Report email for report %s dead-lettered after %d attempts: %s',
+                           entry.report_id, entry.attempts, e)
+        else:
+            entry.status = 'pending'
+            entry.next_attempt_at = _now() + timedelta(seconds=backoff_delay(entry.attempts))
+        db.session.commit()
+        return entry.status
+
+    sent_at = _now()
+    entry.status = 'sent'
+    entry.sent_at = sent_at
+    entry.locked_at = None
+    entry.last_error = None
+    _set_report_status(entry.report_id, 'sent', sent_at=sent_at)
+    db.session.commit()
+    return entry.status
@@ -1,14 +1,15 @@
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
 import os
-from config import SMTP_SERVER, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD, SMTP_SENDER_NAME
+from services.smtp_pool import smtp_pool
+from config import SMTP_USERNAME, SMTP_PASSWORD, SMTP_SENDER_NAME, SMTP_USE_TLS
 
 
 def send_report_email(report, user, recipient_emails, pdf_path, cc_email=None):
-    if not SMTP_USERNAME or not SMTP_PASSWORD:
+    # Password may be blank only for a plain (non-TLS) local/debugging relay
+    if not SMTP_USERNAME or (SMTP_USE_TLS and not SMTP_PASSWORD):
         raise RuntimeError('SMTP credentials not configured')
 
     msg = MIMEMultipart()
@@ -35,7 +36,4 @@ def send_report_email(report, user, recipient_emails, pdf_path, cc_email=None):
     if cc_email:
         all_recipients.append(cc_email)
 
-    with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-        server.starttls()
-        server.login(SMTP_USERNAME, SMTP_PASSWORD)
-        server.sendmail(SMTP_USERNAME, all_recipients, msg.as_string())
+    smtp_pool.sendmail(SMTP_USERNAME, all_recipients, msg.as_string())
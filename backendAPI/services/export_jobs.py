@@ -0,0 +1,195 @@
+"""Background exports for data sets too large to build inside a request.
+
+POST /admin-api/export-jobs queues an ExportJob; `flask export-worker`
+claims it and runs the same query and row mapper as the synchronous
+/<resource>/export route (each route module registers them with
+@export_source), writing the file into EXPORT_DIR:
+
+  pending → running → ready   (file written; fetched through a signed URL
+                               valid EXPORT_DOWNLOAD_TTL_SECONDS)
+                    → failed  (error recorded)
+
+Progress (rows_done of rows_total) is written from a separate short
+transaction every EXPORT_BATCH_SIZE rows, so clients polling
+GET /export-jobs/<id> see it while the export query is still streaming; each
+progress write also renews the job's lease. `prune_jobs` (run by
+`flask cleanup`) removes jobs and files older than EXPORT_JOB_RETENTION_HOURS.
+"""
+import logging
+import os
+import secrets
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from itsdangerous import URLSafeTimedSerializer, SignatureExpired, BadSignature
+from sqlalchemy import or_, and_, update
+from extensions import db
+from models import ExportJob
+from services.import_export import write_xlsx, csv_chunks
+from config import EXPORT_DIR, EXPORT_JOB_LEASE_SECONDS, EXPORT_JOB_RETENTION_HOURS, EXPORT_DOWNLOAD_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+ExportSource = namedtuple('ExportSource', 'build columns row_mapper sheet_name basename permission')
+
+# name → ExportSource; filled in by the route modules at import time
+EXPORT_SOURCES = {}
+
+
+def export_source(name, columns, row_mapper, sheet_name, basename, permission=None):
+    """Register `build(company_id, params) → Query or iterable` as export source `name`.
+
+    `permission` is an optional (resource, action) the requesting admin must hold.
+    """
+    def register(build):
+        EXPORT_SOURCES[name] = ExportSource(build, columns, row_mapper, sheet_name, basename, permission)
+        return build
+    return register
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def file_path(job):
+    return os.path.join(EXPORT_DIR, job.stored_filename)
+
+
+# ── Download links ──
+
+def download_token(job):
+    s = URLSafeTimedSerializer(current_app.config['SECRET_KEY'])
+    return s.dumps(job.public_id, salt='export-download')
+
+
+def verify_download_token(token):
+    """Return (job public_id, None) or (None, error message)."""
+    s = URLSafeTimedSerializer(current_app.config['SECRET_KEY'])
+    try:
+        return s.loads(token, salt='export-download', max_age=EXPORT_DOWNLOAD_TTL_SECONDS), None
+    except SignatureExpired:
+        return None, 'Download link has expired'
+    except BadSignature:
+        return None, 'Invalid download link'
+
+
+# ── Worker ──
+
+def claim_job():
+    """Lease the oldest pending job (or one whose worker died). Returns its id or None."""
+    stale = _now() - timedelta(seconds=EXPORT_JOB_LEASE_SECONDS)
+    job = ExportJob.query.filter(or_(
+        ExportJob.status == 'pending',
+        and_(ExportJob.status == 'running', ExportJob.locked_at < stale),
+    )).order_by(ExportJob.id.asc()) \
+        .with_for_update(skip_locked=True) \
+        .first()
+
+    job_id = None
+    if job:
+        job.status = 'running'
+        job.locked_at = _now()
+        job.rows_done = 0
+        job.error = None
+        job_id = job.id
+    db.session.commit()
+    return job_id
+
+
+def _set_progress(job_id, rows_done):
+    """Own connection + transaction: the session's connection is busy streaming the export query."""
+    with db.engine.begin() as conn:
+        conn.execute(update(ExportJob).where(ExportJob.id == job_id)
+                     .values(rows_done=rows_done, locked_at=_now(), updated_at=_now()))
+
+
+def _row_count(items):
+    if hasattr(items, 'yield_per'):
+        return items.order_by(None).count()
+    return len(items)
+
+
+def _fail(job_id, message):
+    db.session.rollback()
+    job = db.session.get(ExportJob, job_id)
+    job.status = 'failed'
+    job.error = message[:2000]
+    job.finished_at = _now()
+    db.session.commit()
+    return job.status
+
+
+def run_job(job_id):
+    """Write the file for one claimed job. Returns the final status."""
+    job = db.session.get(ExportJob, job_id)
+    if not job or job.status != 'running':
+        return None
+
+    source = EXPORT_SOURCES.get(job.source)
+    if not source:
+        return _fail(job_id, f'Unknown export source {job.source}')
+
+    started = time.perf_counter()
+    try:
+        items = source.build(job.company_id, job.params or {})
+        job.rows_total = _row_count(items)
+    except Exception as e:
+        # Otherwise the job stays 'running' and is reclaimed after the lease, forever.
+        logger.exception('Export job %s failed', job.public_id)
+        return _fail(job_id, str(e))
+    job.stored_filename = f'{secrets.token_hex(16)}.{job.format}'
+    job.download_name = f'{source.basename}_{job.created_at:%Y%m%d_%H%M%S}.{job.format}'
+    db.session.commit()
+
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    path = file_path(job)
+    tmp_path = f'{path}.part'
+    rows_done = [0]
+
+    def progress(count):
+        rows_done[0] = count
+        _set_progress(job_id, count)
+
+    try:
+        with open(tmp_path, 'wb') as out:
+            if job.format == 'csv':
+                for chunk in csv_chunks(items, source.columns, source.row_mapper, progress):
+                    out.write(chunk)
+            else:
+                write_xlsx(items, source.columns, source.row_mapper, source.sheet_name, out, progress)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        logger.exception('Export job %s failed', job.public_id)
+        return _fail(job_id, str(e))
+
+    db.session.rollback()  # drop the stale identity-map copy before the final write
+    job = db.session.get(ExportJob, job_id)
+    job.status = 'ready'
+    job.rows_done = rows_done[0]
+    job.size_bytes = os.path.getsize(path)
+    job.finished_at = _now()
+    db.session.commit()
+    logger.info('Export job %s: %d rows in %.1fs', job.public_id, rows_done[0], time.perf_counter() - started)
+    return job.status
+
+
+# ── Retention ──
+
+def prune_jobs():
+    """Delete jobs older than EXPORT_JOB_RETENTION_HOURS and their files. Returns the count removed."""
+    cutoff = _now() - timedelta(hours=EXPORT_JOB_RETENTION_HOURS)
+    jobs = ExportJob.query.filter(
+        ExportJob.created_at < cutoff,
+        or_(ExportJob.status != 'running', ExportJob.locked_at < cutoff),
+    ).all()
+    for job in jobs:
+        if job.stored_filename:
+            for path in (file_path(job), f'{file_path(job)}.part'):
+                if os.path.exists(path):
+                    os.remove(path)
+        db.session.delete(job)
+    db.session.commit()
+    return len(jobs)
@@ -0,0 +1,122 @@
+"""Side index over chosen report form_data keys (report_field_values).
+
+form_data is free-form JSON, so /admin-api/reports cannot filter on it with
+an index. At submit time the keys listed in REPORT_INDEXED_FIELDS are copied
+into report_field_values (one row per report and key), indexed by
+(company_id, field_key, value_text) and (company_id, field_key, value_num).
+
+Query parameters understood by `apply_form_filters`:
+  form.<key>=<text>        value starts with <text> (prefix → index range scan)
+  form.<key>_min / _max    numeric range on values that parse as numbers
+Sorting: sort_by=form.<key> / -form.<key> via `resolve_form_sort`.
+
+Only configured keys are honoured; others are ignored like unknown filters.
+After changing REPORT_INDEXED_FIELDS run `flask reindex-report-fields`.
+"""
+from decimal import Decimal, InvalidOperation
+from flask import request
+from sqlalchemy import and_, delete, insert
+from sqlalchemy.orm import aliased
+from extensions import db
+from config import REPORT_INDEXED_FIELDS
+
+PREFIX = 'form.'
+
+
+def _to_number(value):
+    try:
+        number = Decimal(value.replace(',', ''))
+    except (InvalidOperation, ValueError):
+        return None
+    if not number.is_finite() or abs(number) >= Decimal('1e14'):
+        return None
+    return number
+
+
+def extract_indexed_fields(form_data):
+    """[{field_key, value_text, value_num}] for the configured keys present in form_data."""
+    if not isinstance(form_data, dict):
+        return []
+
+    values = []
+    for key in REPORT_INDEXED_FIELDS:
+        value = form_data.get(key)
+        if value is None or isinstance(value, (dict, list)):
+            continue
+        text = str(value).strip()
+        if not text:
+            continue
+        values.append({'field_key': key, 'value_text': text[:255], 'value_num': _to_number(text)})
+    return values
+
+
+def field_value_rows(report_id, company_id, form_data):
+    """Rows ready for insert(ReportFieldValue) / ReportFieldValue(**row)."""
+    return [{'report_id': report_id, 'company_id': company_id, **v} for v in extract_indexed_fields(form_data)]
+
+
+def apply_form_filters(query, model, company_id):
+    """Narrow a Report query by form.<key> request args (AND-ed)."""
+    from models import ReportFieldValue
+
+    for key in REPORT_INDEXED_FIELDS:
+        text = request.args.get(f'{PREFIX}{key}')
+        min_value = _to_number(request.args.get(f'{PREFIX}{key}_min') or '')
+        max_value = _to_number(request.args.get(f'{PREFIX}{key}_max') or '')
+        if not text and min_value is None and max_value is None:
+            continue
+
+        conditions = [ReportFieldValue.company_id == company_id, ReportFieldValue.field_key == key]
+        if text:
+            # plain LIKE 'text%': ilike() wraps the column in lower() and loses the
+            # index; MySQL's *_ci collation already compares case-insensitively.
+            # autoescape keeps a % or _ typed by the user literal.
+            conditions.append(ReportFieldValue.value_text.startswith(text, autoescape=True))
+        if min_value is not None:
+            conditions.append(ReportFieldValue.value_num >= min_value)
+        if max_value is not None:
+            conditions.append(ReportFieldValue.value_num <= max_value)
+
+        query = query.filter(model.id.in_(
+            db.session.query(ReportFieldValue.report_id).filter(*conditions)
+        ))
+    return query
+
+
+def resolve_form_sort(query, field):
+    """apply_sorting hook: (query joined to the key's values, sort column) or (query, None)."""
+    from models import Report, ReportFieldValue
+
+    if not field.startswith(PREFIX) or field[len(PREFIX):] not in REPORT_INDEXED_FIELDS:
+        return query, None
+
+    values = aliased(ReportFieldValue)
+    query = query.outerjoin(values, and_(values.report_id == Report.id, values.field_key == field[len(PREFIX):]))
+    # Numeric values sort numerically, then by text (dates as YYYY-MM-DD sort correctly)
+    return query, (values.value_num, values.value_text)
+
+
+def reindex_reports(report_ids=None, batch_size=500):
+    """Rebuild report_field_values (all reports, or only `report_ids`). Returns rows written."""
+    from models import Report, ReportFieldValue
+
+    query = db.session.query(Report.id, Report.company_id, Report.form_data).order_by(Report.id)
+    if report_ids is not None:
+        query = query.filter(Report.id.in_(report_ids))
+
+    written = 0
+    last_id = 0
+    while True:
+        chunk = query.filter(Report.id > last_id).limit(batch_size).all()
+        if not chunk:
+            break
+        ids = [report_id for report_id, _, _ in chunk]
+        rows = [row for report_id, company_id, form_data in chunk
+                for row in field_value_rows(report_id, company_id, form_data)]
+        db.session.execute(delete(ReportFieldValue).where(ReportFieldValue.report_id.in_(ids)))
+        if rows:
+            db.session.execute(insert(ReportFieldValue), rows)
+        db.session.commit()
+        written += len(rows)
+        last_id = ids[-1]
+    return written
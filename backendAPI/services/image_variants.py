@@ -0,0 +1,149 @@
+"""Resized, recompressed variants of report attachment images.
+
+Phone photos are stored as uploaded (see services.attachment_storage). The
+`flask image-worker` command picks up attachments with variants_status
+'pending' and renders, once per content hash, next to the stored object:
+
+  objects/ab/<sha256>.thumbnail.jpg   IMAGE_VARIANTS['thumbnail']
+  objects/ab/<sha256>.web.jpg         IMAGE_VARIANTS['web']
+
+Rendering runs in a process pool (`render_variants` touches no DB or app
+state), so decoding large JPEGs does not compete with the request workers
+for the GIL. Output is deterministic and written via rename, so a hash that
+happens to be rendered twice is harmless.
+
+`resolve_variant` picks the file for `?size=thumbnail|web|original`,
+falling back to the original while variants are pending or failed.
+"""
+import os
+from flask import request, jsonify, send_file
+from extensions import db
+from services.attachment_storage import object_path
+from config import IMAGE_VARIANTS, REPORT_ATTACHMENTS_DIR
+
+SIZES = ('thumbnail', 'web', 'original')
+DEFAULT_SIZE = 'web'
+
+
+def variant_path(content_hash, size):
+    return os.path.join(REPORT_ATTACHMENTS_DIR, content_hash[:2], f"{content_hash}.{size}.jpg")
+
+
+def _to_rgb(img):
+    """Flatten transparency onto white — JPEG has no alpha channel."""
+    from PIL import Image
+
+    if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+        img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel('A'))
+        return background
+    return img.convert('RGB')
+
+
+def render_variants(src_path, content_hash):
+    """Write every IMAGE_VARIANTS size for one stored object. Runs in a worker process.
+
+    Returns {size: bytes written}.
+    """
+    from PIL import Image, ImageOps
+
+    largest = max(px for px, _ in IMAGE_VARIANTS.values())
+    written = {}
+
+    with Image.open(src_path) as img:
+        # JPEG: let libjpeg decode at a reduced scale (1/2, 1/4, 1/8) that still
+        # covers the largest variant instead of decoding all 12+ megapixels first.
+        # draft() needs both sides ≥ the request, so ask for the fitted box.
+        scale = min(largest / max(img.size), 1)
+        img.draft('RGB', (int(img.width * scale), int(img.height * scale)))
+        img = ImageOps.exif_transpose(img)
+        img = _to_rgb(img)
+
+        # Largest first, each smaller variant is resized from the previous one
+        for size, (px, quality) in sorted(IMAGE_VARIANTS.items(), key=lambda kv: -kv[1][0]):
+            img.thumbnail((px, px), Image.LANCZOS)
+            dest = variant_path(content_hash, size)
+            tmp = f"{dest}.part"
+            img.save(tmp, 'JPEG', quality=quality, optimize=True, progressive=True)
+            os.replace(tmp, dest)
+            written[size] = os.path.getsize(dest)
+
+    return written
+
+
+def _render_job(job):
+    """Process-pool entry point: (content_hash, ext) → (content_hash, status, detail)."""
+    content_hash, ext = job
+    if all(os.path.exists(variant_path(content_hash, size)) for size in IMAGE_VARIANTS):
+        return content_hash, 'ready', None  # same photo already rendered for another report
+    try:
+        written = render_variants(object_path(content_hash, ext), content_hash)
+    except Exception as e:  # undecodable / unsupported (e.g. HEIC without a plugin)
+        return content_hash, 'failed', str(e)
+    return content_hash, 'ready', written
+
+
+def pending_jobs(limit):
+    """Distinct (content_hash, ext) pairs that still need variants."""
+    from models import ReportAttachment
+
+    rows = db.session.query(ReportAttachment.content_hash, ReportAttachment.ext) \
+        .filter(ReportAttachment.variants_status == 'pending') \
+        .group_by(ReportAttachment.content_hash, ReportAttachment.ext) \
+        .order_by(db.func.min(ReportAttachment.id)) \
+        .limit(limit) \
+        .all()
+    return [(content_hash, ext) for content_hash, ext in rows]
+
+
+def process_pending(pool, limit):
+    """Render one batch of pending hashes on `pool`. Returns [(content_hash, status, detail)]."""
+    from models import ReportAttachment
+
+    jobs = pending_jobs(limit)
+    db.session.commit()  # don't hold a read transaction open while the pool works
+    if not jobs:
+        return []
+
+    results = list(pool.map(_render_job, jobs))
+    for content_hash, status, _ in results:
+        ReportAttachment.query.filter(
+            ReportAttachment.content_hash == content_hash,
+            ReportAttachment.variants_status == 'pending',
+        ).update({'variants_status': status}, synchronize_session=False)
+    db.session.commit()
+    return results
+
+
+def resolve_variant(attachment, size):
+    """Return (path, mimetype) to serve for `size`, or (None, None) if the object is missing."""
+    if size != 'original' and attachment.variants_status == 'ready':
+        path = variant_path(attachment.content_hash, size)
+        if os.path.exists(path):
+            return path, 'image/jpeg'
+
+    path = object_path(attachment.content_hash, attachment.ext)
+    if not os.path.exists(path):
+        return None, None
+    return path, attachment.content_type or 'application/octet-stream'
+
+
+def send_attachment(attachment):
+    """send_file response for the `?size=` requested on the current request."""
+    size = request.args.get('size', DEFAULT_SIZE)
+    if size not in SIZES:
+        return jsonify({'message': f'Invalid size. Use one of: {", ".join(SIZES)}'}), 400
+
+    path, mimetype = resolve_variant(attachment, size)
+    if not path:
+        return jsonify({'message': 'Attachment file not found'}), 404
+
+    download_name = attachment.original_filename
+    if path != object_path(attachment.content_hash, attachment.ext):
+        download_name = f"{os.path.splitext(download_name)[0]}.jpg"
+
+    # Paths are content-addressed, so a given URL+size only changes when the
+    # variant becomes ready — short max_age with ETag revalidation is enough
+    return send_file(path, mimetype=mimetype, download_name=download_name,
+                     conditional=True, max_age=300)
@@ -1,30 +1,88 @@
+import csv
+import io
 import os
 import re
-from io import BytesIO
+import tempfile
 from uuid import uuid4
-from flask import send_file
+from flask import Response, request, jsonify, stream_with_context
 from extensions import db
 from models import ImportHistory
-from config import IMPORT_DIR, ALLOWED_EXCEL_EXTENSIONS
+from config import (IMPORT_DIR, ALLOWED_EXCEL_EXTENSIONS, IMPORT_MAX_ROWS, IMPORT_BATCH_SIZE, EXPORT_BATCH_SIZE,
+                    EXPORT_SPOOL_MAX_BYTES, EXPORT_STREAM_CHUNK_BYTES)
 
 ALPHANUMERIC_RE = re.compile(r'[A-Za-z0-9\-_]+')
 
 
-def parse_excel(file, required_columns, import_columns):
+class ImportRowLimitError(ValueError):
+    """Raised while streaming an import past IMPORT_MAX_ROWS data rows."""
+
+
+def _row_limit_message():
+    return f'Excel file has too many rows (max {IMPORT_MAX_ROWS})'
+
+
+def open_excel(file):
+    """Open the active sheet read-only. Returns ((wb, header, rows_iter), None) or (None, err).
+
+    Cells are parsed from the zip as rows are iterated instead of being
+    loaded up front; the caller must close `wb` (stream_rows does).
+    """
     from openpyxl import load_workbook
 
     ext = file.filename.rsplit('.', 1)[-1].lower() if '.' in file.filename else ''
     if ext not in ALLOWED_EXCEL_EXTENSIONS:
         return None, 'Only .xlsx files are allowed'
 
-    wb = load_workbook(file, data_only=True)
+    wb = load_workbook(file, read_only=True, data_only=True)
     ws = wb.active
+    # Fast reject from the sheet's recorded size; stream_rows enforces the exact count
+    if ws.max_row and ws.max_row - 1 > IMPORT_MAX_ROWS:
+        wb.close()
+        return None, _row_limit_message()
+    # Some writers record a wrong size (e.g. A1), which would cut rows off in read-only mode
+    ws.reset_dimensions()
     rows_iter = ws.iter_rows(values_only=True)
 
     header = next(rows_iter, None)
     if not header:
         wb.close()
         return None, 'Excel file is empty'
+    return (wb, header, rows_iter), None
+
+
+def stream_rows(wb, rows_iter, parse_row):
+    """Yield parse_row(row_number, values) per data row, then close the workbook.
+
+    Raises ImportRowLimitError past IMPORT_MAX_ROWS.
+    """
+    try:
+        for i, row in enumerate(rows_iter, start=2):
+            if i - 1 > IMPORT_MAX_ROWS:
+                raise ImportRowLimitError(_row_limit_message())
+            yield parse_row(i, row)
+    finally:
+        wb.close()
+
+
+def batched(rows, size=None):
+    """Group a row stream into lists of `size` (IMPORT_BATCH_SIZE) for per-batch lookups."""
+    size = size or IMPORT_BATCH_SIZE
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def parse_excel(file, required_columns, import_columns):
+    """Return (row generator, None) or (None, err). Rows are dicts of import_columns + '_row'."""
+    sheet, err = open_excel(file)
+    if err:
+        return None, err
+    wb, header, rows_iter = sheet
 
     header = [str(h).strip().lower() if h else '' for h in header]
     missing = [c for c in required_columns if c not in header]
@@ -34,17 +92,15 @@ def parse_excel(file, required_columns, import_columns):
 
     col_map = {col: header.index(col) for col in import_columns if col in header}
 
-    rows = []
-    for i, row in enumerate(rows_iter, start=2):
+    def parse_row(i, row):
         data = {}
         for col_name, idx in col_map.items():
             val = row[idx] if idx < len(row) else None
             data[col_name] = str(val).strip() if val is not None else ''
         data['_row'] = i
-        rows.append(data)
+        return data
 
-    wb.close()
-    return rows, None
+    return stream_rows(wb, rows_iter, parse_row), None
 
 
 def validate_row(data, existing_map, id_field, required_fields, compare_fields):
@@ -79,28 +135,123 @@ def validate_row(data, existing_map, id_field, required_fields, compare_fields):
     return 'new', [], None
 
 
-def export_to_excel(items, columns, row_mapper, sheet_name, download_name):
+def iter_rows(items, progress=None):
+    """Iterate a Query in EXPORT_BATCH_SIZE batches instead of loading it all; other iterables as-is.
+
+    `progress(rows_so_far)` is called after every EXPORT_BATCH_SIZE rows and
+    once more with the final count.
+    """
+    rows = items.yield_per(EXPORT_BATCH_SIZE) if hasattr(items, 'yield_per') else items
+    if progress is None:
+        yield from rows
+        return
+    count = 0
+    for row in rows:
+        yield row
+        count += 1
+        if count % EXPORT_BATCH_SIZE == 0:
+            progress(count)
+    progress(count)
+
+
+def write_xlsx(items, columns, row_mapper, sheet_name, out, progress=None):
+    """Write a one-sheet workbook to the file object `out`. Returns the number of data rows.
+
+    Write-only mode serializes each row to the sheet's temp file as it is
+    appended, so memory stays flat however many rows the query yields.
+    """
     from openpyxl import Workbook
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = sheet_name
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
     ws.append(columns)
 
-    for item in items:
+    count = 0
+    for item in iter_rows(items, progress):
         ws.append(row_mapper(item))
+        count += 1
+
+    wb.save(out)
+    return count
+
+
+def _stream_file(f):
+    try:
+        while True:
+            chunk = f.read(EXPORT_STREAM_CHUNK_BYTES)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        f.close()
+
+
+def export_to_excel(items, columns, row_mapper, sheet_name, download_name):
+    """XLSX download of `items` (a Query is read with yield_per).
+
+    The workbook is built in a spooled temp file (memory up to
+    EXPORT_SPOOL_MAX_BYTES, then disk) and streamed back in chunks.
+    """
+    out = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_BYTES)
+    try:
+        write_xlsx(items, columns, row_mapper, sheet_name, out)
+        size = out.tell()
+        out.seek(0)
+    except Exception:
+        out.close()
+        raise
+
+    return Response(_stream_file(out), headers={
+        'Content-Type': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        'Content-Length': str(size),
+        'Content-Disposition': f'attachment; filename="{download_name}"',
+    })
+
+
+def csv_chunks(items, columns, row_mapper, progress=None):
+    """CSV text in ~EXPORT_STREAM_CHUNK_BYTES pieces, produced as the query yields rows."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    buf.write('\ufeff')  # BOM so Excel opens UTF-8 (Thai) text correctly
+    writer.writerow(columns)
+
+    for item in iter_rows(items, progress):
+        writer.writerow(row_mapper(item))
+        if buf.tell() >= EXPORT_STREAM_CHUNK_BYTES:
+            yield buf.getvalue().encode('utf-8')
+            buf.seek(0)
+            buf.truncate()
+
+    yield buf.getvalue().encode('utf-8')
+
+
+def export_to_csv(items, columns, row_mapper, download_name):
+    """CSV download of `items`, streamed while the query is still being read.
+
+    No Content-Length: the body is sent chunked and memory stays at one
+    yield_per batch plus one output chunk.
+    """
+    return Response(stream_with_context(csv_chunks(items, columns, row_mapper)), headers={
+        'Content-Type': 'text/csv; charset=utf-8',
+        'Content-Disposition': f'attachment; filename="{download_name}"',
+    })
+
+
+EXPORT_FORMATS = ('xlsx', 'csv')
 
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
 
-    return send_file(output, mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                     as_attachment=True, download_name=download_name)
+def export_response(items, columns, row_mapper, sheet_name, basename):
+    """Export in the `?format=` of the current request (xlsx by default, or csv)."""
+    fmt = request.args.get('format', 'xlsx').lower()
+    if fmt == 'csv':
+        return export_to_csv(items, columns, row_mapper, f'{basename}.csv')
+    if fmt == 'xlsx':
+        return export_to_excel(items, columns, row_mapper, sheet_name, f'{basename}.xlsx')
+    return jsonify({'message': f'Invalid format. Use one of: {", ".join(EXPORT_FORMATS)}'}), 400
 
 
 def get_history_or_404(history_id, resource_type, active_company):
     from utils import get_or_404_scoped
-    from flask import jsonify
     history, err = get_or_404_scoped(ImportHistory, history_id, active_company)
     if err:
         return None, err
@@ -0,0 +1,244 @@
+"""Optional in-memory columnar cache of parts_consumption per company.
+
+Admins slice the same tenant's consumption over and over (date range,
+search, report_no). With PARTS_ANALYTICS_CACHE=true, /parts-summary and its
+export answer from NumPy arrays instead of a SQL aggregate:
+
+  day      int32   days since 1970-01-01 (-1 = no consumption_dt)
+  pair     int32   index into (parts_code, parts_name) pairs
+  qty      int64
+  value    float64 qty × unit_price
+  report   int32   index into the company's (report_no) list
+
+Filters become boolean masks and the GROUP BY is one `np.bincount` over
+code ids. A company is loaded on first use and refreshed incrementally
+from parts_consumption ids above the last one loaded; after
+PARTS_CACHE_TTL_SECONDS it is reloaded in full (picks up deletes and
+re-extraction). The id watermark assumes rows commit in id order: a
+transaction that commits after a higher id has already been loaded (two
+submits racing) has its rows missed until that full reload, so results can
+lag SQL by up to the TTL.
+
+Memory: entries are evicted least-recently-used across companies once the
+total exceeds PARTS_CACHE_MAX_MB; a company that alone exceeds the cap is
+not cached and the caller falls back to SQL. That verdict is remembered for
+PARTS_CACHE_TTL_SECONDS, so the largest tenants are not loaded, measured and
+thrown away again on every request. The cache is per process.
+
+NumPy is optional — without it (or with the flag off) `parts_cache.enabled`
+is False and nothing changes.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import date
+from extensions import db
+from config import PARTS_ANALYTICS_CACHE, PARTS_CACHE_MAX_MB, PARTS_CACHE_TTL_SECONDS
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+logger = logging.getLogger(__name__)
+
+SummaryRow = namedtuple('SummaryRow', 'parts_code parts_name total_qty total_value')
+
+_EPOCH = date(1970, 1, 1)
+_LOAD_BATCH = 50000
+
+
+def _day_number(d):
+    return (d - _EPOCH).days
+
+
+class _CompanyColumns:
+    """Arrays for one company plus the vocabularies they index into."""
+
+    def __init__(self, company_id):
+        self.company_id = company_id
+        self.loaded_at = time.monotonic()
+        self.max_id = 0
+        self.max_report_id = 0
+        self.day = np.empty(0, dtype=np.int32)
+        self.pair = np.empty(0, dtype=np.int32)
+        self.qty = np.empty(0, dtype=np.int64)
+        self.value = np.empty(0, dtype=np.float64)
+        self.report = np.empty(0, dtype=np.int32)
+        self.pairs = []          # [(parts_code, parts_name)]
+        self.pair_index = {}
+        self.codes = []          # distinct parts_code
+        self.code_index = {}
+        self.pair_code = np.empty(0, dtype=np.int32)  # pair → code id
+        self.report_nos = []     # report index → report_no
+        self.report_index = {}   # reports.id → report index
+        self.lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        arrays = self.day.nbytes + self.pair.nbytes + self.qty.nbytes + self.value.nbytes + self.report.nbytes
+        # Rough cost of the Python vocabularies (strings + dict slots)
+        vocab = 200 * (len(self.pairs) + len(self.codes)) + 120 * len(self.report_nos)
+        return arrays + vocab
+
+    def _pair_id(self, code, name):
+        key = (code, name)
+        pid = self.pair_index.get(key)
+        if pid is None:
+            pid = self.pair_index[key] = len(self.pairs)
+            self.pairs.append(key)
+            if code not in self.code_index:
+                self.code_index[code] = len(self.codes)
+                self.codes.append(code)
+        return pid
+
+    def _load_reports(self):
+        from models import Report
+
+        rows = db.session.query(Report.id, Report.report_no) \
+            .filter(Report.company_id == self.company_id, Report.id > self.max_report_id) \
+            .order_by(Report.id).all()
+        for report_id, report_no in rows:
+            self.report_index[report_id] = len(self.report_nos)
+            self.report_nos.append(report_no or '')
+            self.max_report_id = report_id
+
+    def refresh(self):
+        """Append parts_consumption rows with id > max_id. Returns rows added."""
+        from models import PartsConsumption as pc
+
+        query = db.session.query(pc.id, pc.consumption_dt, pc.parts_code, pc.parts_name,
+                                 pc.qty, pc.unit_price, pc.report_id) \
+            .filter(pc.company_id == self.company_id, pc.id > self.max_id) \
+            .order_by(pc.id) \
+            .execution_options(yield_per=_LOAD_BATCH)
+
+        days, pairs, qtys, values, report_ids = [], [], [], [], []
+        for row_id, dt, code, name, qty, unit_price, report_id in query:
+            days.append(_day_number(dt) if dt else -1)
+            pairs.append(self._pair_id(code, name))
+            qtys.append(qty)
+            values.append(qty * float(unit_price or 0))
+            report_ids.append(report_id)
+            self.max_id = row_id
+        if not days:
+            return 0
+
+        if any(r not in self.report_index for r in set(report_ids)):
+            self._load_reports()
+        self.day = np.concatenate([self.day, np.array(days, dtype=np.int32)])
+        self.pair = np.concatenate([self.pair, np.array(pairs, dtype=np.int32)])
+        self.qty = np.concatenate([self.qty, np.array(qtys, dtype=np.int64)])
+        self.value = np.concatenate([self.value, np.array(values, dtype=np.float64)])
+        self.report = np.concatenate([self.report, np.array(
+            [self.report_index.get(r, -1) for r in report_ids], dtype=np.int32)])
+        self.pair_code = np.array([self.code_index[code] for code, _ in self.pairs], dtype=np.int32)
+        return len(days)
+
+    def summary(self, from_dt, to_dt, search=None, report_no=None):
+        """Rows like the SQL summary: (parts_code, parts_name, total_qty, total_value), qty DESC."""
+        mask = np.ones(len(self.day), dtype=bool)
+        if from_dt or to_dt:
+            mask &= self.day >= (_day_number(from_dt) if from_dt else 0)
+        if to_dt:
+            mask &= self.day <= _day_number(to_dt)
+        if search:
+            needle = search.lower()
+            hits = [i for i, (code, name) in enumerate(self.pairs)
+                    if needle in code.lower() or needle in (name or '').lower()]
+            mask &= np.isin(self.pair, np.array(hits, dtype=np.int32))
+        if report_no:
+            needle = report_no.lower()
+            hits = [i for i, no in enumerate(self.report_nos) if needle in no.lower()]
+            mask &= np.isin(self.report, np.array(hits, dtype=np.int32))
+
+        pair = self.pair[mask]
+        if not len(pair):
+            return []
+        code = self.pair_code[pair]
+        total_qty = np.bincount(code, weights=self.qty[mask], minlength=len(self.codes))
+        total_value = np.bincount(code, weights=self.value[mask], minlength=len(self.codes))
+
+        # parts_name = MAX(parts_name) over the matching rows, as in SQL
+        names = {}
+        for pid in np.unique(pair):
+            c, name = self.pairs[pid]
+            if name > names.get(c, ''):
+                names[c] = name
+
+        used = np.flatnonzero(np.bincount(code, minlength=len(self.codes)))
+        used = used[np.argsort(-total_qty[used], kind='stable')]
+        return [SummaryRow(self.codes[i], names.get(self.codes[i], ''), int(total_qty[i]),
+                           round(float(total_value[i]), 2)) for i in used]
+
+
+class PartsAnalyticsCache:
+
+    def __init__(self, enabled, max_bytes, ttl):
+        self.enabled = enabled and np is not None
+        if enabled and np is None:
+            logger.warning('PARTS_ANALYTICS_CACHE is on but numpy is not installed — cache disabled')
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # company_id → _CompanyColumns, LRU order
+        self._oversize = {}            # company_id → monotonic time it was found too large
+        self._stats = {'hits': 0, 'loads': 0, 'evictions': 0, 'oversize': 0}
+
+    def _evict(self):
+        while self._entries and sum(e.nbytes for e in self._entries.values()) > self._max_bytes:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def columns(self, company_id):
+        """Fresh columns for the company, or None (disabled / too large to cache)."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            flagged_at = self._oversize.get(company_id)
+            if flagged_at is not None:
+                if time.monotonic() - flagged_at <= self._ttl:
+                    self._stats['oversize'] += 1
+                    return None
+                del self._oversize[company_id]
+            entry = self._entries.get(company_id)
+            if entry and time.monotonic() - entry.loaded_at > self._ttl:
+                entry = None
+            if entry is None:
+                entry = _CompanyColumns(company_id)
+                self._entries[company_id] = entry
+                self._stats['loads'] += 1
+            else:
+                self._stats['hits'] += 1
+            self._entries.move_to_end(company_id)
+
+        with entry.lock:
+            entry.refresh()
+            too_big = entry.nbytes > self._max_bytes
+
+        with self._lock:
+            if too_big:
+                self._entries.pop(company_id, None)
+                self._oversize[company_id] = time.monotonic()
+                self._stats['oversize'] += 1
+                return None
+            self._evict()
+        return entry
+
+    def invalidate(self, company_id=None):
+        with self._lock:
+            if company_id is None:
+                self._entries.clear()
+                self._oversize.clear()
+            else:
+                self._entries.pop(company_id, None)
+                self._oversize.pop(company_id, None)
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, 'companies': len(self._entries),
+                    'bytes': sum(e.nbytes for e in self._entries.values())}
+
+
+parts_cache = PartsAnalyticsCache(PARTS_ANALYTICS_CACHE, PARTS_CACHE_MAX_MB * 1024 * 1024, PARTS_CACHE_TTL_SECONDS)
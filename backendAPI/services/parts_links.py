@@ -0,0 +1,50 @@
+"""Link parts_consumption rows to the parts master (parts_id).
+
+submit_report fills parts_id only when the code is already in Parts, and
+the backfill migration left all history NULL, so rows stay unmatched until
+the master catches up. `relink` fixes them with one set-based UPDATE … JOIN
+per company (a multi-table UPDATE on MySQL, UPDATE … FROM elsewhere); the
+unmatched rows are found through ix_pc_unmatched (company_id, parts_id,
+parts_code).
+
+Runs after parts create / update / import (routes_parts) and for every
+company with `flask relink-parts-consumption`.
+"""
+from sqlalchemy import update
+from extensions import db
+
+
+def relink(company_id, codes=None):
+    """Set parts_id on the company's unmatched rows (optionally only `codes`). Caller commits.
+
+    Returns the number of rows linked.
+    """
+    from models import Parts, PartsConsumption as pc
+
+    stmt = update(pc).where(
+        pc.company_id == company_id,
+        pc.parts_id.is_(None),
+        Parts.company_id == pc.company_id,
+        Parts.parts_code == pc.parts_code,
+        Parts.is_deleted == False,
+    ).values(parts_id=Parts.id).execution_options(synchronize_session=False)
+    if codes is not None:
+        stmt = stmt.where(pc.parts_code.in_(codes))
+    return db.session.execute(stmt).rowcount
+
+
+def relink_all(company_id=None):
+    """Relink every company with unmatched rows, one transaction each. Returns [(company_id, linked)]."""
+    from models import PartsConsumption as pc
+
+    if company_id is not None:
+        company_ids = [company_id]
+    else:
+        company_ids = [cid for (cid,) in db.session.query(pc.company_id)
+                       .filter(pc.parts_id.is_(None)).distinct().order_by(pc.company_id)]
+
+    results = []
+    for cid in company_ids:
+        results.append((cid, relink(cid)))
+        db.session.commit()
+    return results
@@ -0,0 +1,156 @@
+"""Rebuild parts_consumption from reports' form_data (`flask reextract-parts`).
+
+Needed whenever `extract_parts_from_form_data` changes. Reports are read in
+id order, `batch_size` at a time (each range streamed with yield_per — a
+server-side cursor on MySQL), and extracted on a ProcessPoolExecutor while
+the main process writes earlier batches (form_data is fetched as text and
+decoded in the workers too):
+
+  read range → pool: extract_parts_from_form_data → delete the range's old
+  rows + executemany insert (parts_id from the master) → commit → checkpoint
+
+At most 2 × processes batches are in flight, so memory stays bounded.
+Batches are written in order; after each commit the last report id is
+saved to the checkpoint file, and `--resume` continues after it. The daily
+rollup is rebuilt once at the end (the web process's analytics cache
+picks the new rows up at its next TTL reload).
+"""
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import delete, insert, type_coerce, Text
+from extensions import db
+from services.parts_extractor import extract_parts_from_form_data
+
+
+def _parse_json(value):
+    if isinstance(value, (dict, type(None))):
+        return value or {}
+    try:
+        return json.loads(value)
+    except (json.JSONDecodeError, TypeError):
+        return {}
+
+
+def _extract_batch(batch):
+    """Pool entry point: [(report_id, company_id, form_data JSON text, inspected_at)] → consumption rows (no parts_id)."""
+    rows = []
+    for report_id, company_id, form_data, inspected_at in batch:
+        form_data = _parse_json(form_data)
+        consumption_dt = None
+        if inspected_at:
+            consumption_dt = inspected_at.date() if hasattr(inspected_at, 'date') else inspected_at
+        for p in extract_parts_from_form_data(form_data):
+            rows.append({
+                'report_id': report_id,
+                'company_id': company_id,
+                'parts_code': p['parts_code'],
+                'parts_name': p['parts_name'],
+                'qty': p['qty'],
+                'unit_price': p['unit_price'],
+                'consumption_dt': consumption_dt,
+            })
+    return batch[0][0], batch[-1][0], len(batch), rows
+
+
+def _read_batches(company_id, start_after, batch_size):
+    from models import Report
+
+    # form_data as raw text: the JSON is decoded in the pool, not here
+    query = db.session.query(Report.id, Report.company_id, type_coerce(Report.form_data, Text), Report.inspected_at) \
+        .order_by(Report.id)
+    if company_id is not None:
+        query = query.filter(Report.company_id == company_id)
+
+    last_id = start_after
+    while True:
+        batch = [tuple(row) for row in query.filter(Report.id > last_id).limit(batch_size)
+                 .execution_options(yield_per=batch_size)]
+        db.session.commit()  # end the read transaction before the pool and writer run
+        if not batch:
+            return
+        last_id = batch[-1][0]
+        yield batch
+
+
+def _write_batch(company_id, first_id, last_id, rows):
+    """Replace the consumption rows of reports first_id..last_id. Returns rows inserted."""
+    from models import Parts, PartsConsumption as pc
+
+    companies = {r['company_id'] for r in rows}
+    codes = {r['parts_code'] for r in rows}
+    master_map = {
+        (m.company_id, m.parts_code): m.id
+        for m in db.session.query(Parts.company_id, Parts.parts_code, Parts.id).filter(
+            Parts.company_id.in_(companies),
+            Parts.parts_code.in_(codes),
+            Parts.is_deleted == False,
+        )
+    } if rows else {}
+    for r in rows:
+        r['parts_id'] = master_map.get((r['company_id'], r['parts_code']))  # None if not in master
+
+    clear = delete(pc).where(pc.report_id >= first_id, pc.report_id <= last_id)
+    if company_id is not None:
+        clear = clear.where(pc.company_id == company_id)
+    db.session.execute(clear)
+    if rows:
+        # Core insert on the table → one executemany (the ORM bulk path splits
+        # the batch wherever consecutive rows differ in which columns are NULL)
+        db.session.execute(insert(pc.__table__), rows)
+    db.session.commit()
+    return len(rows)
+
+
+def read_checkpoint(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_checkpoint(path, company_id, last_report_id):
+    tmp_path = f'{path}.part'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'company_id': company_id, 'last_report_id': last_report_id}, f)
+    os.replace(tmp_path, path)
+
+
+def reextract(company_id=None, start_after=0, batch_size=500, processes=2, checkpoint=None, on_progress=None):
+    """Re-extract every report after `start_after`. Returns {'reports', 'rows', 'seconds'}.
+
+    `on_progress(stats)` is called after each committed batch with the running
+    totals plus 'last_report_id'. processes=0 extracts in this process.
+    """
+    stats = {'reports': 0, 'rows': 0, 'last_report_id': start_after, 'seconds': 0.0}
+    started = time.perf_counter()
+
+    def write(result):
+        first_id, last_id, report_count, rows = result
+        stats['rows'] += _write_batch(company_id, first_id, last_id, rows)
+        stats['reports'] += report_count
+        stats['last_report_id'] = last_id
+        stats['seconds'] = time.perf_counter() - started
+        if checkpoint:
+            _save_checkpoint(checkpoint, company_id, last_id)
+        if on_progress:
+            on_progress(stats)
+
+    batches = _read_batches(company_id, start_after, batch_size)
+    if processes <= 0:
+        for batch in batches:
+            write(_extract_batch(batch))
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            in_flight = deque()
+            for batch in batches:
+                in_flight.append(pool.submit(_extract_batch, batch))
+                if len(in_flight) >= processes * 2:
+                    write(in_flight.popleft().result())
+            while in_flight:
+                write(in_flight.popleft().result())
+
+    stats['seconds'] = time.perf_counter() - started
+    return stats
@@ -0,0 +1,204 @@
+"""Daily rollup of parts consumption (parts_consumption_daily).
+
+/parts-summary used to GROUP BY the raw parts_consumption rows on every
+view and export. The rollup keeps one row per (company, day, parts_code)
+with summed qty and qty × unit_price, so a date-range summary aggregates
+at most days × codes rows instead of every consumption row.
+
+  add_consumption   submit_report / batch — upsert in the caller's transaction
+  rebuild           `flask rebuild-parts-rollup` — recompute from raw rows
+  summary_query     /parts-summary without search / report_no filters
+  series            /parts-summary/series — top-N codes bucketed by day/week/month
+
+search / report_no need per-row data (names, the report join) and still
+run against parts_consumption.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from sqlalchemy import text, func, insert, select, delete, literal, bindparam, Date, Numeric
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ColumnElement
+from extensions import db
+
+UNDATED = date(1000, 1, 1)  # consumption_dt NULL (report without inspected_at)
+_FIRST_DATED = date(1000, 1, 2)
+
+_UPSERT = text(
+    "INSERT INTO parts_consumption_daily "
+    "(company_id, day, parts_code, parts_name, total_qty, total_value, row_count) "
+    "VALUES (:company_id, :day, :parts_code, :parts_name, :total_qty, :total_value, :row_count) "
+    "ON DUPLICATE KEY UPDATE "
+    "total_qty = total_qty + VALUES(total_qty), "
+    "total_value = total_value + VALUES(total_value), "
+    "row_count = row_count + VALUES(row_count), "
+    "parts_name = GREATEST(parts_name, VALUES(parts_name))"
+).bindparams(bindparam('day', type_=Date()), bindparam('total_value', type_=Numeric(16, 2)))
+
+
+def add_consumption(rows):
+    """Fold new parts_consumption rows (dicts) into the rollup. Caller commits."""
+    buckets = defaultdict(lambda: {'total_qty': 0, 'total_value': Decimal('0'), 'row_count': 0, 'parts_name': ''})
+    for row in rows:
+        key = (row['company_id'], row['consumption_dt'] or UNDATED, row['parts_code'])
+        bucket = buckets[key]
+        bucket['total_qty'] += row['qty']
+        bucket['total_value'] += row['qty'] * Decimal(row['unit_price'] or 0)
+        bucket['row_count'] += 1
+        bucket['parts_name'] = max(bucket['parts_name'], row['parts_name'])
+    if not buckets:
+        return
+
+    # Sorted keys → concurrent submits lock rollup rows in the same order (no deadlocks)
+    params = [{'company_id': cid, 'day': day, 'parts_code': code, **buckets[(cid, day, code)]}
+              for cid, day, code in sorted(buckets)]
+    db.session.execute(_UPSERT, params)
+
+
+def rebuild(company_id=None):
+    """Recompute the rollup from parts_consumption (one company or all). Returns rows written."""
+    from models import PartsConsumption, PartsConsumptionDaily
+
+    pc = PartsConsumption
+    day = func.coalesce(pc.consumption_dt, literal(UNDATED))
+    source = select(
+        pc.company_id,
+        day,
+        pc.parts_code,
+        func.max(pc.parts_name),
+        func.sum(pc.qty),
+        func.sum(pc.qty * pc.unit_price),
+        func.count(),
+    ).group_by(pc.company_id, day, pc.parts_code)
+
+    clear = delete(PartsConsumptionDaily)
+    if company_id is not None:
+        source = source.where(pc.company_id == company_id)
+        clear = clear.where(PartsConsumptionDaily.company_id == company_id)
+
+    db.session.execute(clear)
+    result = db.session.execute(insert(PartsConsumptionDaily).from_select(
+        ['company_id', 'day', 'parts_code', 'parts_name', 'total_qty', 'total_value', 'row_count'], source))
+    db.session.commit()
+    return result.rowcount
+
+
+def summary_query(company_id, from_dt, to_dt):
+    """Same rows as the raw summary: (parts_code, parts_name, total_qty, total_value), qty DESC."""
+    from models import PartsConsumptionDaily as d
+
+    q = db.session.query(
+        d.parts_code.label('parts_code'),
+        func.max(d.parts_name).label('parts_name'),
+        func.sum(d.total_qty).label('total_qty'),
+        func.sum(d.total_value).label('total_value'),
+    ).filter(d.company_id == company_id)
+
+    # Any date bound excludes undated rows, as `consumption_dt >= x` does on the raw table
+    if from_dt or to_dt:
+        q = q.filter(d.day >= max(from_dt or _FIRST_DATED, _FIRST_DATED))
+    if to_dt:
+        q = q.filter(d.day <= to_dt)
+
+    return q.group_by(d.parts_code).order_by(func.sum(d.total_qty).desc())
+
+
+# ── Time series ──
+
+BUCKETS = ('day', 'week', 'month')
+
+
+def bucket_start(day, bucket):
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())  # ISO week, Monday
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def bucket_range(from_dt, to_dt, bucket):
+    """Every bucket start from from_dt to to_dt, so each series is dense."""
+    starts = []
+    current = bucket_start(from_dt, bucket)
+    while current <= to_dt:
+        starts.append(current)
+        if bucket == 'month':
+            current = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
+        else:
+            current += timedelta(days=7 if bucket == 'week' else 1)
+    return starts
+
+
+class date_bucket(ColumnElement):
+    """Start date of the day/week/month bucket containing `expr`, computed in SQL."""
+    inherit_cache = True
+
+    def __init__(self, expr, bucket):
+        self.expr = expr
+        self.bucket = bucket
+        self.type = Date()
+
+
+@compiles(date_bucket, 'mysql')
+def _date_bucket_mysql(element, compiler, **kw):
+    expr = compiler.process(element.expr, **kw)
+    if element.bucket == 'week':
+        return f"DATE_SUB({expr}, INTERVAL WEEKDAY({expr}) DAY)"
+    if element.bucket == 'month':
+        return f"DATE_SUB({expr}, INTERVAL DAYOFMONTH({expr}) - 1 DAY)"
+    return expr
+
+
+@compiles(date_bucket)
+def _date_bucket_default(element, compiler, **kw):
+    # SQLite (local dev)
+    expr = compiler.process(element.expr, **kw)
+    if element.bucket == 'week':
+        return f"date({expr}, '-' || ((CAST(strftime('%w', {expr}) AS INTEGER) + 6) % 7) || ' days')"
+    if element.bucket == 'month':
+        return f"date({expr}, 'start of month')"
+    return expr
+
+
+def series(company_id, from_dt, to_dt, bucket, top=10, codes=None, rank_by='qty'):
+    """Bucketed qty/value per part for the `top` codes of the range (or the given `codes`).
+
+    One query: rollup rows for the range joined to the ranked codes (a derived
+    table — MySQL rejects LIMIT inside IN subqueries), grouped by bucket and code.
+    Returns (bucket_starts, [{parts_code, parts_name, qty, value, total_qty, total_value}]).
+    """
+    from models import PartsConsumptionDaily as d
+
+    in_range = [d.company_id == company_id, d.day >= max(from_dt, _FIRST_DATED), d.day <= to_dt]
+    metric = func.sum(d.total_value if rank_by == 'value' else d.total_qty)
+    ranked = select(d.parts_code.label('parts_code')).where(*in_range)
+    if codes:
+        ranked = ranked.where(d.parts_code.in_(codes))
+    ranked = ranked.group_by(d.parts_code).order_by(metric.desc(), d.parts_code).limit(top).subquery()
+
+    start = date_bucket(d.day, bucket)
+    rows = db.session.query(
+        start, d.parts_code, func.max(d.parts_name), func.sum(d.total_qty), func.sum(d.total_value),
+    ).join(ranked, ranked.c.parts_code == d.parts_code) \
+        .filter(*in_range) \
+        .group_by(start, d.parts_code) \
+        .all()
+
+    starts = bucket_range(from_dt, to_dt, bucket)
+    index = {s: i for i, s in enumerate(starts)}
+    by_code = {}
+    for bucket_day, code, name, qty, value in rows:
+        entry = by_code.get(code)
+        if entry is None:
+            entry = by_code[code] = {'parts_code': code, 'parts_name': name,
+                                     'qty': [0] * len(starts), 'value': [0.0] * len(starts)}
+        i = index[bucket_day]
+        entry['qty'][i] = int(qty or 0)
+        entry['value'][i] = float(value or 0)
+
+    result = list(by_code.values())
+    for entry in result:
+        entry['total_qty'] = sum(entry['qty'])
+        entry['total_value'] = round(sum(entry['value']), 2)
+    result.sort(key=lambda e: (-(e['total_value'] if rank_by == 'value' else e['total_qty']), e['parts_code']))
+    return starts, result
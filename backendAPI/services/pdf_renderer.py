@@ -0,0 +1,311 @@
+"""Server-side rendering of report PDFs with reportlab.
+
+A report submitted with `render_pdf: true` starts in status 'pdf_queued'
+instead of 'pending_pdf'. `flask pdf-worker` claims queued reports, renders
+them on a bounded ProcessPoolExecutor and then queues the email exactly as
+upload-pdf does:
+
+  pdf_queued → rendering_pdf → email_queued (PDF written, email queued)
+                             → pending_pdf  (render failed — the app can
+                                             still upload its own PDF)
+
+A report whose render never finishes (e.g. a template that crashes the pool
+worker) is re-claimed when its lease expires; each claim counts in
+pdf_render_attempts, and after PDF_RENDER_MAX_ATTEMPTS it is moved to
+pending_pdf instead of being rendered again. Admins can also move stuck
+pdf_queued / rendering_pdf reports on (PUT /admin-api/reports/<id>).
+
+Templates are JSON files in PDF_TEMPLATES_DIR: `<model_code>.json` for a
+machine model, else `default.json`. A model template may set
+`"extends": "default"` and override only some keys. Fonts and images named
+by a template are read from `assets/`.
+
+`render_report_pdf` runs in the pool workers and touches no DB or app
+state. Each worker keeps its parsed templates, registered TTF fonts and
+decoded logos for its whole life, so only the first report a worker renders
+pays for loading them.
+"""
+import base64
+import binascii
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+from sqlalchemy import or_, and_
+from werkzeug.utils import secure_filename
+from extensions import db
+from services.parts_extractor import extract_parts_from_form_data
+from config import PDF_TEMPLATES_DIR, PDF_RENDER_LEASE_SECONDS, PDF_RENDER_MAX_ATTEMPTS, UPLOAD_DIR
+
+logger = logging.getLogger(__name__)
+
+REPORTS_DIR = os.path.join(UPLOAD_DIR, 'reports')
+ASSETS_DIR = os.path.join(PDF_TEMPLATES_DIR, 'assets')
+
+# Per-process asset caches (live as long as the pool worker)
+_templates = {}   # path → (mtime, template dict)
+_fonts = {}       # ttf filename → registered font name
+_images = {}      # asset filename → (bytes, width, height)
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# ── Template assets ──
+
+def _read_template(name):
+    path = os.path.join(PDF_TEMPLATES_DIR, f"{name}.json")
+    if not os.path.exists(path):
+        return None
+    mtime = os.path.getmtime(path)
+    cached = _templates.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with open(path, encoding='utf-8') as f:
+        template = json.load(f)
+    parent = template.pop('extends', None)
+    if parent:
+        template = {**(_read_template(parent) or {}), **template}
+    _templates[path] = (mtime, template)
+    return template
+
+
+def load_template(model_code):
+    """Template for a machine model code, falling back to default.json."""
+    name = secure_filename(model_code or '')
+    return (name and _read_template(name)) or _read_template('default')
+
+
+def _font(filename, fallback):
+    """Register a TTF from assets once per process; return its font name."""
+    if not filename:
+        return fallback
+    if filename not in _fonts:
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+
+        path = os.path.join(ASSETS_DIR, filename)
+        if os.path.exists(path):
+            font_name = os.path.splitext(filename)[0]
+            pdfmetrics.registerFont(TTFont(font_name, path))
+            _fonts[filename] = font_name
+        else:
+            logger.warning('PDF font %s not found, using %s', path, fallback)
+            _fonts[filename] = fallback
+    return _fonts[filename]
+
+
+def _asset_image(filename):
+    if not filename:
+        return None
+    if filename not in _images:
+        from reportlab.lib.utils import ImageReader
+
+        path = os.path.join(ASSETS_DIR, filename)
+        if not os.path.exists(path):
+            _images[filename] = None
+        else:
+            with open(path, 'rb') as f:
+                data = f.read()
+            _images[filename] = (data, *ImageReader(BytesIO(data)).getSize())
+    return _images[filename]
+
+
+# ── Rendering (pool workers) ──
+
+def _value(payload, key, i=None):
+    if i is not None:
+        key = key.replace('{i}', str(i))
+    if key.startswith('form.'):
+        value = payload['form_data'].get(key[5:])
+    elif key.isdigit():
+        value = key
+    else:
+        value = payload.get(key)
+    return '' if value is None else str(value)
+
+
+def _signature(data):
+    """Decoded signature image, or None — a bad signature leaves the box blank."""
+    from reportlab.lib.utils import ImageReader
+
+    if not data:
+        return None
+    try:
+        raw = base64.b64decode(data, validate=True)
+        ImageReader(BytesIO(raw)).getSize()
+    except (binascii.Error, ValueError, OSError):
+        return None
+    return BytesIO(raw)
+
+
+def render_report_pdf(payload, out_path):
+    """Render one report PDF to `out_path` from a `build_payload` dict. Returns bytes written."""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, LETTER
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib.units import mm
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Table, TableStyle, Image, Spacer
+
+    template = load_template(payload['machine_model_code'])
+    regular = _font(template.get('fonts', {}).get('regular'), 'Helvetica')
+    bold = _font(template.get('fonts', {}).get('bold'), 'Helvetica-Bold')
+    size = template.get('font_size', 12)
+
+    text = ParagraphStyle('text', fontName=regular, fontSize=size, leading=size * 1.2)
+    heading = ParagraphStyle('heading', fontName=bold, fontSize=size * 1.5, leading=size * 1.8)
+    label = ParagraphStyle('label', parent=text, fontName=bold)
+    grid = TableStyle([
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.whitesmoke),
+    ])
+
+    def p(value, style=text):
+        return Paragraph(value.replace('&', '&amp;').replace('<', '&lt;').replace('\n', '<br/>'), style)
+
+    story = []
+    logo = _asset_image(template.get('logo'))
+    if logo:
+        data, w, h = logo
+        story.append(Image(BytesIO(data), width=40 * mm, height=40 * mm * h / w, hAlign='LEFT'))
+    story += [p(template.get('title', 'Report'), heading), Spacer(1, 4 * mm)]
+
+    header = [[p(lbl, label), p(_value(payload, key))] for lbl, key in template.get('header', [])]
+    if header:
+        story += [Table(header, colWidths=[45 * mm, None], style=TableStyle([
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)])), Spacer(1, 4 * mm)]
+
+    items = template.get('items')
+    if items:
+        rows = [[p(lbl, label) for lbl, _ in items['columns']]]
+        for i in range(1, items.get('rows', 10) + 1):
+            row = [_value(payload, key, i) for _, key in items['columns']]
+            if any(row[1:]):
+                rows.append([p(v) for v in row])
+        if len(rows) > 1:
+            story += [Table(rows, repeatRows=1, style=grid), Spacer(1, 4 * mm)]
+
+    if template.get('parts'):
+        parts = extract_parts_from_form_data(payload['form_data'])
+        if parts:
+            rows = [[p(h, label) for h in ('Part No.', 'Part Name', 'Qty', 'Unit Price', 'Total')]]
+            for part in parts:
+                rows.append([p(part['parts_code']), p(part['parts_name']), p(str(part['qty'])),
+                             p(f"{part['unit_price']:,.2f}"), p(f"{part['qty'] * part['unit_price']:,.2f}")])
+            story += [Table(rows, repeatRows=1, style=grid), Spacer(1, 4 * mm)]
+
+    fields = [[p(lbl, label), p(_value(payload, key))] for lbl, key in template.get('fields', [])
+              if _value(payload, key)]
+    if fields:
+        story += [Table(fields, colWidths=[45 * mm, None], style=TableStyle([
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)])), Spacer(1, 6 * mm)]
+
+    signatures = template.get('signatures', [])
+    if signatures:
+        cells = []
+        for lbl, sign_key, date_key in signatures:
+            sign = _signature(_value(payload, sign_key))
+            cell = [Image(sign, width=50 * mm, height=20 * mm, kind='proportional')] if sign else [Spacer(1, 20 * mm)]
+            cell += [p(lbl, label), p(_value(payload, date_key))]
+            cells.append(cell)
+        story.append(Table([cells]))
+
+    page_size = LETTER if template.get('page_size') == 'LETTER' else A4
+    tmp_path = f"{out_path}.part"
+    doc = SimpleDocTemplate(tmp_path, pagesize=page_size, leftMargin=15 * mm, rightMargin=15 * mm,
+                            topMargin=15 * mm, bottomMargin=15 * mm, title=payload['report_no'])
+    doc.build(story)
+    os.replace(tmp_path, out_path)
+    return os.path.getsize(out_path)
+
+
+def _render_job(job):
+    """Process-pool entry point: (report_id, payload, out_path) → (report_id, ok, detail)."""
+    report_id, payload, out_path = job
+    try:
+        return report_id, True, render_report_pdf(payload, out_path)
+    except Exception as e:
+        if os.path.exists(f"{out_path}.part"):
+            os.remove(f"{out_path}.part")
+        return report_id, False, str(e)
+
+
+# ── Queue (flask pdf-worker) ──
+
+def build_payload(report):
+    """Plain, picklable snapshot of everything a template can reference."""
+    return {
+        'report_no': report.report_no,
+        'form_data': report.form_data or {},
+        'serial_no': report.serial_no,
+        'inspector_name': report.inspector_name,
+        'inspected_at': report.inspected_at.strftime('%Y-%m-%d') if report.inspected_at else None,
+        'machine_model_code': report.machine_model.model_code if report.machine_model else None,
+        'machine_model_name': report.machine_model.model_name if report.machine_model else None,
+        'customer_code': report.customer.customer_id if report.customer else None,
+        'customer_name': report.customer.name if report.customer else None,
+        'customer_address': report.customer.address if report.customer else None,
+        'user_name': report.user.name if report.user else None,
+    }
+
+
+def claim_jobs(limit):
+    """Lease up to `limit` queued reports; return render jobs for the pool.
+
+    Reports stuck in 'rendering_pdf' longer than PDF_RENDER_LEASE_SECONDS
+    (worker crashed mid-render) are picked up again, up to
+    PDF_RENDER_MAX_ATTEMPTS claims in total.
+    """
+    from models import Report
+
+    stale = _now() - timedelta(seconds=PDF_RENDER_LEASE_SECONDS)
+    reports = Report.query.filter(or_(
+        Report.status == 'pdf_queued',
+        and_(Report.status == 'rendering_pdf', Report.updated_at < stale),
+    )).order_by(Report.id.asc()) \
+        .limit(limit) \
+        .with_for_update(skip_locked=True) \
+        .all()
+
+    os.makedirs(REPORTS_DIR, exist_ok=True)
+    jobs = []
+    for report in reports:
+        if report.pdf_render_attempts >= PDF_RENDER_MAX_ATTEMPTS:
+            report.status = 'pending_pdf'
+            logger.warning('PDF render for report %s gave up after %d attempts', report.report_no,
+                           report.pdf_render_attempts)
+            continue
+        report.status = 'rendering_pdf'  # updated_at doubles as the lease timestamp
+        report.pdf_render_attempts += 1
+        jobs.append((report.id, build_payload(report), os.path.join(REPORTS_DIR, f'{report.public_id}.pdf')))
+    db.session.commit()
+    return jobs
+
+
+def process_queued(pool, limit):
+    """Render one batch of queued reports on `pool`. Returns [(report_id, ok, detail)]."""
+    from models import Report
+    from services.email_outbox import enqueue_report_email
+
+    jobs = claim_jobs(limit)
+    if not jobs:
+        return []
+
+    paths = {report_id: out_path for report_id, _, out_path in jobs}
+    results = list(pool.map(_render_job, jobs))
+    for report_id, ok, detail in results:
+        report = Report.query.get(report_id)
+        if not report or report.status != 'rendering_pdf':
+            continue
+        if ok:
+            report.pdf_path = paths[report_id]
+            enqueue_report_email(report)
+        else:
+            report.status = 'pending_pdf'
+            logger.warning('PDF render failed for report %s: %s', report.report_no, detail)
+    db.session.commit()
+    return results
@@ -0,0 +1,67 @@
+"""Reconcile company_resource_counts with the tracked tables.
+
+The counters are kept by triggers (migration q3k4l5m6n7o8); writes the
+triggers cannot see — FK cascades/SET NULL, manual SQL with triggers
+disabled, restores — can leave them off. `reconcile` recomputes every
+(company, resource) count with one GROUP BY per table and fixes the rows
+that drifted.
+"""
+from datetime import datetime, timezone
+from sqlalchemy import func
+from extensions import db
+
+
+def tracked_resources():
+    """resource → (model, extra filters) — must match the trigger definitions.
+
+    reports have no counter (see Company.resource_count)."""
+    from models import User, Admin, Article, Customer, InspectionItem, MachineModel, Parts
+    return {
+        'users': (User, []),
+        'admins': (Admin, []),
+        'articles': (Article, [Article.is_deleted == False]),
+        'customers': (Customer, []),
+        'inspection_items': (InspectionItem, []),
+        'machine_models': (MachineModel, []),
+        'parts': (Parts, [Parts.is_deleted == False]),
+    }
+
+
+def reconcile(company_id=None, dry_run=False):
+    """Return [(company_id, resource, stored, actual)] for every counter that was off."""
+    from models import CompanyResourceCount
+
+    actual = {}
+    for resource, (model, filters) in tracked_resources().items():
+        query = db.session.query(model.company_id, func.count()) \
+            .filter(model.company_id.isnot(None), *filters) \
+            .group_by(model.company_id)
+        if company_id is not None:
+            query = query.filter(model.company_id == company_id)
+        for cid, count in query.all():
+            actual[(cid, resource)] = count
+
+    stored_query = CompanyResourceCount.query
+    if company_id is not None:
+        stored_query = stored_query.filter_by(company_id=company_id)
+    stored = {(r.company_id, r.resource): r for r in stored_query.all()}
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    drift = []
+    for key in set(actual) | set(stored):
+        row = stored.get(key)
+        count = actual.get(key, 0)
+        if row and row.row_count == count:
+            continue
+        drift.append((*key, row.row_count if row else None, count))
+        if dry_run:
+            continue
+        if row:
+            row.row_count = count
+            row.updated_at = now
+        else:
+            db.session.add(CompanyResourceCount(company_id=key[0], resource=key[1], row_count=count, updated_at=now))
+
+    if not dry_run:
+        db.session.commit()
+    return sorted(drift)
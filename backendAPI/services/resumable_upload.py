@@ -0,0 +1,105 @@
+"""Temp-file side of resumable uploads (user_api/routes_upload.py).
+
+Each UploadSession owns one file, RESUMABLE_UPLOAD_DIR/<public_id>.part.
+Each PUT streams its body into a temp file of its own (no DB lock held while
+the client is sending), then, under the session's row lock, the chunk is
+copied in at the offset the client sent and the session row records how many
+bytes are durable — so an interrupted client resumes from GET /uploads/<id>
+instead of starting over, without waiting on its own dead request. Finalize verifies the whole
+file against the sha256 declared at create, then hands it to its target.
+"""
+import glob
+import hashlib
+import os
+import secrets
+from config import RESUMABLE_UPLOAD_DIR, ATTACHMENT_CHUNK_BYTES
+
+
+def part_path(session):
+    return os.path.join(RESUMABLE_UPLOAD_DIR, f"{session.public_id}.part")
+
+
+def create_part(session):
+    os.makedirs(RESUMABLE_UPLOAD_DIR, exist_ok=True)
+    open(part_path(session), 'wb').close()
+
+
+class _ChunkTooLarge(Exception):
+    pass
+
+
+def receive_chunk(session, stream, offset):
+    """Stream one PUT body into its own temp file. Returns ((chunk_path, length), error).
+
+    Runs with no DB transaction or row lock open — a slow or dropped mobile
+    connection only ties up its own file. Anything past the declared size is
+    rejected before it reaches disk; the file is removed on any error.
+    """
+    if not os.path.exists(part_path(session)):
+        return None, 'Upload data missing, create a new upload'
+
+    remaining = session.total_size - offset
+    chunk_path = f"{part_path(session)}.{secrets.token_hex(8)}.chunk"
+    length = 0
+    try:
+        with open(chunk_path, 'wb') as out:
+            while True:
+                chunk = stream.read(ATTACHMENT_CHUNK_BYTES)
+                if not chunk:
+                    break
+                if len(chunk) > remaining:
+                    raise _ChunkTooLarge
+                out.write(chunk)
+                length += len(chunk)
+                remaining -= len(chunk)
+    except _ChunkTooLarge:
+        os.remove(chunk_path)
+        return None, f'Chunk exceeds declared size ({session.total_size} bytes)'
+    except BaseException:
+        os.remove(chunk_path)  # client went away mid-body
+        raise
+    return (chunk_path, length), None
+
+
+def commit_chunk(session, chunk_path, offset):
+    """Copy a received chunk into the part file at `offset` and remove it. Returns the new offset.
+
+    Called under the session's row lock, after checking received_bytes == offset.
+    Bytes beyond `offset` from an earlier, unacknowledged attempt are
+    truncated first so a retried chunk simply overwrites them.
+    """
+    with open(part_path(session), 'r+b') as out, open(chunk_path, 'rb') as src:
+        out.truncate(offset)
+        out.seek(offset)
+        for chunk in iter(lambda: src.read(ATTACHMENT_CHUNK_BYTES), b''):
+            out.write(chunk)
+            offset += len(chunk)
+        out.flush()
+        os.fsync(out.fileno())
+    os.remove(chunk_path)
+    return offset
+
+
+def discard_chunk(chunk_path):
+    if os.path.exists(chunk_path):
+        os.remove(chunk_path)
+
+
+def file_sha256(session):
+    digest = hashlib.sha256()
+    with open(part_path(session), 'rb') as f:
+        for chunk in iter(lambda: f.read(ATTACHMENT_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_header(session, n):
+    with open(part_path(session), 'rb') as f:
+        return f.read(n)
+
+
+def discard(session):
+    """Remove the part file and any chunk files left by abandoned PUTs."""
+    for path in [part_path(session)] + glob.glob(f"{glob.escape(part_path(session))}.*.chunk"):
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,165 @@
+"""Pool of authenticated SMTP sessions shared by report emails.
+
+Opening a session costs TCP connect + EHLO + STARTTLS + AUTH — usually far
+longer than sending the message itself. The pool keeps sessions open and
+reuses them for several messages:
+
+  - checkout: reuse an idle session after a NOOP health check, else connect
+  - max_messages: a session is closed after this many sends
+  - max_idle: idle sessions older than this are closed instead of reused
+  - a send that fails because the server dropped the session is retried once
+    on a fresh connection
+
+`stats()` reports handshakes vs reuses and the handshake time saved
+(reuses × average handshake time). Test locally with a debugging server:
+    python -m aiosmtpd -n -l localhost:1025
+and SMTP_SERVER=localhost SMTP_PORT=1025 SMTP_USE_TLS=false SMTP_PASSWORD=
+"""
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from config import (SMTP_SERVER, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD, SMTP_USE_TLS, SMTP_TIMEOUT,
+                    SMTP_POOL_SIZE, SMTP_POOL_MAX_MESSAGES, SMTP_POOL_MAX_IDLE_SECONDS)
+
+
+# Errors that mean the session itself is gone — worth one retry on a new one
+_RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError)
+
+
+class _PooledConnection:
+
+    def __init__(self, server):
+        self.server = server
+        self.messages = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPConnectionPool:
+
+    def __init__(self, host, port, username, password, use_tls=True, timeout=30,
+                 max_size=4, max_messages=100, max_idle=60):
+        self._host = host
+        self._port = port
+        self._username = username
+        self._password = password
+        self._use_tls = use_tls
+        self._timeout = timeout
+        self._max_messages = max_messages
+        self._max_idle = max_idle
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._idle = []
+        self._stats = {'handshakes': 0, 'reused': 0, 'health_check_failures': 0,
+                       'reconnects': 0, 'handshake_seconds': 0.0}
+
+    # ── Connection lifecycle ──
+
+    def _connect(self):
+        started = time.perf_counter()
+        server = smtplib.SMTP(self._host, self._port, timeout=self._timeout)
+        try:
+            if self._use_tls:
+                server.starttls()
+            if self._password:
+                server.login(self._username, self._password)
+        except Exception:
+            self._close(server)
+            raise
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._stats['handshakes'] += 1
+            self._stats['handshake_seconds'] += elapsed
+        return _PooledConnection(server)
+
+    @staticmethod
+    def _close(server):
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+    def _is_healthy(self, conn):
+        if time.monotonic() - conn.last_used > self._max_idle:
+            return False
+        try:
+            code, _ = conn.server.noop()
+            return code == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _checkout(self):
+        while True:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                return self._connect()
+            if self._is_healthy(conn):
+                with self._lock:
+                    self._stats['reused'] += 1
+                return conn
+            with self._lock:
+                self._stats['health_check_failures'] += 1
+            self._close(conn.server)
+
+    def _checkin(self, conn):
+        conn.messages += 1
+        conn.last_used = time.monotonic()
+        if conn.messages >= self._max_messages:
+            self._close(conn.server)
+            return
+        with self._lock:
+            self._idle.append(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a ready smtplib.SMTP session. Broken sessions are discarded."""
+        with self._slots:
+            conn = self._checkout()
+            try:
+                yield conn.server
+            except Exception:
+                self._close(conn.server)
+                raise
+            self._checkin(conn)
+
+    # ── Public API ──
+
+    def sendmail(self, from_addr, to_addrs, msg):
+        try:
+            with self.connection() as server:
+                return server.sendmail(from_addr, to_addrs, msg)
+        except _RECONNECT_ERRORS:
+            with self._lock:
+                self._stats['reconnects'] += 1
+            with self.connection() as server:
+                return server.sendmail(from_addr, to_addrs, msg)
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            self._close(conn.server)
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+        avg = s['handshake_seconds'] / s['handshakes'] if s['handshakes'] else 0.0
+        return {
+            'handshakes': s['handshakes'],
+            'reused': s['reused'],
+            'health_check_failures': s['health_check_failures'],
+            'reconnects': s['reconnects'],
+            'avg_handshake_ms': round(avg * 1000, 1),
+            'handshake_ms_saved': round(s['reused'] * avg * 1000, 1),
+        }
+
+
+smtp_pool = SMTPConnectionPool(
+    SMTP_SERVER, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD,
+    use_tls=SMTP_USE_TLS,
+    timeout=SMTP_TIMEOUT,
+    max_size=SMTP_POOL_SIZE,
+    max_messages=SMTP_POOL_MAX_MESSAGES,
+    max_idle=SMTP_POOL_MAX_IDLE_SECONDS,
+)
@@ -7,6 +7,7 @@ class SSEManager:
     def __init__(self):
         self._lock = threading.Lock()
         self._connections = {}
+        self._channels = {}
 
     def connect(self, session_id):
         q = queue.Queue()
@@ -28,5 +29,28 @@ class SSEManager:
             return True
         return False
 
+    # ── Broadcast channels (many listeners per key, e.g. one per company) ──
+
+    def subscribe(self, channel):
+        q = queue.Queue()
+        with self._lock:
+            self._channels.setdefault(channel, set()).add(q)
+        return q
+
+    def unsubscribe(self, channel, q):
+        with self._lock:
+            listeners = self._channels.get(channel)
+            if listeners:
+                listeners.discard(q)
+                if not listeners:
+                    del self._channels[channel]
+
+    def publish(self, channel, event_type, data):
+        with self._lock:
+            listeners = list(self._channels.get(channel, ()))
+        for q in listeners:
+            q.put({'type': event_type, 'data': data})
+        return len(listeners)
+
 
 sse_manager = SSEManager()
@@ -0,0 +1,79 @@
+import time
+import threading
+from sqlalchemy import event
+from sse_manager import sse_manager
+
+
+# Tables the mobile app mirrors locally → collection name sent to clients.
+# articles → /user-api/sync; everything else → /user-api/master-data
+TRACKED_COLLECTIONS = {
+    'articles': 'articles',
+    'machine_models': 'machine_models',
+    'inspection_items': 'inspection_items',
+    'customers': 'customers',
+    'parts': 'parts',
+}
+
+
+def company_channel(company_id):
+    return f'company:{company_id}'
+
+
+class SyncNotifier:
+    """Per-company collection versions, bumped after each commit that touches a
+    tracked table and pushed to /user-api/sync/stream listeners.
+
+    Versions live in process memory (single gunicorn worker, same as
+    sse_manager). They are seeded from epoch milliseconds so they keep
+    increasing across restarts — a client holding an older value simply syncs.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions = {}
+        self._boot_version = int(time.time() * 1000)
+
+    def init_app(self, db):
+        if not event.contains(db.session, 'before_flush', self._collect):
+            event.listen(db.session, 'before_flush', self._collect)
+            event.listen(db.session, 'after_commit', self._publish_pending)
+            event.listen(db.session, 'after_rollback', self._discard_pending)
+
+    def versions(self, company_id):
+        with self._lock:
+            return {
+                c: self._versions.get((company_id, c), self._boot_version)
+                for c in TRACKED_COLLECTIONS.values()
+            }
+
+    def bump(self, company_id, collection):
+        key = (company_id, collection)
+        with self._lock:
+            version = max(self._versions.get(key, self._boot_version) + 1, int(time.time() * 1000))
+            self._versions[key] = version
+        sse_manager.publish(company_channel(company_id), 'version', {
+            'collection': collection,
+            'version': version,
+        })
+        return version
+
+    # ── Session hooks ──
+
+    def _collect(self, session, flush_context, instances):
+        pending = session.info.setdefault('sync_pending', set())
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            collection = TRACKED_COLLECTIONS.get(getattr(obj, '__tablename__', None))
+            company_id = getattr(obj, 'company_id', None)
+            if collection and company_id:
+                pending.add((company_id, collection))
+
+    def _publish_pending(self, session):
+        pending = session.info.pop('sync_pending', None)
+        for company_id, collection in pending or ():
+            self.bump(company_id, collection)
+
+    def _discard_pending(self, session):
+        session.info.pop('sync_pending', None)
+
+
+sync_notifier = SyncNotifier()
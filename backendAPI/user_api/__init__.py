@@ -4,4 +4,4 @@ from flask import Blueprint
 user_bp = Blueprint('user', __name__, url_prefix='/user-api')
 
 # Import sub-routes
-from user_api import routes_auth, routes_article, routes_sync, routes_report, routes_master_data
+from user_api import routes_auth, routes_article, routes_sync, routes_report, routes_master_data, routes_upload
@@ -1,9 +1,9 @@
-from flask import jsonify
 from flask_jwt_extended import jwt_required
 from sqlalchemy.orm import joinedload
 from user_api import user_bp
 from models import MachineModel, Customer, Setting, Parts
 from decorators import user_required
+from utils import wants_columnar, to_columnar, jsonify_layout
 from schemas import MachineModelResponseSchema, CustomerResponseSchema, PartsResponseSchema
 
 
@@ -26,11 +26,19 @@ def get_master_data(user):
         Parts.is_deleted == False,  # noqa: E712
     ).limit(5000).all()
 
-    return jsonify({
+    result = {
         'machine_models': MachineModelResponseSchema().dump(models, many=True),
         'customers': CustomerResponseSchema().dump(customers, many=True),
         'parts': PartsResponseSchema().dump(parts, many=True),
         'settings': {
             'date_format': Setting.get('date_format') or 'YYYY-MM-DD',
         },
-    }), 200
+    }
+
+    # Columnar layout: each list becomes {columns, rows} — keys sent once
+    columnar = wants_columnar()
+    if columnar:
+        for key in ('machine_models', 'customers', 'parts'):
+            result[key] = to_columnar(result[key])
+
+    return jsonify_layout(result, columnar), 200
@@ -1,28 +1,36 @@
 import os
 import json
-import smtplib
-from datetime import datetime, timezone
+from uuid import uuid4
 from flask import jsonify, request, send_file
 from flask_jwt_extended import jwt_required
 from user_api import user_bp
 from extensions import db
-from sqlalchemy.orm import joinedload
-from models import Report, MachineModel, Customer, Parts, PartsConsumption, generate_report_no
-from decorators import user_required
+from sqlalchemy import insert
+from sqlalchemy.orm import joinedload, defer
+from marshmallow import ValidationError
+from models import (Report, ReportAttachment, ReportFieldValue, MachineModel, Customer, Parts, PartsConsumption,
+                    generate_report_no, generate_report_nos)
+from decorators import user_required, idempotent
 from utils import load_schema, paginate_query, apply_sorting, format_paginated
-from schemas import ReportCreateSchema, ReportResponseSchema
-from services.email_service import send_report_email
+from schemas import ReportCreateSchema, ReportResponseSchema, ReportListSchema
+from services.attachment_storage import store_uploads
+from services.email_outbox import enqueue_report_email
+from services.form_index import field_value_rows
+from services.image_variants import send_attachment
 from services.parts_extractor import extract_parts_from_form_data
-from config import UPLOAD_DIR, MAX_UPLOAD_BYTES
+from services.parts_rollup import add_consumption
+from config import UPLOAD_DIR, MAX_UPLOAD_BYTES, REPORT_BATCH_MAX_SIZE
 
 
 REPORTS_DIR = os.path.join(UPLOAD_DIR, 'reports')
 
 
 # Step 1: Submit report → generate report_no → status=pending_pdf
+# (or pdf_queued with render_pdf=true — the server renders it, skip step 2)
 @user_bp.route('/reports', methods=['POST'])
 @jwt_required()
 @user_required
+@idempotent
 def submit_report(user):
     # Mobile sends multipart/form-data when image attachments are present;
     # otherwise plain JSON. load_schema's default get_json() returns None for
@@ -41,8 +49,7 @@ def submit_report(user):
         data, err = load_schema(ReportCreateSchema)
     if err: return err
 
-    current_count = Report.query.filter(Report.company_id == user.company_id).count()
-    if not user.company.check_limit('reports', current_count):
+    if not user.company.check_limit('reports'):
         return jsonify({'message': 'Report limit reached for your package'}), 403
 
     machine_model = MachineModel.query.filter_by(
@@ -59,6 +66,14 @@ def submit_report(user):
             company_id=user.company_id,
         ).first()
 
+    # Stream image attachments (multipart) to the object store before any row is
+    # written or report number reserved — disk I/O never runs under row locks.
+    attachments = []
+    if request.files:
+        attachments, err = store_uploads(request.files)
+        if err:
+            return jsonify({'message': err}), 400
+
     report_no = generate_report_no(user.company_id)
 
     report = Report(
@@ -72,7 +87,7 @@ def submit_report(user):
         user_id=user.id,
         company_id=user.company_id,
         email_recipients=data['recipient_emails'],
-        status='pending_pdf',
+        status='pdf_queued' if data['render_pdf'] else 'pending_pdf',
     )
     db.session.add(report)
     db.session.flush()  # get report.id before inserting consumption rows
@@ -93,36 +108,156 @@ def submit_report(user):
         if report.inspected_at:
             consumption_dt = report.inspected_at.date() if hasattr(report.inspected_at, 'date') else report.inspected_at
 
-        for p in parts_used:
-            db.session.add(PartsConsumption(
-                report_id=report.id,
-                company_id=user.company_id,
-                parts_id=master_map.get(p['parts_code']),  # None if not in master
-                parts_code=p['parts_code'],
-                parts_name=p['parts_name'],
-                qty=p['qty'],
-                unit_price=p['unit_price'],
-                consumption_dt=consumption_dt,
-            ))
-
-    # Save image attachments (multipart) — names match mobile's _imageUploadFiles keys.
-    if request.files:
-        attach_dir = os.path.join(REPORTS_DIR, report.public_id)
-        os.makedirs(attach_dir, exist_ok=True)
-        for key, f in request.files.items():
-            if not f or not f.filename:
-                continue
-            f.save(os.path.join(attach_dir, f.filename))
+        consumption_rows = [{
+            'report_id': report.id,
+            'company_id': user.company_id,
+            'parts_id': master_map.get(p['parts_code']),  # None if not in master
+            'parts_code': p['parts_code'],
+            'parts_name': p['parts_name'],
+            'qty': p['qty'],
+            'unit_price': p['unit_price'],
+            'consumption_dt': consumption_dt,
+        } for p in parts_used]
+        for row in consumption_rows:
+            db.session.add(PartsConsumption(**row))
+        add_consumption(consumption_rows)
+
+    for row in field_value_rows(report.id, user.company_id, data['form_data']):
+        db.session.add(ReportFieldValue(**row))
+
+    # field_name keeps mobile's _imageUploadFiles keys (pic1, pic2 …)
+    for item in attachments:
+        db.session.add(ReportAttachment(report_id=report.id, company_id=user.company_id, **item))
 
     db.session.commit()
 
     return jsonify(ReportResponseSchema().dump(report)), 201
 
 
-# Step 2: Upload PDF → save file → send email → update status
+# Offline replay: many queued reports in one request (JSON only, no attachments).
+# Body: {"reports": [{...same fields as POST /reports..., "client_id": "<draft id>"}]}
+@user_bp.route('/reports/batch', methods=['POST'])
+@jwt_required()
+@user_required
+@idempotent
+def submit_reports_batch(user):
+    body = request.get_json(silent=True) or {}
+    items = body.get('reports')
+    if not isinstance(items, list) or not items:
+        return jsonify({'message': 'reports must be a non-empty list'}), 400
+    if len(items) > REPORT_BATCH_MAX_SIZE:
+        return jsonify({'message': f'Too many reports in one batch (max {REPORT_BATCH_MAX_SIZE})'}), 400
+
+    results = [{'index': i, 'client_id': item.get('client_id') if isinstance(item, dict) else None}
+               for i, item in enumerate(items)]
+
+    # 1. Validate every item
+    valid = []  # (index, data)
+    schema = ReportCreateSchema()
+    for i, item in enumerate(items):
+        try:
+            valid.append((i, schema.load(item if isinstance(item, dict) else {})))
+        except ValidationError as err:
+            results[i].update({'status': 'error', 'errors': err.messages})
+
+    # 2. Resolve machine models / customers with one IN query each
+    model_ids = {d['machine_model_id'] for _, d in valid}
+    customer_ids = {d['customer_id'] for _, d in valid if d.get('customer_id')}
+    models_map = {m.public_id: m for m in MachineModel.query.filter(
+        MachineModel.public_id.in_(model_ids), MachineModel.company_id == user.company_id).all()} if model_ids else {}
+    customers_map = {c.public_id: c for c in Customer.query.filter(
+        Customer.public_id.in_(customer_ids), Customer.company_id == user.company_id).all()} if customer_ids else {}
+
+    accepted = []
+    for i, data in valid:
+        if data['machine_model_id'] not in models_map:
+            results[i].update({'status': 'error', 'errors': {'machine_model_id': ['Machine model not found']}})
+        else:
+            accepted.append((i, data))
+
+    if accepted:
+        if not user.company.check_limit('reports', add_count=len(accepted)):
+            return jsonify({'message': f'Batch would exceed report limit (current: {user.company.resource_count("reports")}, adding: {len(accepted)})'}), 403
+
+        # 3. All report numbers in one allocation
+        report_nos = generate_report_nos(user.company_id, len(accepted))
+
+        # 4. Bulk-insert reports (executemany), then read their ids back in one query
+        report_rows = []
+        for (i, data), report_no in zip(accepted, report_nos):
+            customer = customers_map.get(data.get('customer_id'))
+            report_rows.append({
+                'public_id': str(uuid4()),
+                'report_no': report_no,
+                'form_data': data['form_data'],
+                'machine_model_id': models_map[data['machine_model_id']].id,
+                'customer_id': customer.id if customer else None,
+                'serial_no': data.get('serial_no'),
+                'inspector_name': data.get('inspector_name'),
+                'inspected_at': data.get('inspected_at'),
+                'user_id': user.id,
+                'company_id': user.company_id,
+                'email_recipients': data['recipient_emails'],
+                'status': 'pdf_queued' if data['render_pdf'] else 'pending_pdf',
+            })
+        db.session.execute(insert(Report), report_rows)
+        ids = dict(db.session.query(Report.public_id, Report.id).filter(
+            Report.public_id.in_([r['public_id'] for r in report_rows])).all())
+
+        # 5. Parts consumption for the whole batch: one master lookup, one executemany
+        parts_by_report = [extract_parts_from_form_data(row['form_data']) for row in report_rows]
+        codes = {p['parts_code'] for parts in parts_by_report for p in parts}
+        master_map = {
+            m.parts_code: m.id
+            for m in Parts.query.filter(
+                Parts.company_id == user.company_id,
+                Parts.parts_code.in_(codes),
+                Parts.is_deleted == False,
+            ).all()
+        } if codes else {}
+
+        consumption_rows = []
+        for row, parts in zip(report_rows, parts_by_report):
+            consumption_dt = row['inspected_at'].date() if row['inspected_at'] else None
+            for p in parts:
+                consumption_rows.append({
+                    'report_id': ids[row['public_id']],
+                    'company_id': user.company_id,
+                    'parts_id': master_map.get(p['parts_code']),  # None if not in master
+                    'parts_code': p['parts_code'],
+                    'parts_name': p['parts_name'],
+                    'qty': p['qty'],
+                    'unit_price': p['unit_price'],
+                    'consumption_dt': consumption_dt,
+                })
+        if consumption_rows:
+            db.session.execute(insert(PartsConsumption), consumption_rows)
+            add_consumption(consumption_rows)
+
+        field_rows = [r for row in report_rows
+                      for r in field_value_rows(ids[row['public_id']], user.company_id, row['form_data'])]
+        if field_rows:
+            db.session.execute(insert(ReportFieldValue), field_rows)
+
+        db.session.commit()
+
+        for (i, _), row in zip(accepted, report_rows):
+            results[i].update({'status': 'created', 'report': {
+                'id': row['public_id'], 'report_no': row['report_no'], 'status': row['status'],
+            }})
+
+    created = sum(1 for r in results if r['status'] == 'created')
+    return jsonify({
+        'results': results,
+        'summary': {'total': len(results), 'created': created, 'failed': len(results) - created},
+    }), 200
+
+
+# Step 2: Upload PDF → save file → queue email (flask email-worker sends it)
 @user_bp.route('/reports/<report_public_id>/upload-pdf', methods=['POST'])
 @jwt_required()
 @user_required
+@idempotent
 def upload_pdf(user, report_public_id):
     report = Report.query.filter_by(public_id=report_public_id, user_id=user.id).first()
     if not report:
@@ -155,15 +290,8 @@ def upload_pdf(user, report_public_id):
     file.save(pdf_path)
     report.pdf_path = pdf_path
 
-    # Send email
-    cc_email = user.company.report_cc_email if user.company else None
-    try:
-        send_report_email(report, user, report.email_recipients, pdf_path, cc_email=cc_email)
-        report.status = 'sent'
-        report.sent_at = datetime.now(timezone.utc).replace(tzinfo=None)
-    except (smtplib.SMTPException, OSError, RuntimeError):
-        report.status = 'email_failed'
-
+    # Queue email in the same commit — worker moves status to sent / email_failed
+    enqueue_report_email(report)
     db.session.commit()
 
     return jsonify(ReportResponseSchema().dump(report)), 200
@@ -173,7 +301,10 @@ def upload_pdf(user, report_public_id):
 @jwt_required()
 @user_required
 def get_reports(user):
+    # form_data holds the whole form incl. base64 signatures — never read it for list rows
     query = Report.query.options(
+        defer(Report.form_data, raiseload=True),
+        defer(Report.email_recipients, raiseload=True),
         joinedload(Report.machine_model),
         joinedload(Report.customer),
         joinedload(Report.user),
@@ -182,12 +313,23 @@ def get_reports(user):
     query = apply_sorting(query, Report, sortable_fields=['created_at', 'report_no', 'status'], default_sort='-created_at')
     result = paginate_query(query, default_per_page=20)
 
-    return format_paginated('reports', result, schema=ReportResponseSchema())
+    return format_paginated('reports', result, schema=ReportListSchema())
+
+
+@user_bp.route('/reports/<report_public_id>', methods=['GET'])
+@jwt_required()
+@user_required
+def get_report(user, report_public_id):
+    report = Report.query.filter_by(public_id=report_public_id, user_id=user.id).first()
+    if not report:
+        return jsonify({'message': 'Report not found'}), 404
+    return jsonify(ReportResponseSchema().dump(report)), 200
 
 
 @user_bp.route('/reports/<report_public_id>/retry-email', methods=['POST'])
 @jwt_required()
 @user_required
+@idempotent
 def retry_email(user, report_public_id):
     report = Report.query.filter_by(public_id=report_public_id, user_id=user.id).first()
     if not report:
@@ -199,15 +341,10 @@ def retry_email(user, report_public_id):
     if not report.pdf_path or not os.path.exists(report.pdf_path):
         return jsonify({'message': 'PDF file not found. Cannot retry.'}), 400
 
-    cc_email = user.company.report_cc_email if user.company else None
-    try:
-        send_report_email(report, user, report.email_recipients, report.pdf_path, cc_email=cc_email)
-        report.status = 'sent'
-        report.sent_at = datetime.now(timezone.utc).replace(tzinfo=None)
-        db.session.commit()
-        return jsonify(ReportResponseSchema().dump(report)), 200
-    except (smtplib.SMTPException, OSError, RuntimeError) as e:
-        return jsonify({'message': f'Email send failed: {str(e)}'}), 500
+    enqueue_report_email(report)
+    db.session.commit()
+
+    return jsonify(ReportResponseSchema().dump(report)), 200
 
 
 @user_bp.route('/reports/<report_public_id>/pdf', methods=['GET'])
@@ -222,3 +359,31 @@ def get_report_pdf(user, report_public_id):
         return jsonify({'message': 'PDF not available'}), 404
 
     return send_file(report.pdf_path, mimetype='application/pdf')
+
+
+@user_bp.route('/reports/<report_public_id>/attachments', methods=['GET'])
+@jwt_required()
+@user_required
+def get_report_attachments(user, report_public_id):
+    report = Report.query.filter_by(public_id=report_public_id, user_id=user.id).first()
+    if not report:
+        return jsonify({'message': 'Report not found'}), 404
+
+    attachments = ReportAttachment.query.filter_by(report_id=report.id).order_by(ReportAttachment.id.asc()).all()
+    return jsonify({'attachments': [a.to_dict() for a in attachments]}), 200
+
+
+# ?size=thumbnail|web|original (default web) — falls back to the original until variants are ready
+@user_bp.route('/reports/<report_public_id>/attachments/<attachment_id>', methods=['GET'])
+@jwt_required()
+@user_required
+def get_report_attachment(user, report_public_id, attachment_id):
+    attachment = ReportAttachment.query.join(Report).filter(
+        Report.public_id == report_public_id,
+        Report.user_id == user.id,
+        ReportAttachment.public_id == attachment_id,
+    ).first()
+    if not attachment:
+        return jsonify({'message': 'Attachment not found'}), 404
+
+    return send_attachment(attachment)
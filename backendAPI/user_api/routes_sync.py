@@ -1,10 +1,18 @@
+import base64
+import binascii
+import json
+import queue
 from datetime import datetime, timezone
-from flask import request, jsonify
+from flask import request, jsonify, Response
 from flask_jwt_extended import jwt_required
+from sqlalchemy import or_, and_
 from user_api import user_bp
 from models import Article
 from decorators import user_required
-from config import SYNC_PAGE_SIZE
+from utils import wants_columnar, to_columnar, jsonify_layout
+from sse_manager import sse_manager
+from sync_notifier import sync_notifier, company_channel
+from config import SYNC_PAGE_SIZE, SSE_HEARTBEAT_INTERVAL
 
 
 def _parse_since(value):
@@ -19,15 +27,53 @@ def _parse_since(value):
         return None
 
 
+def _encode_cursor(article):
+    """Opaque page cursor = base64url("<updated_at iso>|<id>")."""
+    raw = f"{article.updated_at.isoformat()}|{article.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _decode_cursor(value):
+    """Return (updated_at, id) from an opaque cursor, or None if malformed."""
+    if not value:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)).decode()
+        ts, _, article_id = raw.rpartition('|')
+        return datetime.fromisoformat(ts), int(article_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
 @user_bp.route('/sync', methods=['GET'])
 @jwt_required()
 @user_required
 def sync(user):
-    """Delta sync — return articles changed since `since` timestamp."""
+    """Delta sync — return articles changed since `since` timestamp.
+
+    Pages are keyed on (updated_at, id) so rows sharing one timestamp (bulk
+    publish) are neither skipped nor re-sent. Follow-up pages pass the
+    `next_cursor` from the previous response as `cursor`.
+
+    With the columnar layout (see utils.wants_columnar) `upserted` is sent as
+    {columns, rows} instead of a list of objects.
+    """
     since_str = request.args.get('since')
-    since = _parse_since(since_str)
-    if since is None:
-        return jsonify({'message': 'Invalid since format. Use ISO 8601.'}), 400
+    cursor_str = request.args.get('cursor')
+
+    cursor = None
+    if cursor_str:
+        cursor = _decode_cursor(cursor_str)
+        if cursor is None:
+            return jsonify({'message': 'Invalid cursor'}), 400
+        since = None
+    else:
+        since = _parse_since(since_str)
+        if since is None:
+            # Older app builds echo next_cursor back as `since`
+            cursor = _decode_cursor(since_str)
+            if cursor is None:
+                return jsonify({'message': 'Invalid since format. Use ISO 8601.'}), 400
 
     # Capture server_time BEFORE query → articles created between query and response
     # will be picked up in the next sync (updated_at > server_time)
@@ -38,13 +84,21 @@ def sync(user):
     #   published + deleted      → deleted  (client removes)
     #   draft + not deleted      → deleted  (client removes — article ถูก unpublish)
     #   draft + deleted          → deleted  (client removes)
-    query = Article.query.filter(Article.updated_at > since)
+    if cursor:
+        cursor_ts, cursor_id = cursor
+        query = Article.query.filter(or_(
+            Article.updated_at > cursor_ts,
+            and_(Article.updated_at == cursor_ts, Article.id > cursor_id),
+        ))
+    else:
+        query = Article.query.filter(Article.updated_at > since)
 
     if user.company_id:
         query = query.filter(Article.company_id == user.company_id)
 
+    # Served by ix_articles_company_updated_id (company_id, updated_at, id)
     articles = query \
-        .order_by(Article.updated_at.asc()) \
+        .order_by(Article.updated_at.asc(), Article.id.asc()) \
         .limit(SYNC_PAGE_SIZE + 1) \
         .all()
 
@@ -52,6 +106,7 @@ def sync(user):
     if has_more:
         articles = articles[:SYNC_PAGE_SIZE]
 
+    columnar = wants_columnar()
     upserted = []
     deleted = []
 
@@ -69,7 +124,7 @@ def sync(user):
             'since': since_str,
             'changes': {
                 'articles': {
-                    'upserted': upserted,
+                    'upserted': to_columnar(upserted) if columnar else upserted,
                     'deleted': deleted,
                 }
             },
@@ -77,8 +132,53 @@ def sync(user):
         }
     }
 
-    # Pagination cursor: client uses this as `since` for the next page
+    # Pagination cursor: client passes this as `cursor` for the next page
     if has_more and articles:
-        result['sync']['next_cursor'] = articles[-1].updated_at.isoformat()
+        result['sync']['next_cursor'] = _encode_cursor(articles[-1])
+
+    return jsonify_layout(result, columnar), 200
 
-    return jsonify(result), 200
+
+@user_bp.route('/sync/versions', methods=['GET'])
+@jwt_required()
+@user_required
+def sync_versions(user):
+    """Current collection versions — cheap poll fallback for /sync/stream."""
+    return jsonify({'versions': sync_notifier.versions(user.company_id)}), 200
+
+
+@user_bp.route('/sync/stream', methods=['GET'])
+@jwt_required()
+@user_required
+def sync_stream(user):
+    """SSE change feed for the user's company.
+
+    Sends a `versions` snapshot on connect, then a `version` event
+    ({collection, version}) whenever articles or master data change. Clients
+    call /sync or /master-data only when a version moves past what they hold.
+    """
+    company_id = user.company_id
+    channel = company_channel(company_id)
+
+    def generate():
+        # Subscribe before taking the snapshot so no bump falls in between
+        q = sse_manager.subscribe(channel)
+        try:
+            yield f"event: versions\ndata: {json.dumps(sync_notifier.versions(company_id))}\n\n"
+            while True:
+                try:
+                    msg = q.get(timeout=SSE_HEARTBEAT_INTERVAL)
+                    yield f"event: {msg['type']}\ndata: {json.dumps(msg['data'], ensure_ascii=False)}\n\n"
+                except queue.Empty:
+                    yield ": heartbeat\n\n"
+        finally:
+            sse_manager.unsubscribe(channel, q)
+
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',
+        }
+    )
@@ -0,0 +1,214 @@
+import mimetypes
+import os
+from datetime import datetime, timedelta, timezone
+from flask import jsonify, request
+from flask_jwt_extended import jwt_required
+from sqlalchemy import func
+from user_api import user_bp
+from extensions import db
+from models import Report, ReportAttachment, UploadSession
+from decorators import user_required, idempotent
+from utils import load_schema
+from schemas import UploadSessionCreateSchema, ReportResponseSchema
+from services.attachment_storage import adopt_object, extension
+from services.email_outbox import enqueue_report_email
+from services import resumable_upload
+from werkzeug.utils import secure_filename
+from config import (UPLOAD_DIR, ALLOWED_ATTACHMENT_EXTENSIONS, ATTACHMENT_MAX_FILE_BYTES, ATTACHMENT_MAX_REPORT_BYTES,
+                    RESUMABLE_PDF_MAX_BYTES, RESUMABLE_CHUNK_BYTES, RESUMABLE_UPLOAD_TTL_HOURS)
+
+
+REPORTS_DIR = os.path.join(UPLOAD_DIR, 'reports')
+
+# Resumable upload protocol — for PDFs / photos too large or a connection too
+# flaky for one multipart request:
+#   POST /uploads                 {purpose, report_id, filename, size, sha256} → id, offset
+#   PUT  /uploads/<id>            raw bytes, header Upload-Offset: <offset>     → offset
+#   GET  /uploads/<id>            current offset (resume after a dropped connection)
+#   POST /uploads/<id>/finalize   verify size + sha256, attach to the report
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _get_session(user, upload_id, lock=False):
+    query = UploadSession.query.filter_by(public_id=upload_id, user_id=user.id)
+    if lock:
+        query = query.with_for_update().populate_existing()
+    session = query.first()
+    if session and session.status == 'open' and session.expires_at < _now():
+        return None
+    return session
+
+
+def _max_size(purpose):
+    return RESUMABLE_PDF_MAX_BYTES if purpose == 'report_pdf' else ATTACHMENT_MAX_FILE_BYTES
+
+
+def _attachment_bytes(report_id):
+    return db.session.query(func.coalesce(func.sum(ReportAttachment.size_bytes), 0)) \
+        .filter(ReportAttachment.report_id == report_id).scalar()
+
+
+def _finalized_response(session):
+    body = {'upload': session.to_dict(), 'report': ReportResponseSchema().dump(session.report)}
+    if session.purpose == 'report_attachment':
+        attachment = ReportAttachment.query.filter_by(
+            report_id=session.report_id, content_hash=session.sha256, field_name=session.field_name,
+        ).order_by(ReportAttachment.id.desc()).first()
+        body['attachment'] = attachment.to_dict() if attachment else None
+    return jsonify(body), 200
+
+
+@user_bp.route('/uploads', methods=['POST'])
+@jwt_required()
+@user_required
+@idempotent
+def create_upload(user):
+    data, err = load_schema(UploadSessionCreateSchema)
+    if err:
+        return err
+
+    report = Report.query.filter_by(public_id=data['report_id'], user_id=user.id).first()
+    if not report:
+        return jsonify({'message': 'Report not found'}), 404
+
+    purpose = data['purpose']
+    max_size = _max_size(purpose)
+    if data['size'] > max_size:
+        return jsonify({'message': f'File too large (max {max_size // 1024 // 1024}MB)'}), 400
+
+    if purpose == 'report_pdf':
+        if report.status != 'pending_pdf':
+            return jsonify({'message': 'Report is not in pending_pdf status'}), 400
+    else:
+        if extension(data['filename']) not in ALLOWED_ATTACHMENT_EXTENSIONS:
+            return jsonify({'message': f"{data['filename']}: file type not allowed"}), 400
+        if _attachment_bytes(report.id) + data['size'] > ATTACHMENT_MAX_REPORT_BYTES:
+            return jsonify({'message': f'Attachments too large (max {ATTACHMENT_MAX_REPORT_BYTES // 1024 // 1024}MB per report)'}), 400
+
+    session = UploadSession(
+        user_id=user.id,
+        report_id=report.id,
+        purpose=purpose,
+        field_name=data['field_name'] or (None if purpose == 'report_pdf' else 'attachment'),
+        filename=(secure_filename(data['filename']) or 'upload')[:255],
+        total_size=data['size'],
+        sha256=data['sha256'].lower(),
+        expires_at=_now() + timedelta(hours=RESUMABLE_UPLOAD_TTL_HOURS),
+    )
+    db.session.add(session)
+    db.session.flush()
+    resumable_upload.create_part(session)
+    db.session.commit()
+
+    return jsonify({**session.to_dict(), 'chunk_size': RESUMABLE_CHUNK_BYTES}), 201
+
+
+@user_bp.route('/uploads/<upload_id>', methods=['GET'])
+@jwt_required()
+@user_required
+def get_upload(user, upload_id):
+    session = _get_session(user, upload_id)
+    if not session:
+        return jsonify({'message': 'Upload not found'}), 404
+    return jsonify(session.to_dict()), 200
+
+
+@user_bp.route('/uploads/<upload_id>', methods=['PUT'])
+@jwt_required()
+@user_required
+def put_upload_chunk(user, upload_id):
+    try:
+        offset = int(request.headers.get('Upload-Offset', ''))
+    except ValueError:
+        return jsonify({'message': 'Upload-Offset header is required'}), 400
+
+    session = _get_session(user, upload_id)
+    if not session:
+        return jsonify({'message': 'Upload not found'}), 404
+    if session.status != 'open':
+        return jsonify({'message': 'Upload already finalized'}), 409
+    if offset != session.received_bytes:
+        return jsonify({'message': 'Offset mismatch', 'offset': session.received_bytes}), 409
+
+    # Receive the body with no transaction open: a dropped 3G connection must
+    # not keep a row lock that the client's resume PUT would then wait on
+    # (expunged so reading it below does not start a new transaction)
+    db.session.expunge(session)
+    db.session.commit()
+    received, err = resumable_upload.receive_chunk(session, request.stream, offset)
+    if err:
+        return jsonify({'message': err, 'offset': offset}), 400
+    chunk_path, _ = received
+
+    # Short locked section: re-check the offset, splice the chunk in, advance
+    session = _get_session(user, upload_id, lock=True)
+    if not session or session.status != 'open' or session.received_bytes != offset:
+        resumable_upload.discard_chunk(chunk_path)
+        db.session.rollback()
+        if not session:
+            return jsonify({'message': 'Upload not found'}), 404
+        return jsonify({'message': 'Offset mismatch', 'offset': session.received_bytes}), 409
+
+    session.received_bytes = resumable_upload.commit_chunk(session, chunk_path, offset)
+    db.session.commit()
+    return jsonify(session.to_dict()), 200
+
+
+@user_bp.route('/uploads/<upload_id>/finalize', methods=['POST'])
+@jwt_required()
+@user_required
+def finalize_upload(user, upload_id):
+    session = _get_session(user, upload_id, lock=True)
+    if not session:
+        return jsonify({'message': 'Upload not found'}), 404
+    if session.status == 'finalized':
+        return _finalized_response(session)
+    if session.received_bytes != session.total_size:
+        db.session.rollback()
+        return jsonify({'message': 'Upload incomplete', 'offset': session.received_bytes}), 409
+
+    if resumable_upload.file_sha256(session) != session.sha256:
+        # Corrupt somewhere along the way — start the bytes over on the same session
+        resumable_upload.create_part(session)
+        session.received_bytes = 0
+        db.session.commit()
+        return jsonify({'message': 'Checksum mismatch, upload restarted', 'offset': 0}), 422
+
+    report = session.report
+    if session.purpose == 'report_pdf':
+        if report.status != 'pending_pdf':
+            db.session.rollback()
+            return jsonify({'message': 'Report is not in pending_pdf status'}), 400
+        if resumable_upload.read_header(session, 5) != b'%PDF-':
+            db.session.rollback()
+            return jsonify({'message': 'File is not a valid PDF'}), 400
+
+        os.makedirs(REPORTS_DIR, exist_ok=True)
+        pdf_path = os.path.join(REPORTS_DIR, f'{report.public_id}.pdf')
+        os.replace(resumable_upload.part_path(session), pdf_path)
+        report.pdf_path = pdf_path
+        enqueue_report_email(report)
+    else:
+        if _attachment_bytes(report.id) + session.total_size > ATTACHMENT_MAX_REPORT_BYTES:
+            db.session.rollback()
+            return jsonify({'message': f'Attachments too large (max {ATTACHMENT_MAX_REPORT_BYTES // 1024 // 1024}MB per report)'}), 400
+
+        ext = extension(session.filename)
+        adopt_object(resumable_upload.part_path(session), session.sha256, ext)
+        db.session.add(ReportAttachment(
+            report_id=report.id,
+            company_id=report.company_id,
+            field_name=session.field_name,
+            original_filename=session.filename,
+            content_hash=session.sha256,
+            ext=ext,
+            content_type=mimetypes.guess_type(session.filename)[0],
+            size_bytes=session.total_size,
+        ))
+
+    session.status = 'finalized'
+    db.session.commit()
+    return _finalized_response(session)
@@ -100,6 +100,37 @@ def format_paginated(key, result, schema=None):
     }), 200
 
 
+# ── Columnar layout (content negotiation) ──
+
+COLUMNAR_MIMETYPE = 'application/vnd.cms.columnar+json'
+
+
+def wants_columnar():
+    """True when the client asked for the columnar layout via
+    `Accept: application/vnd.cms.columnar+json` or `?layout=columnar`."""
+    if request.args.get('layout') == 'columnar':
+        return True
+    return request.accept_mimetypes.best_match(['application/json', COLUMNAR_MIMETYPE]) == COLUMNAR_MIMETYPE
+
+
+def to_columnar(rows):
+    """[{k: v}, ...] → {'columns': [k, ...], 'rows': [[v, ...], ...]}.
+    Keys are sent once instead of on every row."""
+    if not rows:
+        return {'columns': [], 'rows': []}
+    columns = list(rows[0].keys())
+    return {'columns': columns, 'rows': [[r.get(c) for c in columns] for r in rows]}
+
+
+def jsonify_layout(payload, columnar):
+    """jsonify + label the negotiated layout so caches keep both variants apart."""
+    response = jsonify(payload)
+    if columnar:
+        response.mimetype = COLUMNAR_MIMETYPE
+    response.vary.add('Accept')
+    return response
+
+
 # ── Token blacklist ──
 
 def blacklist_tokens(claims, public_id, user_type, refresh_token_raw=None):
@@ -242,7 +273,9 @@ def apply_filters(query, model, filterable_fields, search_logic='AND'):
 
 # ── Sorting ──
 
-def apply_sorting(query, model, sortable_fields, default_sort=None):
+def apply_sorting(query, model, sortable_fields, default_sort=None, resolve=None):
+    """`resolve(query, field)` → (query, column or tuple of columns) sorts on fields
+    that are not model columns (e.g. joined values); return (query, None) to skip."""
     sort_param = request.args.get('sort_by', default_sort)
     if not sort_param:
         return query
@@ -254,7 +287,17 @@ def apply_sorting(query, model, sortable_fields, default_sort=None):
             field, direction = item, 'asc'
 
         if field in sortable_fields:
-            column = getattr(model, field)
+            columns = (getattr(model, field),)
+        elif resolve:
+            query, columns = resolve(query, field)
+            if columns is None:
+                continue
+            if not isinstance(columns, tuple):
+                columns = (columns,)
+        else:
+            continue
+
+        for column in columns:
             query = query.order_by(column.desc() if direction == 'desc' else column.asc())
 
     return query
@@ -17,4 +17,8 @@ class ApiConfig {
     'API_BASE_URL',
     defaultValue: 'http://127.0.0.1:5000/user-api',
   );
-}
\ No newline at end of file
+
+  // Let the server render report PDFs (flask pdf-worker) instead of capturing
+  // the form on the device:  --dart-define=SERVER_PDF=true
+  static const bool serverPdf = bool.fromEnvironment('SERVER_PDF', defaultValue: false);
+}
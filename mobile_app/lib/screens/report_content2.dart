@@ -10,6 +10,7 @@ import 'package:pdf/widgets.dart' as pw;
 import 'form_widgets/form_widgets.dart';
 import 'preview_shell.dart';
 import '../services/local_db.dart';
+import '../config/api_config.dart';
 import '../services/api/report_api.dart';
 import '../services/connectivity_service.dart';
 import 'email_dialog.dart';
@@ -388,6 +389,10 @@ class ReportContentWidgetState2 extends State<ReportContentWidget2> {
           machineModelId: widget.machineModel?['id'] ?? '',
           serialNo: _serialNoController.text,
           inspectorName: _inspectorByController.text,
+          renderPdf: ApiConfig.serverPdf,
+          // Retrying a draft whose first submit reached the server but whose
+          // response was lost returns the same report instead of a new one
+          idempotencyKey: _draftId != null ? 'report-$_draftId' : null,
         );
         reportNo = result['report_no'] as String?;
         reportId = result['id'] as String?;
@@ -396,6 +401,29 @@ class ReportContentWidgetState2 extends State<ReportContentWidget2> {
         if (_draftId != null && reportId != null) {
           await LocalDb().updateDraftStatus(_draftId!, 'sent', reportNo: reportNo, reportPublicId: reportId);
         }
+
+        // Server renders the PDF and queues the email — nothing to capture or upload
+        if (result['status'] == 'pdf_queued') {
+          if (mounted) {
+            showDialog(
+              context: context,
+              builder: (ctx) => AlertDialog(
+                title: const Text('Success'),
+                content: Text('Report submitted.\nReport No: $reportNo'),
+                actions: [
+                  TextButton(
+                    onPressed: () {
+                      Navigator.pop(ctx);
+                      Navigator.pop(context, true);
+                    },
+                    child: const Text('OK'),
+                  ),
+                ],
+              ),
+            );
+          }
+          return;
+        }
       }
 
       // Step 2: Fill report_no in form
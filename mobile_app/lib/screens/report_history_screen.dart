@@ -138,9 +138,12 @@ class _ReportHistoryScreenState extends State<ReportHistoryScreen> {
   Color _statusColor(String status) {
     switch (status) {
       case 'sent': return Colors.green;
+      case 'email_queued': return Colors.lightBlue;
       case 'email_failed': return Colors.red;
       case 'submitted': return Colors.orange;
       case 'pending_pdf': return Colors.deepOrange;
+      case 'pdf_queued':
+      case 'rendering_pdf': return Colors.blueGrey;
       case 'reviewed': return Colors.blue;
       case 'approved': return Colors.teal;
       case 'rejected': return Colors.grey;
@@ -205,7 +208,7 @@ class _ReportHistoryScreenState extends State<ReportHistoryScreen> {
                                   // Resolve back to original index so retry handlers update the right row.
                                   final origIndex = _reports.indexOf(report);
                                   final status = report['status'] as String? ?? '';
-                                  final hasPdf = status != 'pending_pdf';
+                                  final hasPdf = !const ['pending_pdf', 'pdf_queued', 'rendering_pdf'].contains(status);
                                   return ListTile(
                                     leading: Icon(Icons.description, color: _statusColor(status)),
                                     title: Text(report['report_no'] ?? ''),
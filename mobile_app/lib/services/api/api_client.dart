@@ -141,13 +141,14 @@ class ApiClient {
     bool needsAuth = true,
     String? errorMessage,
     Map<int, String>? statusMessages,
+    Map<String, String>? headers,
     Duration timeout = const Duration(seconds: 10),
   }) async {
     final response = await makeRequest(
       () async => await http
           .post(
             Uri.parse('${ApiConfig.baseUrl}$endpoint'),
-            headers: await getHeaders(needsAuth: needsAuth),
+            headers: {...await getHeaders(needsAuth: needsAuth), ...?headers},
             body: body != null ? jsonEncode(body) : null,
           )
           .timeout(timeout),
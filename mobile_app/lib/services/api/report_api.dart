@@ -1,5 +1,6 @@
 import 'dart:convert';
 import 'dart:typed_data';
+import 'package:crypto/crypto.dart';
 import 'package:http/http.dart' as http;
 import '../../config/api_config.dart';
 import '../token_manager.dart';
@@ -23,12 +24,16 @@ class ReportApi {
     String? inspectorName,
     String? inspectedAt,
     Map<String, String>? imageAttachments,
+    bool renderPdf = false,
+    String? idempotencyKey,
   }) async {
+    final headers = {if (idempotencyKey != null) 'Idempotency-Key': idempotencyKey};
     if (imageAttachments == null || imageAttachments.isEmpty) {
       final body = <String, dynamic>{
         'form_data': formData,
         'recipient_emails': recipientEmails,
         'machine_model_id': machineModelId,
+        'render_pdf': renderPdf,
       };
       if (customerId != null) body['customer_id'] = customerId;
       if (serialNo != null) body['serial_no'] = serialNo;
@@ -39,17 +44,20 @@ class ReportApi {
         '/reports',
         (json) => json,
         body: body,
+        headers: headers,
       );
     }
 
     final uri = Uri.parse('${ApiConfig.baseUrl}/reports');
     final response = await _sendMultipart(
       uri,
+      headers: headers,
       timeout: const Duration(seconds: 60),
       build: (req) async {
         req.fields['form_data'] = jsonEncode(formData);
         req.fields['recipient_emails'] = jsonEncode(recipientEmails);
         req.fields['machine_model_id'] = machineModelId;
+        req.fields['render_pdf'] = renderPdf.toString();
         if (customerId != null) req.fields['customer_id'] = customerId;
         if (serialNo != null) req.fields['serial_no'] = serialNo;
         if (inspectorName != null) req.fields['inspector_name'] = inspectorName;
@@ -72,8 +80,11 @@ class ReportApi {
 
   Future<Map<String, dynamic>> uploadPdf(String reportPublicId, Uint8List pdfBytes) async {
     final uri = Uri.parse('${ApiConfig.baseUrl}/reports/$reportPublicId/upload-pdf');
+    // Same report + same bytes → same key, so a retry after a lost response
+    // replays the first result instead of queueing a second email.
     final response = await _sendMultipart(
       uri,
+      headers: {'Idempotency-Key': 'pdf-$reportPublicId-${sha256.convert(pdfBytes)}'},
       timeout: const Duration(seconds: 30),
       build: (req) async {
         req.files.add(http.MultipartFile.fromBytes('file', pdfBytes, filename: '$reportPublicId.pdf'));
@@ -95,11 +106,13 @@ class ReportApi {
     Uri uri, {
     required Future<void> Function(http.MultipartRequest req) build,
     required Duration timeout,
+    Map<String, String>? headers,
   }) async {
     Future<http.Response> attempt() async {
       final token = await _tokenManager.getAccessToken();
       final req = http.MultipartRequest('POST', uri);
       if (token != null) req.headers['Authorization'] = 'Bearer $token';
+      if (headers != null) req.headers.addAll(headers);
       await build(req);
       final streamed = await req.send().timeout(timeout);
       return http.Response.fromStream(streamed);
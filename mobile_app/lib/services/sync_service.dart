@@ -34,7 +34,7 @@ class SyncService {
   static const int _maxPages = 50;
 
   Future<bool> _fetchPages(String? since) async {
-    String? cursor = since;
+    String? cursor;
     int pageCount = 0;
 
     while (pageCount < _maxPages) {
@@ -43,7 +43,10 @@ class SyncService {
       final syncData = await _client.get<Map<String, dynamic>>(
         '/sync',
         (data) => data['sync'] as Map<String, dynamic>,
-        queryParams: cursor != null ? {'since': cursor} : null,
+        // First page → since (timestamp); later pages → opaque next_cursor
+        queryParams: cursor != null
+            ? {'cursor': cursor}
+            : (since != null ? {'since': since} : null),
         errorMessage: 'Sync failed',
         timeout: const Duration(seconds: 15),
       );